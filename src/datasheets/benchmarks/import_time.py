@@ -0,0 +1,66 @@
+"""
+Benchmark of the time it takes to import the command line modules, each in a fresh
+interpreter.
+
+Example use:
+
+    uv run src/datasheets/benchmarks/import_time.py --repeats 5
+
+"""
+
+import argparse
+import subprocess
+import sys
+
+MODULES = [
+    "datasheets.bump_version",
+    "datasheets.datasheet",
+    "datasheets.generate_sheet",
+    "datasheets.tables",
+    "datasheets.update_descriptive_statistics",
+]
+
+# modules which take seconds to import, and should only be imported when they are used
+HEAVY_MODULES = ["datasets", "plotnine", "plotly", "pyarrow", "yaml"]
+
+
+def measure_import(module: str) -> tuple[float, list[str]]:
+    """Imports the module in a fresh interpreter.
+
+    Returns:
+        The import time in seconds and the heavy modules which were imported with it.
+    """
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    seconds, heavy_modules = result.stdout.splitlines()
+    return float(seconds), [m for m in heavy_modules.split(",") if m]
+
+
+def main(repeats: int):
+    print(f"Import time of each module (best of {repeats}):")
+    for module in MODULES:
+        timings = []
+        for _ in range(repeats):
+            seconds, heavy_modules = measure_import(module)
+            timings.append(seconds)
+        heavy = ", ".join(heavy_modules) if heavy_modules else "none"
+        print(f"  {module:<45} {min(timings):.3f}s (heavy imports: {heavy})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure the import time of the command line modules."
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=3, help="Number of times to import each module."
+    )
+    args = parser.parse_args()
+    main(args.repeats)
@@ -0,0 +1,118 @@
+"""
+Benchmark of the near duplicate detection in `deduplication.py` on synthetic corpora
+of increasing size. Each corpus contains planted near duplicates (copies with a few
+words replaced) spread across its sources, which are used to measure the recall.
+
+Example use:
+
+    uv run src/datasheets/benchmarks/near_duplicates.py --n_documents 10000 100000 --jobs 4
+
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from datasheets.deduplication import MinHashConfig, find_near_duplicates
+
+VOCABULARY_SIZE = 20_000
+
+
+def create_corpus(
+    output_dir: Path,
+    n_documents: int,
+    n_sources: int = 4,
+    document_length: int = 200,
+    duplicate_fraction: float = 0.05,
+    n_changed_words: int = 2,
+    seed: int = 42,
+) -> tuple[dict[str, list[Path]], set[tuple[str, str]]]:
+    """Writes a synthetic corpus of random documents to Parquet files.
+
+    Returns:
+        The files of each source and the ids of the planted near duplicate pairs.
+    """
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(VOCABULARY_SIZE)]
+
+    documents = [rng.choices(vocabulary, k=document_length) for _ in range(n_documents)]
+    ids = [f"doc-{i}" for i in range(n_documents)]
+    planted_pairs = set()
+    # the originals and their copies are distinct documents, such that no copy is
+    # overwritten by another copy
+    n_pairs = int(n_documents * duplicate_fraction) // 2
+    planted = rng.sample(range(n_documents), 2 * n_pairs)
+    for i, j in zip(planted[:n_pairs], planted[n_pairs:]):
+        copy = list(documents[i])
+        for position in rng.sample(range(document_length), n_changed_words):
+            copy[position] = rng.choice(vocabulary)
+        documents[j] = copy
+        planted_pairs.add((min(ids[i], ids[j]), max(ids[i], ids[j])))
+
+    sources: dict[str, list[Path]] = {}
+    for source_index in range(n_sources):
+        path = output_dir / f"source-{source_index}.parquet"
+        rows = range(source_index, n_documents, n_sources)
+        table = pa.table(
+            {
+                "id": [ids[i] for i in rows],
+                "text": [" ".join(documents[i]) for i in rows],
+            }
+        )
+        pq.write_table(table, path)
+        sources[f"source-{source_index}"] = [path]
+    return sources, planted_pairs
+
+
+def main(n_documents: list[int], jobs: int, threshold: float):
+    config = MinHashConfig(threshold=threshold)
+    print(f"Near duplicates with {config} and {jobs} job(s):")
+    for n in n_documents:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            sources, planted_pairs = create_corpus(Path(tmp_dir), n)
+
+            start = time.perf_counter()
+            clusters = find_near_duplicates(sources, config=config, jobs=jobs)
+            seconds = time.perf_counter() - start
+
+        found_pairs = {
+            (min(a.id, b.id), max(a.id, b.id))
+            for cluster in clusters
+            for a in cluster.documents
+            for b in cluster.documents
+            if a.id != b.id
+        }
+        recall = len(planted_pairs & found_pairs) / max(len(planted_pairs), 1)
+        print(
+            f"  {n:>10,} documents: {seconds:7.2f}s ({n / seconds:,.0f} documents/s), "
+            f"{len(clusters):,} clusters, recall of planted pairs: {recall:.1%}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Measure how near duplicate detection scales with the number of documents."
+    )
+    parser.add_argument(
+        "--n_documents",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000],
+        help="The sizes of the synthetic corpora.",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="Number of files processed in parallel."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=MinHashConfig.threshold,
+        help="The minimum estimated Jaccard similarity of near duplicates.",
+    )
+    args = parser.parse_args()
+    main(args.n_documents, jobs=args.jobs, threshold=args.threshold)
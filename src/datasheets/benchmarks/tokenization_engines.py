@@ -0,0 +1,88 @@
+"""
+Benchmark of the tokenization engines in `convert.py`.
+
+Example use:
+
+    uv run src/datasheets/benchmarks/tokenization_engines.py --input data.jsonl.gz --n_documents 50000
+
+"""
+
+import argparse
+import gzip
+import json
+import time
+from itertools import islice
+
+from datasheets.convert import TOKENIZATION_ENGINES, create_worker_pool, process_batch
+
+
+def read_texts(input_path: str, n_documents: int) -> list[str]:
+    with gzip.open(input_path, "rt", encoding="utf-8") as infile:
+        return [json.loads(line)["text"] for line in islice(infile, n_documents)]
+
+
+def benchmark_engines(
+    texts: list[str], num_workers: int | None = None, repeats: int = 3
+) -> dict[str, float]:
+    """Returns the best wall time (in seconds) of each engine for counting the tokens of the texts.
+
+    Raises:
+        ValueError: If the engines do not produce identical token counts.
+    """
+    timings: dict[str, float] = {}
+    reference_counts = None
+    with create_worker_pool(num_workers) as pool:
+        process_batch(texts[:1], pool)  # ensure that the tokenizers are loaded
+
+        for engine in TOKENIZATION_ENGINES:
+            best = float("inf")
+            for _ in range(repeats):
+                start = time.perf_counter()
+                counts = process_batch(texts, pool, engine=engine)  # type: ignore
+                best = min(best, time.perf_counter() - start)
+            timings[engine] = best
+
+            if reference_counts is None:
+                reference_counts = counts
+            elif counts != reference_counts:
+                raise ValueError(f"The '{engine}' engine produced different counts.")
+    return timings
+
+
+def main(input_path: str, n_documents: int, num_workers: int | None, repeats: int):
+    texts = read_texts(input_path, n_documents)
+    timings = benchmark_engines(texts, num_workers=num_workers, repeats=repeats)
+
+    baseline = timings["document"]
+    print(f"Counted tokens for {len(texts)} documents (best of {repeats}):")
+    for engine, seconds in timings.items():
+        print(
+            f"  {engine:>10}: {seconds:.3f}s ({len(texts) / seconds:,.0f} docs/s, {baseline / seconds:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the tokenization engines of convert.py on a gzipped JSONL file."
+    )
+    parser.add_argument(
+        "--input", type=str, required=True, help="Path to the input gzipped JSONL file."
+    )
+    parser.add_argument(
+        "--n_documents",
+        type=int,
+        default=20000,
+        help="Number of documents to read from the input.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of tokenizer worker processes. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--repeats", type=int, default=3, help="Number of timed runs per engine."
+    )
+    args = parser.parse_args()
+
+    main(args.input, args.n_documents, args.workers, args.repeats)
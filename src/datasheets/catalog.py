@@ -0,0 +1,288 @@
+"""
+A catalogue of the local dataset files: for each dataset the latest version (see
+`find_latest_dataset_version`) and its Parquet files, with their sizes, row counts and
+schema hashes read from the Parquet footers.
+
+The catalogue is stored as `catalog.json` next to the datasets, such that other tools
+can read it without walking the tree or opening the files. It is updated incrementally:
+the footer of a file is only read again if its size or modification time changed.
+Looking up a dataset only updates the catalogue in memory, as the datasets folder may
+be shared or read-only. The catalogue is written by an explicit `save`, e.g. by
+`update_descriptive_statistics.py` and `sync_dynaword.py`, which only writes the given
+entries, merged into the catalogue on disk while holding a lock on it, such that
+concurrent runs do not drop each other's updates.
+
+Example use:
+
+    uv run src/datasheets/catalog.py
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from datasheets.dataset_versions import get_version_catalog
+from datasheets.fingerprints import hash_parquet_footer
+from datasheets.paths import datasets_path
+
+logger = logging.getLogger(__name__)
+
+CATALOG_NAME = "catalog.json"
+
+# the shared catalogues by the absolute path of their datasets directory
+_catalogs: dict[Path, DatasetCatalog] = {}
+
+
+@dataclass
+class CatalogFile:
+    """
+    Attributes:
+        name: The name of the file within the version directory.
+        size: The size of the file in bytes.
+        mtime_ns: The modification time of the file.
+        footer_hash: A hash of the Parquet footer, see `hash_parquet_footer`.
+        num_rows: The number of rows.
+        num_row_groups: The number of row groups.
+        schema_hash: A hash of the Arrow schema, without its metadata.
+    """
+
+    name: str
+    size: int
+    mtime_ns: int
+    footer_hash: str
+    num_rows: int
+    num_row_groups: int
+    schema_hash: str
+
+    @classmethod
+    def from_path(cls, path: Path) -> CatalogFile:
+        import pyarrow.parquet as pq
+
+        stat = path.stat()
+        metadata = pq.read_metadata(path)
+        schema = metadata.schema.to_arrow_schema().remove_metadata()
+        return cls(
+            name=path.name,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            footer_hash=hash_parquet_footer(path),
+            num_rows=metadata.num_rows,
+            num_row_groups=metadata.num_row_groups,
+            schema_hash=hashlib.sha256(str(schema).encode()).hexdigest(),
+        )
+
+    def matches_stat(self, path: Path) -> bool:
+        stat = path.stat()
+        return (self.size, self.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+
+@dataclass
+class CatalogDataset:
+    """
+    Attributes:
+        name: The name of the dataset.
+        version_path: The latest version directory, relative to the datasets
+            directory, e.g. "mydataset/processed/v2.0.0".
+        files: The Parquet files of the version, sorted by name.
+    """
+
+    name: str
+    version_path: str
+    files: list[CatalogFile]
+
+    @property
+    def num_rows(self) -> int:
+        return sum(f.num_rows for f in self.files)
+
+    @property
+    def size(self) -> int:
+        return sum(f.size for f in self.files)
+
+    @property
+    def schema_hashes(self) -> set[str]:
+        return {f.schema_hash for f in self.files}
+
+
+@dataclass
+class DatasetCatalog:
+    """The catalogue of the datasets in a directory, see the module docstring."""
+
+    root: Path
+    datasets: dict[str, CatalogDataset] = field(default_factory=dict)
+
+    @property
+    def path(self) -> Path:
+        return self.root / CATALOG_NAME
+
+    @classmethod
+    def from_disk(cls, root: Path = datasets_path) -> DatasetCatalog:
+        catalog = cls(root=root)
+        if not catalog.path.exists():
+            return catalog
+        with catalog.path.open("r") as f:
+            data = json.load(f)
+        catalog.datasets = {
+            name: CatalogDataset(
+                name=dataset["name"],
+                version_path=dataset["version_path"],
+                files=[CatalogFile(**file) for file in dataset["files"]],
+            )
+            for name, dataset in data["datasets"].items()
+        }
+        return catalog
+
+    def to_disk(self) -> None:
+        """Writes the catalogue atomically, such that readers never see a partially
+        written file."""
+        data = {"datasets": {name: asdict(d) for name, d in self.datasets.items()}}
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.root, prefix=f".{CATALOG_NAME}.", delete=False
+        ) as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+        os.replace(f.name, self.path)
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        with (self.root / f".{CATALOG_NAME}.lock").open("w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def save(self, dataset_names: Iterable[str]) -> None:
+        """Writes the entries of the datasets to disk. The other entries are read from
+        disk again and kept as they are, as other processes might have updated them
+        since the catalogue was read.
+
+        The catalogue is not written if the datasets folder is read-only.
+
+        Args:
+            dataset_names: The datasets whose entries to write. Datasets without an
+                entry are removed from the catalogue on disk.
+        """
+        try:
+            with self._lock():
+                on_disk = DatasetCatalog.from_disk(self.root)
+                for name in dataset_names:
+                    if name in self.datasets:
+                        on_disk.datasets[name] = self.datasets[name]
+                    else:
+                        on_disk.datasets.pop(name, None)
+                self.datasets = on_disk.datasets
+                self.to_disk()
+        except OSError as e:
+            logger.warning(f"Could not write the catalogue to {self.path}: {e}")
+
+    def update(self, dataset_name: str) -> tuple[CatalogDataset | None, bool]:
+        """Updates the entry of a dataset from its current files. The footers are only
+        read for new or modified files.
+
+        Returns:
+            The entry of the dataset, or None if it has no versions, and whether the
+            entry changed.
+        """
+        latest = get_version_catalog(self.root).latest(dataset_name)
+        if latest is None:
+            removed = self.datasets.pop(dataset_name, None)
+            return None, removed is not None
+
+        version_path = latest.path.relative_to(latest.path.parents[2]).as_posix()
+        previous = self.datasets.get(dataset_name)
+        previous_files = (
+            {f.name: f for f in previous.files}
+            if previous is not None and previous.version_path == version_path
+            else {}
+        )
+
+        files = []
+        for path in sorted(latest.path.glob("*.parquet")):
+            file = previous_files.get(path.name)
+            if file is None or not file.matches_stat(path):
+                logger.debug(f"Reading the footer of {path}")
+                file = CatalogFile.from_path(path)
+            files.append(file)
+
+        dataset = CatalogDataset(
+            name=dataset_name, version_path=version_path, files=files
+        )
+        self.datasets[dataset_name] = dataset
+        return dataset, dataset != previous
+
+    def dataset(self, dataset_name: str) -> CatalogDataset | None:
+        """The up to date entry of a dataset. Use `save` to write it to disk."""
+        dataset, _ = self.update(dataset_name)
+        return dataset
+
+    def dataset_files(self, dataset_name: str) -> list[Path]:
+        """The paths of the Parquet files of the latest version of a dataset.
+
+        Raises:
+            FileNotFoundError: If the dataset has no versions.
+        """
+        dataset = self.dataset(dataset_name)
+        if dataset is None:
+            raise FileNotFoundError(f"Found no versions of the {dataset_name} dataset")
+        return [self.root / dataset.version_path / f.name for f in dataset.files]
+
+
+def get_catalog(root: Path = datasets_path) -> DatasetCatalog:
+    """The shared catalogue of the datasets in a directory. It is read from disk once
+    per process."""
+    root = root.absolute()
+    if root not in _catalogs:
+        _catalogs[root] = DatasetCatalog.from_disk(root)
+    return _catalogs[root]
+
+
+def build_catalog(
+    dataset_names: list[str] | None = None, root: Path = datasets_path
+) -> DatasetCatalog:
+    """Updates the catalogue for the datasets, by default all datasets of the main
+    datasheet, and writes it to disk."""
+    from datasheets.datasheet import get_dataset_names
+
+    catalog = get_catalog(root)
+    dataset_names = dataset_names or get_dataset_names()
+    changed = []
+    for dataset_name in dataset_names:
+        _, dataset_changed = catalog.update(dataset_name)
+        if dataset_changed:
+            changed.append(dataset_name)
+    # all entries are saved, as lookups might have updated them without saving
+    catalog.save(dataset_names)
+    logger.info(f"Updated the catalogue of {len(changed)} dataset(s): {changed}")
+    return catalog
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Update the catalogue of the local dataset files.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--datasets",
+        nargs="*",
+        default=None,
+        help="The datasets to update. Defaults to all datasets.",
+    )
+    return parser
+
+
+if __name__ == "__main__":
+    parser = create_parser()
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    build_catalog(args.datasets)
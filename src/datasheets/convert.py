@@ -1,18 +1,52 @@
 import argparse
+import glob
 import gzip
+import hashlib
 import json
+import multiprocessing
 import os
-from multiprocessing import Pool, cpu_count
-from typing import Any, Dict, List, Optional
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from itertools import islice
+from multiprocessing import cpu_count
+from multiprocessing.pool import Pool
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Self,
+    TypeVar,
+)
 
 import polars as pl
+import pyarrow.parquet as pq
+from huggingface_hub import snapshot_download
 from tqdm import tqdm
 from transformers import AutoTokenizer
 from transformers.tokenization_utils_fast import PreTrainedTokenizerFast
 
+from datasheets.token_cache import DEFAULT_MAX_ENTRIES, CacheStats, TokenCountCache
+
 # --- Constants ---
 MODEL_NAME = "AI-Sweden-Models/Llama-3-8B-instruct"
 PARQUET_COMPRESSION = "zstd"
+DEFAULT_ROW_GROUP_SIZE = 100_000
+CHECKPOINT_MANIFEST = "checkpoint.json"
+TOKENIZATION_ENGINES = ["document", "batched"]
+TOKENIZATION_ENGINE_TYPE = Literal[*TOKENIZATION_ENGINES]
+# Number of texts sent to a worker at once when using the batched engine
+BATCHED_ENGINE_SLICE_SIZE = 256
+
+T = TypeVar("T")
 
 # --- Globals for Multiprocessing ---
 # This global variable will be populated by the pool initializer in each worker process.
@@ -23,14 +57,17 @@ _worker_tokenizer: Optional[PreTrainedTokenizerFast] = None
 # --- Multiprocessing Functions ---
 
 
-def initialize_worker_tokenizer() -> None:
+def initialize_worker_tokenizer(model_name: str = MODEL_NAME) -> None:
     """
     Initializes the tokenizer for a single worker process.
     This function is called once per process in the multiprocessing pool.
+
+    Args:
+        model_name: The name of the model, or a local directory, of the tokenizer.
     """
     global _worker_tokenizer
     _worker_tokenizer = AutoTokenizer.from_pretrained(
-        MODEL_NAME, use_fast=True, local_files_only=True
+        model_name, use_fast=True, local_files_only=True
     )
 
 
@@ -52,47 +89,110 @@ def count_tokens_in_worker(text: str) -> int:
     return len(_worker_tokenizer.encode(str(text), add_special_tokens=False))
 
 
+def count_tokens_batch_in_worker(texts: List[str]) -> List[int]:
+    """
+    Counts tokens for a slice of texts using the batch encoding of the worker's
+    fast tokenizer. Only the lengths of the encodings are returned, so the token ids
+    are never converted to Python lists.
+
+    Args:
+        texts: The input strings to tokenize.
+
+    Returns:
+        The number of tokens for each text.
+
+    Raises:
+        RuntimeError: If the tokenizer is not initialized in the worker process.
+    """
+    if _worker_tokenizer is None:
+        raise RuntimeError("Tokenizer not initialized in worker process.")
+    encodings = _worker_tokenizer.backend_tokenizer.encode_batch_fast(
+        [str(text) for text in texts], add_special_tokens=False
+    )
+    return [len(encoding) for encoding in encodings]
+
+
 # --- Core Logic Functions ---
 
 
-def process_batch(batch_of_texts: List[str]) -> List[int]:
+def get_tokenizer_identity(model_name: str = MODEL_NAME) -> str:
     """
-    Processes a batch of texts in parallel to count tokens for each.
+    Identifies the locally available tokenizer by its model name and revision
+    (the commit hash of the snapshot in the Hugging Face cache).
+    """
+    snapshot_path = snapshot_download(model_name, local_files_only=True)
+    return f"{model_name}@{Path(snapshot_path).name}"
+
+
+def create_worker_pool(num_workers: Optional[int] = None) -> Pool:
+    """
+    Creates a pool of tokenizer workers which is meant to live for an entire run.
+
+    The workers are spawned rather than forked, as the pool is created while the reader
+    and writer threads of the pipeline and the thread pool of polars may be running.
+    A forked worker only inherits the calling thread, so it can deadlock on a lock
+    held by any of the other threads at the time of the fork.
 
     Args:
-        batch_of_texts: A list of strings to process.
+        num_workers: The number of worker processes. Defaults to `cpu_count()`.
 
     Returns:
-        A list of token counts corresponding to the input texts.
+        A multiprocessing pool where each worker has an initialized tokenizer.
     """
-    num_processes = cpu_count()
-    # The initializer will call `initialize_worker_tokenizer` in each worker process
-    with Pool(processes=num_processes, initializer=initialize_worker_tokenizer) as pool:
-        return pool.map(count_tokens_in_worker, batch_of_texts)
+    num_processes = num_workers or cpu_count()
+    # The initializer will call `initialize_worker_tokenizer` once in each worker
+    # process. The model name is passed along, as spawned workers import this module
+    # anew
+    return multiprocessing.get_context("spawn").Pool(
+        processes=num_processes,
+        initializer=initialize_worker_tokenizer,
+        initargs=(MODEL_NAME,),
+    )
 
 
-def process_and_save_chunk(
-    batch_of_dicts: List[Dict[str, Any]], output_dir: str, file_index: int
-) -> Optional[str]:
+def process_batch(
+    batch_of_texts: List[str],
+    pool: Pool,
+    engine: TOKENIZATION_ENGINE_TYPE = "document",
+    slice_size: int = BATCHED_ENGINE_SLICE_SIZE,
+) -> List[int]:
     """
-    Processes a batch of data, calculates token counts, filters, creates a
-    DataFrame, and saves it as a Parquet chunk.
+    Processes a batch of texts in parallel to count tokens for each.
 
     Args:
-        batch_of_dicts: A list of dictionaries, each expected to have a "text" key.
-        output_dir: The directory to save the Parquet chunk file.
-        file_index: The index for naming the chunk file.
+        batch_of_texts: A list of strings to process.
+        pool: A worker pool created using `create_worker_pool`.
+        engine: "document" encodes one text at a time, while "batched" sends slices
+            of texts to the workers and uses the batch encoding of the tokenizer.
+        slice_size: The number of texts in each slice when using the batched engine.
 
     Returns:
-        The path to the saved chunk file, or None if no data was saved.
+        A list of token counts corresponding to the input texts.
     """
-    if not batch_of_dicts:
-        return None
+    match engine:
+        case "document":
+            return pool.map(count_tokens_in_worker, batch_of_texts)
+        case "batched":
+            slices = [
+                batch_of_texts[i : i + slice_size]
+                for i in range(0, len(batch_of_texts), slice_size)
+            ]
+            counts = pool.map(count_tokens_batch_in_worker, slices, chunksize=1)
+            return [count for slice_counts in counts for count in slice_counts]
+        case _:
+            raise ValueError(f"Unknown tokenization engine: {engine}")
 
-    texts = [row["text"] for row in batch_of_dicts]
-    token_counts = process_batch(texts)
 
-    # Combine original data with token counts, filtering out empty texts
+def add_token_counts(
+    batch_of_dicts: List[Dict[str, Any]], token_counts: List[int]
+) -> Optional[pl.DataFrame]:
+    """
+    Combines a batch of data with its token counts, filters out empty texts and
+    creates a DataFrame.
+
+    Returns:
+        A DataFrame with a "token_count" column, or None if there is no data left.
+    """
     rows_with_token_counts = [
         {**row, "token_count": token_count}
         for row, token_count in zip(batch_of_dicts, token_counts)
@@ -102,76 +202,713 @@ def process_and_save_chunk(
     if not rows_with_token_counts:
         return None
 
-    df = pl.DataFrame(rows_with_token_counts)
-    chunk_path = os.path.join(output_dir, f"chunk_{file_index:04d}.parquet")
+    return pl.DataFrame(rows_with_token_counts)
+
+
+def tokenize_batch(
+    batch_of_dicts: List[Dict[str, Any]],
+    pool: Pool,
+    engine: TOKENIZATION_ENGINE_TYPE = "document",
+    cache: Optional[TokenCountCache] = None,
+) -> Optional[pl.DataFrame]:
+    """
+    Processes a batch of data, calculates token counts, filters out empty texts and
+    creates a DataFrame.
+
+    Args:
+        batch_of_dicts: A list of dictionaries, each expected to have a "text" key.
+        pool: The worker pool used for counting tokens.
+        engine: The tokenization engine to use (see `process_batch`).
+        cache: If given, only the texts which are not in the cache are tokenized.
+
+    Returns:
+        A DataFrame with a "token_count" column, or None if there is no data left.
+    """
+    if not batch_of_dicts:
+        return None
+
+    texts = [row["text"] for row in batch_of_dicts]
+    if cache is None:
+        token_counts = process_batch(texts, pool, engine=engine)
+    else:
+        token_counts = cache.count(
+            texts, count_fn=lambda missing: process_batch(missing, pool, engine=engine)
+        )
+    return add_token_counts(batch_of_dicts, token_counts)
+
+
+# --- Checkpointing ---
+
+
+@dataclass
+class BatchSpan:
+    """The position of a batch in the input file."""
+
+    index: int
+    start_line: int
+    end_line: int
+
+
+@dataclass
+class ChunkRecord:
+    """A completed chunk file and the lines of the input file which it covers."""
+
+    file_index: int
+    filename: str
+    start_line: int
+    end_line: int
+    num_rows: int
+    checksum: str
+
+
+@dataclass
+class CheckpointManifest:
+    """
+    Records the completed chunks of a conversion run, such that an interrupted run can
+    be resumed. The manifest is stored next to the chunks and rewritten every time a
+    chunk is completed.
+    """
+
+    input_path: str
+    input_size: int
+    batch_size: int
+    chunks: List[ChunkRecord] = field(default_factory=list)
+
+    @classmethod
+    def for_input(cls, input_path: str, batch_size: int) -> "CheckpointManifest":
+        return cls(
+            input_path=os.path.abspath(input_path),
+            input_size=os.path.getsize(input_path),
+            batch_size=batch_size,
+        )
+
+    @classmethod
+    def from_disk(cls, path: str) -> "CheckpointManifest":
+        with open(path, "r") as f:
+            data = json.load(f)
+        data["chunks"] = [ChunkRecord(**chunk) for chunk in data["chunks"]]
+        return cls(**data)
+
+    def to_disk(self, path: str) -> None:
+        # write to a temporary file first, such that the manifest is never half written
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self), f, indent=2)
+        os.replace(tmp_path, path)
+
+    def check_compatible(self, input_path: str, batch_size: int) -> None:
+        """
+        Raises:
+            ValueError: If the manifest was created for a different input file or batch size.
+        """
+        other = CheckpointManifest.for_input(input_path, batch_size)
+        if (self.input_path, self.input_size, self.batch_size) != (
+            other.input_path,
+            other.input_size,
+            other.batch_size,
+        ):
+            raise ValueError(
+                f"The checkpoint manifest was created for {self.input_path} ({self.input_size} bytes) "
+                f"with a batch size of {self.batch_size} and can't be used to resume {other.input_path} "
+                f"({other.input_size} bytes) with a batch size of {batch_size}."
+            )
+
+    def completed_chunks(self, output_dir: str) -> List[ChunkRecord]:
+        """
+        Returns the chunks which can be reused, i.e. the chunks before the first chunk
+        which is missing or does not match its checksum.
+        """
+        completed: List[ChunkRecord] = []
+        for chunk in self.chunks:
+            chunk_path = os.path.join(output_dir, chunk.filename)
+            if (
+                not os.path.exists(chunk_path)
+                or file_checksum(chunk_path) != chunk.checksum
+            ):
+                print(
+                    f"Chunk {chunk.file_index} is missing or corrupt, resuming from it."
+                )
+                break
+            completed.append(chunk)
+        return completed
+
+    @property
+    def next_line(self) -> int:
+        return self.chunks[-1].end_line if self.chunks else 0
+
+
+def file_checksum(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def load_checkpoint(
+    input_path: str, output_dir: str, batch_size: int, resume: bool
+) -> CheckpointManifest:
+    """
+    Loads the checkpoint manifest of a previous run when resuming, keeping only its
+    completed chunks. Otherwise a new manifest is created.
+
+    Raises:
+        ValueError: If the previous run used a different input file or batch size.
+    """
+    manifest_path = os.path.join(output_dir, CHECKPOINT_MANIFEST)
+    if not resume or not os.path.exists(manifest_path):
+        if resume:
+            print(
+                f"No checkpoint found at {manifest_path}, starting from the beginning."
+            )
+        return CheckpointManifest.for_input(input_path, batch_size)
+
+    manifest = CheckpointManifest.from_disk(manifest_path)
+    manifest.check_compatible(input_path, batch_size)
+    manifest.chunks = manifest.completed_chunks(output_dir)
+    print(
+        f"Resuming from line {manifest.next_line} with {len(manifest.chunks)} completed chunks."
+    )
+    return manifest
+
+
+# --- Pipeline ---
+
+
+def save_chunk(df: pl.DataFrame, output_dir: str, span: BatchSpan) -> ChunkRecord:
+    """
+    Saves a processed batch as a Parquet chunk.
+
+    Args:
+        df: The processed batch.
+        output_dir: The directory to save the Parquet chunk file.
+        span: The position of the batch in the input file, its index is used for
+            naming the chunk file.
+
+    Returns:
+        A record of the saved chunk file.
+    """
+    filename = f"chunk_{span.index:04d}.parquet"
+    chunk_path = os.path.join(output_dir, filename)
     df.write_parquet(chunk_path, compression=PARQUET_COMPRESSION)
-    print(f"✓ Saved chunk {file_index} with {len(df)} rows to {chunk_path}")
-    return chunk_path
+    print(f"✓ Saved chunk {span.index} with {len(df)} rows to {chunk_path}")
+    return ChunkRecord(
+        file_index=span.index,
+        filename=filename,
+        start_line=span.start_line,
+        end_line=span.end_line,
+        num_rows=len(df),
+        checksum=file_checksum(chunk_path),
+    )
+
+
+def read_batches(
+    input_path: str, batch_size: int, skip_lines: int = 0, progress: bool = True
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Reads and parses a gzipped JSONL file in batches.
+
+    Args:
+        input_path: Path to the gzipped JSONL input file.
+        batch_size: The number of lines in each batch.
+        skip_lines: The number of lines to skip (without parsing) before reading.
+        progress: Whether to show a progress bar of the lines read.
+
+    Yields:
+        Lists of parsed lines. The last batch might be smaller than `batch_size`.
+    """
+    batch: List[Dict[str, Any]] = []
+    with gzip.open(input_path, "rt", encoding="utf-8") as infile:
+        lines = islice(infile, skip_lines, None)
+        for line in tqdm(
+            lines,
+            desc="Reading & Processing Chunks",
+            initial=skip_lines,
+            disable=not progress,
+        ):
+            batch.append(json.loads(line))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+    # Yield the final partial batch
+    if batch:
+        yield batch
+
+
+def prefetch(iterable: Iterable[T], maxsize: int) -> Iterator[T]:
+    """
+    Consumes an iterable in a background thread, such that the next items are
+    produced while the current one is being processed. At most `maxsize` items are
+    buffered, after which the background thread waits for the consumer.
+
+    Args:
+        iterable: The iterable to consume.
+        maxsize: The maximum number of buffered items.
+
+    Yields:
+        The items of the iterable in their original order.
+
+    Raises:
+        Exception: Any exception raised while consuming the iterable.
+    """
+    buffer: queue.Queue[tuple[str, Any]] = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+
+    def put(message: tuple[str, Any]) -> bool:
+        while not stopped.is_set():
+            try:
+                buffer.put(message, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            for item in iterable:
+                if not put(("item", item)):
+                    return
+        except Exception as e:  # noqa: BLE001 (re-raised by the consumer)
+            put(("error", e))
+            return
+        put(("done", None))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            kind, value = buffer.get()
+            if kind == "done":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        stopped.set()
+        producer.join()
+
+
+class ParquetStreamWriter:
+    """
+    Writes DataFrames to a single Parquet file as they arrive. Rows are buffered until
+    a row group is full, such that the row groups have the same size regardless of the
+    batch size, and at most a single row group (or batch) is kept in memory.
+
+    The rows are written to a temporary file next to `path`, which only replaces
+    `path` once the writer is closed without an error, such that a failed run never
+    leaves a truncated file behind.
+    """
+
+    def __init__(self, path: str, row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._buffer: List[pl.DataFrame] = []
+        self._buffered_rows = 0
+        self._writer: Optional[pq.ParquetWriter] = None
+
+    def write(self, df: pl.DataFrame) -> None:
+        self._buffer.append(df)
+        self._buffered_rows += len(df)
+        if self._buffered_rows >= self.row_group_size:
+            self._flush(only_full_row_groups=True)
+
+    def _flush(self, only_full_row_groups: bool) -> None:
+        if not self._buffer:
+            return
+        table = pl.concat(self._buffer, how="vertical_relaxed").to_arrow()
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(
+                self.tmp_path, table.schema, compression=PARQUET_COMPRESSION
+            )
+        else:
+            table = table.cast(self._writer.schema)
+
+        n_rows = len(table)
+        if only_full_row_groups:
+            n_rows -= n_rows % self.row_group_size
+        self._writer.write_table(
+            table.slice(0, n_rows), row_group_size=self.row_group_size
+        )
+        self.rows_written += n_rows
+
+        remainder = table.slice(n_rows)
+        self._buffer = [pl.from_arrow(remainder)] if len(remainder) else []  # type: ignore
+        self._buffered_rows = len(remainder)
+
+    def close(self) -> None:
+        self._flush(only_full_row_groups=False)
+        if self._writer is not None:
+            self._writer.close()
+            os.replace(self.tmp_path, self.path)
+
+    def abort(self) -> None:
+        """Closes the writer and deletes the temporary file, keeping any existing file
+        at `path`."""
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            finally:
+                os.remove(self.tmp_path)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def run_pipeline(
+    input_path: str,
+    batch_size: int,
+    write: Callable[[pl.DataFrame, BatchSpan], T],
+    num_workers: Optional[int] = None,
+    engine: TOKENIZATION_ENGINE_TYPE = "document",
+    queue_size: int = 2,
+    start_line: int = 0,
+    cache: Optional[TokenCountCache] = None,
+) -> List[T]:
+    """
+    Reads the input file in batches, counts the tokens of each batch and writes them.
+
+    Reading, tokenization and writing are run as a pipeline, such that the next batch
+    is read and the previous batch is written while the current batch is tokenized.
+    The stages are connected by bounded queues, so at most `queue_size` batches are
+    waiting in each stage. A single worker pool is used for the entire file, such
+    that the tokenizer is only loaded once per worker.
+
+    Args:
+        input_path: Path to the gzipped JSONL input file.
+        batch_size: The number of lines to process in each batch.
+        write: Called with each processed batch and its position in the input. All
+            calls are made from a single thread in the order of the input.
+        num_workers: The number of tokenizer worker processes. Defaults to `cpu_count()`.
+        engine: The tokenization engine to use (see `process_batch`).
+        queue_size: The maximum number of batches waiting to be tokenized and
+            the maximum number of batches waiting to be written.
+        start_line: The line to start reading from. Should be a multiple of `batch_size`.
+        cache: An optional token count cache, used from the main thread only.
+
+    Returns:
+        The return values of `write`, in the order of the input.
+    """
+    results: List[T] = []
+    pending_writes: deque[Future[T]] = deque()
+    write_failed = threading.Event()
+
+    def write_in_order(df: pl.DataFrame, span: BatchSpan) -> T:
+        # once a write fails, the following batches are not written, such that the
+        # written batches always form a contiguous prefix of the input
+        if write_failed.is_set():
+            raise RuntimeError(f"Batch {span.index} skipped due to an earlier failure.")
+        try:
+            return write(df, span)
+        except BaseException:
+            write_failed.set()
+            raise
+
+    with (
+        create_worker_pool(num_workers) as pool,
+        ThreadPoolExecutor(max_workers=1) as writer,
+    ):
+        batches = prefetch(
+            read_batches(input_path, batch_size, skip_lines=start_line),
+            maxsize=queue_size,
+        )
+        for file_index, batch in enumerate(batches, start=start_line // batch_size):
+            span = BatchSpan(file_index, start_line, start_line + len(batch))
+            start_line = span.end_line
+
+            df = tokenize_batch(batch, pool, engine=engine, cache=cache)
+            if df is None:
+                continue
+
+            # A single writer thread writes the batches in the order they are submitted
+            pending_writes.append(writer.submit(write_in_order, df, span))
+            while pending_writes and (
+                len(pending_writes) > queue_size or pending_writes[0].done()
+            ):
+                results.append(pending_writes.popleft().result())
+
+        while pending_writes:
+            results.append(pending_writes.popleft().result())
+
+    return results
 
 
 def process_file_in_chunks(
-    input_path: str, output_dir: str, batch_size: int
+    input_path: str,
+    output_dir: str,
+    batch_size: int,
+    num_workers: Optional[int] = None,
+    engine: TOKENIZATION_ENGINE_TYPE = "document",
+    queue_size: int = 2,
+    resume: bool = False,
+    cache: Optional[TokenCountCache] = None,
 ) -> List[str]:
     """
     Reads the input file, processes it in chunks, and saves intermediate Parquet files.
+    Completed chunks are recorded in a checkpoint manifest in the output directory.
 
     Args:
         input_path: Path to the gzipped JSONL input file.
         output_dir: Directory to store intermediate chunk files.
         batch_size: The number of lines to process in each batch.
+        num_workers: The number of tokenizer worker processes. Defaults to `cpu_count()`.
+        engine: The tokenization engine to use (see `process_batch`).
+        queue_size: The maximum number of batches buffered between stages (see `run_pipeline`).
+        resume: Reuse the completed chunks of a previous run and continue after them.
+        cache: An optional token count cache.
 
     Returns:
-        A list of paths to the created chunk files.
+        A list of paths to the created chunk files, in the order of the input.
     """
-    chunk_files: List[str] = []
-    batch: List[Dict[str, Any]] = []
-    file_index = 0
+    manifest_path = os.path.join(output_dir, CHECKPOINT_MANIFEST)
+    manifest = load_checkpoint(input_path, output_dir, batch_size, resume=resume)
+    manifest.to_disk(manifest_path)
 
-    with gzip.open(input_path, "rt", encoding="utf-8") as infile:
-        for line in tqdm(infile, desc="Reading & Processing Chunks"):
-            batch.append(json.loads(line))
-            if len(batch) >= batch_size:
-                chunk_path = process_and_save_chunk(batch, output_dir, file_index)
-                if chunk_path:
-                    chunk_files.append(chunk_path)
-                batch = []
-                file_index += 1
+    def save_and_checkpoint(df: pl.DataFrame, span: BatchSpan) -> None:
+        manifest.chunks.append(save_chunk(df, output_dir, span))
+        manifest.to_disk(manifest_path)
+
+    run_pipeline(
+        input_path,
+        batch_size,
+        write=save_and_checkpoint,
+        num_workers=num_workers,
+        engine=engine,
+        queue_size=queue_size,
+        start_line=manifest.next_line,
+        cache=cache,
+    )
+    return [os.path.join(output_dir, chunk.filename) for chunk in manifest.chunks]
+
+
+def process_file_streaming(
+    input_path: str,
+    output_path: str,
+    batch_size: int,
+    num_workers: Optional[int] = None,
+    engine: TOKENIZATION_ENGINE_TYPE = "document",
+    queue_size: int = 2,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    cache: Optional[TokenCountCache] = None,
+) -> None:
+    """
+    Reads the input file and streams the processed batches into a single Parquet file
+    without writing intermediate chunks.
+
+    Args:
+        input_path: Path to the gzipped JSONL input file.
+        output_path: Path of the final Parquet file.
+        batch_size: The number of lines to process in each batch.
+        num_workers: The number of tokenizer worker processes. Defaults to `cpu_count()`.
+        engine: The tokenization engine to use (see `process_batch`).
+        queue_size: The maximum number of batches buffered between stages (see `run_pipeline`).
+        row_group_size: The number of rows in each row group of the output file.
+        cache: An optional token count cache.
+    """
+    with ParquetStreamWriter(output_path, row_group_size=row_group_size) as writer:
+        run_pipeline(
+            input_path,
+            batch_size,
+            write=lambda df, span: writer.write(df),
+            num_workers=num_workers,
+            engine=engine,
+            queue_size=queue_size,
+            cache=cache,
+        )
+
+    if writer.rows_written == 0:
+        print("No data was processed, no final file created.")
+        return
+    print(f"✓ Final DataFrame with {writer.rows_written} rows saved to {output_path}")
+
+
+# --- Sharded Input ---
 
-    # Process the final partial batch
-    if batch:
-        chunk_path = process_and_save_chunk(batch, output_dir, file_index)
-        if chunk_path:
-            chunk_files.append(chunk_path)
 
-    return chunk_files
+def resolve_input_files(input_path: str) -> List[str]:
+    """
+    Resolves the input argument to a sorted list of gzipped JSONL files.
+
+    Args:
+        input_path: A single file, a directory containing `*.jsonl.gz` files or a glob
+            pattern such as `dumps/part-*.jsonl.gz`.
+
+    Returns:
+        The input files, sorted by name.
+
+    Raises:
+        FileNotFoundError: If no input files are found.
+    """
+    if os.path.isdir(input_path):
+        files = glob.glob(os.path.join(input_path, "*.jsonl.gz"))
+    elif glob.has_magic(input_path):
+        files = glob.glob(input_path)
+    else:
+        files = [input_path] if os.path.exists(input_path) else []
+
+    if not files:
+        raise FileNotFoundError(f"No input files found for: {input_path}")
+    return sorted(files)
+
+
+@dataclass
+class ShardTask:
+    input_path: str
+    output_path: str
+    batch_size: int
+    engine: TOKENIZATION_ENGINE_TYPE
+    row_group_size: int
+    cache_path: Optional[str] = None
+    tokenizer_id: Optional[str] = None
+
+
+def process_shard_in_worker(task: ShardTask) -> tuple[Optional[str], CacheStats]:
+    """
+    Reads, tokenizes and writes a single shard within a worker process, such that
+    the texts are never sent between processes.
+
+    Args:
+        task: The shard to process.
+
+    Returns:
+        The path to the written Parquet shard, or None if no data was saved, and the
+        statistics of the token count cache.
+    """
+
+    def count_tokens(texts: List[str]) -> List[int]:
+        if task.engine == "batched":
+            return count_tokens_batch_in_worker(texts)
+        return [count_tokens_in_worker(text) for text in texts]
+
+    cache = None
+    if task.cache_path is not None and task.tokenizer_id is not None:
+        # eviction is left to the main process
+        cache = TokenCountCache(
+            Path(task.cache_path), tokenizer_id=task.tokenizer_id, max_entries=None
+        )
+
+    with ParquetStreamWriter(
+        task.output_path, row_group_size=task.row_group_size
+    ) as writer:
+        for batch in read_batches(task.input_path, task.batch_size, progress=False):
+            texts = [row["text"] for row in batch]
+            if cache is None:
+                token_counts = count_tokens(texts)
+            else:
+                token_counts = cache.count(texts, count_fn=count_tokens)
+            df = add_token_counts(batch, token_counts)
+            if df is not None:
+                writer.write(df)
+
+    stats = CacheStats()
+    if cache is not None:
+        stats = cache.stats
+        cache.close()
+    return task.output_path if writer.rows_written else None, stats
+
+
+def process_shards(
+    input_files: List[str],
+    output_dir: str,
+    output_filename: str,
+    batch_size: int,
+    num_workers: Optional[int] = None,
+    engine: TOKENIZATION_ENGINE_TYPE = "document",
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    cache: Optional[TokenCountCache] = None,
+) -> List[str]:
+    """
+    Processes multiple input shards in parallel. Each worker process decompresses,
+    parses and tokenizes an entire shard and writes it to its own Parquet file.
+
+    Args:
+        input_files: Paths to the gzipped JSONL input shards.
+        output_dir: Directory to store the Parquet shards.
+        output_filename: The name of the final Parquet file, used for naming the
+            shards, e.g. `data.parquet` gives `data-00000-of-00010.parquet`.
+        batch_size: The number of lines tokenized at once within each worker.
+        num_workers: The number of worker processes. Defaults to `cpu_count()`.
+        engine: The tokenization engine to use (see `process_batch`).
+        row_group_size: The number of rows in each row group of the shards.
+        cache: An optional token count cache. The workers open their own connection
+            to it and their statistics are added to `cache.stats`.
+
+    Returns:
+        A list of paths to the created Parquet shards, in the order of the input files.
+    """
+    stem = os.path.splitext(output_filename)[0]
+    n_shards = len(input_files)
+    tasks = [
+        ShardTask(
+            input_path=input_path,
+            output_path=os.path.join(
+                output_dir, f"{stem}-{i:05d}-of-{n_shards:05d}.parquet"
+            ),
+            batch_size=batch_size,
+            engine=engine,
+            row_group_size=row_group_size,
+            cache_path=str(cache.path) if cache is not None else None,
+            tokenizer_id=cache.tokenizer_id if cache is not None else None,
+        )
+        for i, input_path in enumerate(input_files)
+    ]
+
+    num_processes = min(num_workers or cpu_count(), n_shards)
+    with create_worker_pool(num_processes) as pool:
+        results = list(
+            tqdm(
+                pool.imap(process_shard_in_worker, tasks, chunksize=1),
+                total=n_shards,
+                desc="Processing shards",
+            )
+        )
+
+    if cache is not None:
+        for _, stats in results:
+            cache.stats += stats
+    return [path for path, _ in results if path is not None]
 
 
 def combine_chunks_and_cleanup(
-    chunk_files: List[str], output_dir: str, final_filename: str
+    chunk_files: List[str],
+    output_dir: str,
+    final_filename: str,
+    row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
 ) -> None:
     """
-    Combines all Parquet chunks into a single file and deletes the chunks.
+    Combines all Parquet chunks into a single file and deletes the chunks. The chunks
+    are combined using the streaming engine of polars, such that they are never all
+    loaded into memory at once.
 
     Args:
         chunk_files: A list of paths to the Parquet chunk files.
         output_dir: The directory where the final file will be saved.
         final_filename: The name for the final combined Parquet file.
+        row_group_size: The number of rows in each row group of the final file.
     """
     if not chunk_files:
         print("No data was processed, no final file created.")
         return
 
     print(f"Combining {len(chunk_files)} chunk files...")
-    # Lazily scan and collect to be more memory efficient for many files
-    final_df = pl.concat(
-        [pl.scan_parquet(p) for p in chunk_files], how="vertical"
-    ).collect()
-
     final_output_path = os.path.join(output_dir, final_filename)
-    final_df.write_parquet(final_output_path, compression=PARQUET_COMPRESSION)
-    print(f"✓ Final DataFrame with {len(final_df)} rows saved to {final_output_path}")
+    pl.concat([pl.scan_parquet(p) for p in chunk_files], how="vertical").sink_parquet(
+        final_output_path,
+        compression=PARQUET_COMPRESSION,
+        row_group_size=row_group_size,
+    )
+    n_rows = pq.ParquetFile(final_output_path).metadata.num_rows
+    print(f"✓ Final DataFrame with {n_rows} rows saved to {final_output_path}")
 
     print("Cleaning up temporary chunk files...")
+    manifest_path = os.path.join(output_dir, CHECKPOINT_MANIFEST)
+    if os.path.exists(manifest_path):
+        chunk_files = chunk_files + [manifest_path]
     for path in chunk_files:
         try:
             os.remove(path)
@@ -189,7 +926,10 @@ def parse_arguments() -> argparse.Namespace:
         description="Process a large JSONL file, count tokens, and save as Parquet."
     )
     parser.add_argument(
-        "--input", type=str, required=True, help="Path to the input gzipped JSONL file."
+        "--input",
+        type=str,
+        required=True,
+        help="Path to the input gzipped JSONL file. Can also be a directory of *.jsonl.gz files or a glob pattern, in which case the files are processed in parallel.",
     )
     parser.add_argument(
         "--output_dir",
@@ -209,27 +949,149 @@ def parse_arguments() -> argparse.Namespace:
         default=10000,
         help="Number of lines to process in each batch.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of tokenizer worker processes. Defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--engine",
+        type=str,
+        default="document",
+        choices=TOKENIZATION_ENGINES,
+        help="How tokens are counted. 'document' encodes one text at a time, 'batched' uses the batch encoding of the fast tokenizer.",
+    )
+    parser.add_argument(
+        "--queue_size",
+        type=int,
+        default=2,
+        help="Maximum number of batches buffered between the read, tokenize and write stages.",
+    )
+    parser.add_argument(
+        "--streaming",
+        default=False,
+        action=argparse.BooleanOptionalAction,
+        help="Write the processed batches directly to the final file instead of writing intermediate chunks.",
+    )
+    parser.add_argument(
+        "--row_group_size",
+        type=int,
+        default=DEFAULT_ROW_GROUP_SIZE,
+        help="Number of rows in each row group of the final Parquet file.",
+    )
+    parser.add_argument(
+        "--resume",
+        default=False,
+        action=argparse.BooleanOptionalAction,
+        help="Resume an interrupted run using the checkpoint manifest in the output directory.",
+    )
+    parser.add_argument(
+        "--sharded_output",
+        default=False,
+        action=argparse.BooleanOptionalAction,
+        help="When processing multiple input files, keep one Parquet file per input file instead of combining them.",
+    )
+    parser.add_argument(
+        "--token_cache",
+        type=str,
+        default=None,
+        help="Path to a SQLite file used for caching token counts across runs. Only new or changed texts are tokenized.",
+    )
+    parser.add_argument(
+        "--token_cache_max_entries",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help="Maximum number of entries in the token cache. The least recently used entries are evicted beyond this.",
+    )
+    args = parser.parse_args()
+    if args.resume and args.streaming:
+        parser.error("--resume is not supported together with --streaming.")
+    return args
 
 
-def main() -> None:
-    """Main function to orchestrate the script execution."""
-    args = parse_arguments()
+def run_conversion(
+    args: argparse.Namespace,
+    input_files: List[str],
+    cache: Optional[TokenCountCache] = None,
+) -> None:
+    """Converts the input files according to the command-line arguments."""
+    if len(input_files) > 1:
+        if args.resume:
+            raise ValueError("--resume is only supported for a single input file.")
+        shard_files = process_shards(
+            input_files=input_files,
+            output_dir=args.output_dir,
+            output_filename=args.output_file,
+            batch_size=args.batch_size,
+            num_workers=args.workers,
+            engine=args.engine,
+            row_group_size=args.row_group_size,
+            cache=cache,
+        )
+        if not args.sharded_output:
+            combine_chunks_and_cleanup(
+                chunk_files=shard_files,
+                output_dir=args.output_dir,
+                final_filename=args.output_file,
+                row_group_size=args.row_group_size,
+            )
+        return
 
-    os.makedirs(args.output_dir, exist_ok=True)
+    if args.streaming:
+        process_file_streaming(
+            input_path=input_files[0],
+            output_path=os.path.join(args.output_dir, args.output_file),
+            batch_size=args.batch_size,
+            num_workers=args.workers,
+            engine=args.engine,
+            queue_size=args.queue_size,
+            row_group_size=args.row_group_size,
+            cache=cache,
+        )
+        return
 
     chunk_files = process_file_in_chunks(
-        input_path=args.input,
+        input_path=input_files[0],
         output_dir=args.output_dir,
         batch_size=args.batch_size,
+        num_workers=args.workers,
+        engine=args.engine,
+        queue_size=args.queue_size,
+        resume=args.resume,
+        cache=cache,
     )
 
     combine_chunks_and_cleanup(
         chunk_files=chunk_files,
         output_dir=args.output_dir,
         final_filename=args.output_file,
+        row_group_size=args.row_group_size,
     )
 
 
+def main() -> None:
+    """Main function to orchestrate the script execution."""
+    args = parse_arguments()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    input_files = resolve_input_files(args.input)
+
+    cache = None
+    if args.token_cache:
+        cache = TokenCountCache(
+            Path(args.token_cache),
+            tokenizer_id=get_tokenizer_identity(),
+            max_entries=args.token_cache_max_entries,
+        )
+
+    try:
+        run_conversion(args, input_files, cache=cache)
+    finally:
+        if cache is not None:
+            print(f"Token count cache: {cache.stats}")
+            cache.close()
+
+
 if __name__ == "__main__":
     main()
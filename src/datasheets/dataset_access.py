@@ -0,0 +1,96 @@
+"""
+Direct access to the local Parquet and Arrow files of the datasets.
+
+`datasets.load_dataset` fingerprints the files and converts them to its own Arrow cache
+before they can be read, which duplicates the data on disk. The files are already
+local, so here they are instead opened directly as a `pyarrow.dataset.Dataset` on a
+memory mapped file system. Only the requested columns are read, and the batches are
+Arrow record batches which are never converted to Python objects.
+
+Example use:
+
+    dataset = open_dataset(dataset_files("dannet"))
+    for batch in iter_batches(dataset, columns=["token_count"]):
+        ...
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from datasheets.catalog import get_catalog
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.dataset as pds
+
+logger = logging.getLogger(__name__)
+
+ARROW_BATCH_SIZE = 65_536
+# the file formats of pyarrow.dataset by file suffix
+FILE_FORMATS = {
+    ".parquet": "parquet",
+    ".arrow": "ipc",
+    ".feather": "ipc",
+}
+
+
+def dataset_files(dataset_name: str) -> list[Path]:
+    """The Parquet files of the latest version of a dataset, as listed in the
+    catalogue (see `datasheets.catalog`).
+
+    Raises:
+        FileNotFoundError: If the dataset has no versions.
+    """
+    return get_catalog().dataset_files(dataset_name)
+
+
+def open_dataset(paths: Sequence[Path]) -> pds.Dataset:
+    """Opens Parquet or Arrow IPC files as a single dataset without reading them. The
+    files are memory mapped, such that Arrow files are read without copying.
+
+    Args:
+        paths: The files, which must all have the same format.
+
+    Returns:
+        The dataset. Use e.g. `iter_batches`, `dataset.head` or `dataset.to_table`
+        with `columns` to read it.
+    """
+    import pyarrow.dataset as pds
+    import pyarrow.fs as pfs
+
+    if not paths:
+        raise ValueError("Can't open a dataset without any files")
+    formats = {FILE_FORMATS.get(Path(path).suffix) for path in paths}
+    if len(formats) != 1 or None in formats:
+        raise ValueError(
+            f"Expected files of a single format in {sorted(FILE_FORMATS)}, got: {paths}"
+        )
+
+    return pds.dataset(
+        [str(Path(path).resolve()) for path in paths],
+        format=formats.pop(),
+        filesystem=pfs.LocalFileSystem(use_mmap=True),
+    )
+
+
+def iter_batches(
+    dataset: pds.Dataset,
+    columns: list[str] | None = None,
+    batch_size: int = ARROW_BATCH_SIZE,
+) -> Iterator[pa.RecordBatch]:
+    """Streams the non-empty record batches of the columns of a dataset, file by file.
+
+    Args:
+        dataset: The dataset, see `open_dataset`.
+        columns: The columns to read. None reads all columns.
+        batch_size: The maximum number of rows in a batch.
+    """
+    for batch in dataset.to_batches(
+        columns=columns, batch_size=batch_size, use_threads=False
+    ):
+        if batch.num_rows > 0:
+            yield batch
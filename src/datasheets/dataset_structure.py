@@ -1,17 +1,33 @@
 import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
 from datetime import date, datetime
 from enum import Enum
+from pathlib import Path
 from typing import Union
 
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
 from pydantic import BaseModel, BeforeValidator
 from typing_extensions import Annotated
 
 logger = logging.getLogger(__name__)
 
 
+CREATED_SEPARATOR = ", "
+# the ISO formats accepted for `added` and `created` when they are stored as strings
+DATETIME_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S%.f",
+    "%Y-%m-%d %H:%M:%S%.f",
+    "%Y-%m-%dT%H:%M:%S%.f%:z",
+    "%Y-%m-%d %H:%M:%S%.f%:z",
+)
+
+
 def ensure_tuple(created: str | tuple) -> tuple:
     if isinstance(created, str):
-        return tuple(created.split(", "))
+        return tuple(created.split(CREATED_SEPARATOR))
     return created
 
 
@@ -37,3 +53,184 @@ class ColumnNames(Enum):
 
 
 COLUMN_ORDER = [col.value for col in ColumnNames]
+
+
+@dataclass
+class SchemaViolation:
+    """
+    Attributes:
+        file: The Parquet file.
+        column: The column which violates the schema.
+        message: Describes the violation.
+        row: The index of the violating row within the file. None if the violation
+            concerns the file as a whole, e.g. a wrong column type.
+        id: The id of the violating row, if it has one.
+    """
+
+    file: str
+    column: str
+    message: str
+    row: int | None = None
+    id: str | None = None
+
+    def __str__(self) -> str:
+        location = self.file if self.row is None else f"{self.file}, row {self.row}"
+        if self.id is not None:
+            location += f" (id: {self.id})"
+        return f"{location}: {self.column} {self.message}"
+
+
+def _is_string(data_type: pa.DataType) -> bool:
+    return pa.types.is_string(data_type) or pa.types.is_large_string(data_type)
+
+
+def _is_date(data_type: pa.DataType) -> bool:
+    return pa.types.is_date(data_type) or pa.types.is_timestamp(data_type)
+
+
+def _is_list(data_type: pa.DataType) -> bool:
+    return (
+        pa.types.is_list(data_type)
+        or pa.types.is_large_list(data_type)
+        or pa.types.is_fixed_size_list(data_type)
+    )
+
+
+def _is_valid_type(column: str, data_type: pa.DataType) -> bool:
+    """Whether the Arrow type of a column can hold values of the `SampleSchema`."""
+    if column in (
+        ColumnNames.id.value,
+        ColumnNames.text.value,
+        ColumnNames.source.value,
+    ):
+        return _is_string(data_type)
+    if column == ColumnNames.token_count.value:
+        return pa.types.is_integer(data_type)
+    if column == ColumnNames.added.value:
+        return _is_string(data_type) or _is_date(data_type)
+    if column == ColumnNames.created.value:
+        if _is_list(data_type):
+            value_type = data_type.value_type
+            return _is_string(value_type) or _is_date(value_type)
+        return _is_string(data_type)
+    return True
+
+
+def _parses_as_date(expr: pl.Expr) -> pl.Expr:
+    """Whether the strings are dates or datetimes, as they are parsed by pydantic."""
+    parsed = [expr.str.to_date("%Y-%m-%d", strict=False)] + [
+        expr.str.to_datetime(datetime_format, strict=False)
+        for datetime_format in DATETIME_FORMATS
+    ]
+    return pl.any_horizontal([p.is_not_null() for p in parsed])
+
+
+def _valid_dates(expr: pl.Expr, data_type: pa.DataType) -> pl.Expr:
+    if _is_string(data_type):
+        return _parses_as_date(expr)
+    return expr.is_not_null()
+
+
+def _valid_rows(column: str, data_type: pa.DataType) -> tuple[pl.Expr, str]:
+    """An expression which is true for the rows with a valid value in the column, and
+    a message describing the invalid values."""
+    col = pl.col(column)
+    if column == ColumnNames.token_count.value:
+        return col.is_not_null() & (col >= 0), "is missing or negative"
+    if column == ColumnNames.added.value:
+        return _valid_dates(col, data_type), "is not a date"
+    if column == ColumnNames.created.value:
+        if _is_list(data_type):
+            dates = col
+            value_type = data_type.value_type
+        else:  # the "start, end" format handled by `ensure_tuple`
+            dates = col.str.split(CREATED_SEPARATOR)
+            value_type = data_type
+        valid = (dates.list.len() == 2) & dates.list.eval(
+            _valid_dates(pl.element(), value_type)
+        ).list.all()
+        return valid.fill_null(False), "is not a (start, end) tuple of dates"
+    return col.is_not_null(), "is missing"
+
+
+def validate_file(path: Path) -> list[SchemaViolation]:
+    """Validates every row of a Parquet file against the `SampleSchema` in a single
+    vectorized query.
+
+    Args:
+        path: The Parquet file.
+
+    Returns:
+        The violations of the schema, both of the file (the column order and types) and
+        of each row.
+    """
+    file = str(path)
+    schema = pq.read_schema(path)
+    violations: list[SchemaViolation] = []
+
+    if schema.names != COLUMN_ORDER:
+        violations.append(
+            SchemaViolation(
+                file=file,
+                column="columns",
+                message=f"are {schema.names}, expected {COLUMN_ORDER}",
+            )
+        )
+
+    checks: dict[str, tuple[pl.Expr, str]] = {}
+    for column in COLUMN_ORDER:
+        if column not in schema.names:
+            continue
+        data_type = schema.field(column).type
+        if not _is_valid_type(column, data_type):
+            violations.append(
+                SchemaViolation(
+                    file=file, column=column, message=f"has invalid type {data_type}"
+                )
+            )
+            continue
+        checks[column] = _valid_rows(column, data_type)
+
+    if not checks:
+        return violations
+
+    ids = (
+        pl.col(ColumnNames.id.value)
+        if ColumnNames.id.value in checks
+        else pl.lit(None, dtype=pl.String)
+    )
+    invalid = (
+        pl.scan_parquet(path)
+        .with_row_index("row")
+        .select(
+            "row",
+            ids.alias("id"),
+            *[
+                (~valid).alias(f"invalid_{column}")
+                for column, (valid, _) in checks.items()
+            ],
+        )
+        .filter(pl.any_horizontal([f"invalid_{column}" for column in checks]))
+        .collect()
+    )
+    for row in invalid.iter_rows(named=True):
+        for column, (_, message) in checks.items():
+            if row[f"invalid_{column}"]:
+                violations.append(
+                    SchemaViolation(
+                        file=file,
+                        column=column,
+                        message=message,
+                        row=row["row"],
+                        id=row["id"],
+                    )
+                )
+    return violations
+
+
+def validate_dataset(paths: Sequence[Path]) -> list[SchemaViolation]:
+    """Validates every row of the Parquet files of a dataset. See `validate_file`."""
+    violations = []
+    for path in paths:
+        violations.extend(validate_file(path))
+    return violations
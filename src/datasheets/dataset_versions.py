@@ -0,0 +1,201 @@
+"""
+A catalogue of the versions of the datasets, e.g. ".../datasets/mydataset/processed/v2.0.0".
+
+The directories of all datasets are scanned once when the catalogue is first used, and
+the catalogue is shared by all callers within the process. Before a dataset is looked
+up, the modification times of its directory and its dataset type directories are
+compared to those recorded when it was scanned, such that only datasets with added or
+removed versions are scanned again. This replaces a full directory walk per lookup
+with a few `stat` calls, which matters on network file systems.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from packaging.version import InvalidVersion, Version
+
+logger = logging.getLogger(__name__)
+
+# Define dataset type priorities (lower number = higher priority)
+DATASET_TYPE_PRIORITY = {
+    "processed": 1,
+    "dedup": 2,
+    "original": 3,
+}
+VERSION_FOLDER_PATTERN = re.compile(r"^v(.+)$")
+
+# the catalogues by their absolute root directory
+_catalogs: dict[Path, VersionCatalog] = {}
+
+
+@dataclass(frozen=True)
+class DatasetVersion:
+    """
+    Attributes:
+        path: The directory of the version, e.g. ".../mydataset/processed/v2.0.0".
+        dataset_type: The type of the dataset, e.g. "processed".
+        version: The parsed version.
+    """
+
+    path: Path
+    dataset_type: str
+    version: Version
+
+    @property
+    def priority(self) -> int:
+        """The priority of the dataset type, lower is better."""
+        return DATASET_TYPE_PRIORITY[self.dataset_type]
+
+
+def _mtime_ns(path: Path) -> int | None:
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _stamp(dataset_path: Path) -> tuple[int | None, ...]:
+    """The modification times of the directories which change when a version is added
+    or removed: the dataset directory and its dataset type directories."""
+    return (
+        _mtime_ns(dataset_path),
+        *[_mtime_ns(dataset_path / t) for t in DATASET_TYPE_PRIORITY],
+    )
+
+
+def scan_dataset_versions(dataset_path: Path) -> list[DatasetVersion]:
+    """Lists the valid versions of a dataset by walking its directory."""
+    versions: list[DatasetVersion] = []
+    for dataset_type_dir in dataset_path.iterdir():
+        if not dataset_type_dir.is_dir():
+            continue
+
+        dataset_type = dataset_type_dir.name
+        if dataset_type not in DATASET_TYPE_PRIORITY:
+            logger.debug(f"Skipping unknown dataset type directory: {dataset_type_dir}")
+            continue
+
+        for version_dir in dataset_type_dir.iterdir():
+            if not version_dir.is_dir():
+                continue
+
+            match = VERSION_FOLDER_PATTERN.match(version_dir.name)
+            if not match:
+                logger.debug(f"Skipping non-versioned directory: {version_dir}")
+                continue
+
+            try:
+                version = Version(match.group(1))
+            except InvalidVersion:
+                logger.debug(
+                    f"Skipping invalid version string in folder name: {version_dir.name}"
+                )
+                continue
+            versions.append(
+                DatasetVersion(
+                    path=version_dir, dataset_type=dataset_type, version=version
+                )
+            )
+    return versions
+
+
+@dataclass
+class _CatalogEntry:
+    stamp: tuple[int | None, ...]
+    versions: list[DatasetVersion]
+
+
+@dataclass
+class VersionCatalog:
+    """The versions of the datasets in a directory, see the module docstring."""
+
+    root: Path
+    _entries: dict[str, _CatalogEntry] = field(default_factory=dict)
+    _scanned: bool = False
+
+    def _scan_dataset(self, dataset_name: str) -> _CatalogEntry:
+        dataset_path = self.root / dataset_name
+        entry = _CatalogEntry(
+            stamp=_stamp(dataset_path), versions=scan_dataset_versions(dataset_path)
+        )
+        self._entries[dataset_name] = entry
+        return entry
+
+    def scan(self) -> None:
+        """Scans the versions of all datasets in the root directory."""
+        self._entries = {}
+        if self.root.is_dir():
+            for dataset_path in self.root.iterdir():
+                if dataset_path.is_dir():
+                    self._scan_dataset(dataset_path.name)
+        self._scanned = True
+
+    def versions(self, dataset_name: str) -> list[DatasetVersion]:
+        """The versions of a dataset. The dataset is scanned again if its directories
+        have been modified since it was last scanned."""
+        if not self._scanned:
+            self.scan()
+
+        stamp = _stamp(self.root / dataset_name)
+        if stamp[0] is None:  # the dataset does not exist (anymore)
+            self._entries.pop(dataset_name, None)
+            return []
+
+        entry = self._entries.get(dataset_name)
+        if entry is None or entry.stamp != stamp:
+            entry = self._scan_dataset(dataset_name)
+        return entry.versions
+
+    def latest(self, dataset_name: str) -> DatasetVersion | None:
+        """The latest version of a dataset, based on the dataset type priority and then
+        the version."""
+        versions = self.versions(dataset_name)
+        if not versions:
+            return None
+        return max(versions, key=lambda v: (-v.priority, v.version))
+
+
+def get_version_catalog(root: Path) -> VersionCatalog:
+    """The shared catalogue of the datasets in a directory."""
+    root = root.absolute()
+    if root not in _catalogs:
+        _catalogs[root] = VersionCatalog(root)
+    return _catalogs[root]
+
+
+def find_latest_dataset_version(dataset_parent_path: Path) -> Path | None:
+    """
+    Finds the path to the latest dataset version based on dataset type priority and semantic version.
+
+    Args:
+        dataset_parent_path: A Path object pointing to the dataset directory (e.g., ".../datasets/mydataset")
+
+    Returns:
+        A Path object to the directory of the latest versioned dataset,
+        e.g., Path(".../datasets/mydataset/processed/v2.0.0"),
+        or None if nothing valid is found.
+    """
+    if not dataset_parent_path.is_dir():
+        logger.warning(
+            f"Provided path is not a directory or does not exist: {dataset_parent_path}"
+        )
+        return None
+
+    catalog = get_version_catalog(dataset_parent_path.parent)
+    latest = catalog.latest(dataset_parent_path.name)
+    if latest is None:
+        logger.info(
+            f"No valid versioned dataset directories found in: {dataset_parent_path}"
+        )
+        return None
+
+    logger.info(
+        f"Found latest dataset: '{latest.path.parent.name}/{latest.path.name}' "
+        f"(type priority {latest.priority}, version {latest.version})"
+    )
+    # relative to the given path, as the catalogue uses the absolute root
+    return dataset_parent_path / latest.path.parent.name / latest.path.name
@@ -1,19 +1,18 @@
 import json
 import logging
+import re
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
 from textwrap import dedent
-from typing import Any, Self, cast
+from typing import TYPE_CHECKING, Any, Self, cast
 
-import yaml
-from datasets import Dataset, load_dataset
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, PrivateAttr, field_validator
 
 from datasheets.descriptive_stats import DescriptiveStatsOverview
-from datasheets.plots.descriptive_statistics_plots import (
-    create_descriptive_statistics_plots,
-)
+from datasheets.paths import readme_path as main_readme_path
 from datasheets.typings import (
     DOMAIN_TYPE,
     LANG_TYPE,
@@ -21,11 +20,20 @@ from datasheets.typings import (
     LICENSE_NAMES_MAPPING,
 )
 
+if TYPE_CHECKING:
+    # pyarrow, plotnine and yaml are imported where they are used, as importing them
+    # takes seconds and most commands only need to read the datasheets
+    import pyarrow.dataset as pds
+
 logger = logging.getLogger(__name__)
 
 
 LICENSE_HEADER = "## License Information"
 
+# parsed datasheets, keyed by their resolved path, along with the modification time and
+# size of the file when it was parsed (see DataSheet.load_cached)
+_datasheet_cache: dict[Path, tuple[tuple[int, int], "DataSheet"]] = {}
+
 
 class DEFAULT_SECTION_TAGS(Enum):
     desc_stats = "DESC-STATS"
@@ -33,6 +41,9 @@ class DEFAULT_SECTION_TAGS(Enum):
     short_description = "SHORT DESCRIPTION"
 
 
+DEFAULT_PLOT_DPI = 500
+DEFAULT_PLOT_FORMATS = ("png",)  # the datasheet template below shows the png
+
 DATASET_PLOTS_template = """
 <p align="center">
 <img src="./images/dist_document_length.png" width="600" style="margin-right: 10px;" />
@@ -81,6 +92,120 @@ def create_sample_str(sample: dict[str, Any], max_str_len: int = 100):
     return sample_str
 
 
+TAG_MARKER_PATTERN = re.compile(r"<!-- (START|END)-(.+?) -->")
+
+
+def _tag_name(tag: str | DEFAULT_SECTION_TAGS) -> str:
+    return tag.value if isinstance(tag, Enum) else tag
+
+
+@dataclass(frozen=True)
+class MarkdownHeader:
+    """
+    Attributes:
+        line: The line of the header, e.g. "## Dataset Description".
+        level: The number of leading "#".
+        start: The index of the line in the body.
+    """
+
+    line: str
+    level: int
+    start: int
+
+
+@dataclass
+class MarkdownIndex:
+    """
+    An index of the headers and tags of a markdown body, built in a single pass over the
+    body. Any line starting with "#" counts as a header, and a section ends at the next
+    header regardless of its level.
+
+    Attributes:
+        body: The indexed body.
+        headers: The headers in the order they appear.
+        header_positions: The position in `headers` of the first header with a given
+            (stripped) line.
+        tag_starts: The indices of the start markers of each tag.
+        tag_ends: The indices of the end markers of each tag.
+    """
+
+    body: str
+    headers: list[MarkdownHeader] = field(default_factory=list)
+    header_positions: dict[str, int] = field(default_factory=dict)
+    tag_starts: dict[str, list[int]] = field(default_factory=dict)
+    tag_ends: dict[str, list[int]] = field(default_factory=dict)
+
+    @classmethod
+    def from_body(cls, body: str) -> "MarkdownIndex":
+        index = cls(body=body)
+        start = 0
+        for line, line_with_end in zip(
+            body.splitlines(), body.splitlines(keepends=True)
+        ):
+            if line.startswith("#"):
+                level = len(line) - len(line.lstrip("#"))
+                index.header_positions.setdefault(line.strip(), len(index.headers))
+                index.headers.append(MarkdownHeader(line, level, start))
+            start += len(line_with_end)
+
+        for match in TAG_MARKER_PATTERN.finditer(body):
+            kind, tag = match.groups()
+            markers = index.tag_starts if kind == "START" else index.tag_ends
+            markers.setdefault(tag, []).append(match.start())
+        return index
+
+    def get_headers(self, levels: list[int]) -> list[str]:
+        # a header of a deeper level also starts with the "#"s of the given levels
+        min_level = min(levels)
+        return [h.line for h in self.headers if h.level >= min_level]
+
+    def get_section_indices(self, header: str) -> tuple[int, int]:
+        position = self.header_positions.get(header.strip())
+        if position is None:
+            # kept from the previous implementation, which returned the remainder of
+            # the body from the first occurrence of the header text (if any)
+            return self.body.find(header), len(self.body)
+        start_idx = self.headers[position].start
+        if position + 1 < len(self.headers):
+            end_idx = self.headers[position + 1].start
+        else:
+            end_idx = len(self.body)
+        return start_idx, end_idx
+
+    def get_tag_indices(self, tag: str) -> tuple[int, int]:
+        starts, ends = self.tag_starts.get(tag), self.tag_ends.get(tag)
+        if starts and ends and starts[0] < ends[0]:
+            return starts[0], ends[0]
+        raise ValueError(f"tag ({tag}) not found in readme")
+
+    def replace_tags(self, packages: Mapping[str, str]) -> str:
+        """Replaces the content of each tag and returns the new body, which is
+        concatenated once regardless of the number of tags."""
+        replacements: list[tuple[int, int, str]] = []
+        for tag, package in packages.items():
+            tag_start = f"<!-- START-{tag} -->"
+            tag_end = f"<!-- END-{tag} -->"
+            starts = self.tag_starts.get(tag, [])
+            ends = self.tag_ends.get(tag, [])
+            if len(starts) != 1 or len(ends) != 1 or starts[0] > ends[0]:
+                raise ValueError(
+                    f"The markers ({tag_start} ... {tag_end}) does not appear in the markdown. Markers should appear exactly once in the markdown."
+                )
+            replacements.append(
+                (starts[0] + len(tag_start), ends[0], f"\n{package.strip()}\n")
+            )
+
+        pieces: list[str] = []
+        previous_end = 0
+        for start, end, content in sorted(replacements):
+            if start < previous_end:
+                raise ValueError("The tags to replace must not be nested.")
+            pieces += [self.body[previous_end:start], content]
+            previous_end = end
+        pieces.append(self.body[previous_end:])
+        return "".join(pieces)
+
+
 class DataSheet(BaseModel):
     pretty_name: str
     license: LICENSE
@@ -93,6 +218,8 @@ class DataSheet(BaseModel):
     frontmatter: dict[str, Any]
     body: str
 
+    _index: MarkdownIndex | None = PrivateAttr(default=None)
+
     # check that licence name is compatible with license
     @field_validator("license_name")  # type: ignore
     def check_license_name(cls, v: str | None, values: dict[str, Any]) -> str | None:
@@ -116,74 +243,47 @@ class DataSheet(BaseModel):
 
     @property
     def frontmatter_as_str(self) -> str:
+        import yaml
+
         return yaml.dump(self.frontmatter, indent=2, sort_keys=False)
 
     def to_str(self) -> str:
         return f"---\n{self.frontmatter_as_str.strip()}\n---\n\n{self.body.strip()}\n"
 
-    def get_dataset(self, **kwargs) -> Dataset:
-        ds_path = self.path.parent
-        ds = load_dataset(ds_path.as_posix(), split="train", **kwargs)
-        ds = cast(Dataset, ds)
-        return ds
+    def get_dataset(self) -> "pds.Dataset":
+        """Opens the local files of the latest version of the dataset, see
+        `datasheets.dataset_access`."""
+        from datasheets.dataset_access import dataset_files, open_dataset
+
+        return open_dataset(dataset_files(self.path.parent.name))
 
     def get_descritive_stats(self) -> DescriptiveStatsOverview:
         path = self.path.parent / "descriptive_stats.json"
         return DescriptiveStatsOverview.from_disk(path)
 
-    def get_section_indices_by_header(self, header: str) -> tuple[int, int]:
-        level = header.split(" ")[0].count("#")
-
-        next_is_end_section = False
-        end_header = None
-        for _header in self.get_headers(levels=list(range(1, level + 1))):
-            if header.strip() == _header.strip():
-                next_is_end_section = True
-                continue
-
-            if next_is_end_section:
-                end_header = _header
-                break
-
-        if next_is_end_section is None:
-            raise ValueError(f"The header '{header}' is not found in the text.")
-
-        start_idx = self.body.find(header)
-        if end_header:
-            end_idx = self.body[start_idx:].find(end_header) + start_idx
-        else:
-            end_idx = len(self.body)
+    @property
+    def index(self) -> MarkdownIndex:
+        """The index of the headers and tags of the body. It is rebuilt when the body
+        is replaced."""
+        if self._index is None or self._index.body is not self.body:
+            self._index = MarkdownIndex.from_body(self.body)
+        return self._index
 
-        return start_idx, end_idx
+    def get_section_indices_by_header(self, header: str) -> tuple[int, int]:
+        return self.index.get_section_indices(header)
 
     def get_section_by_header(self, header: str) -> str:
         s, e = self.get_section_indices_by_header(header)
         return self.body[s:e]
 
     def get_headers(self, levels: list[int] = [1, 2, 3, 4]) -> list[str]:
-        def __contains_level(text: str) -> bool:
-            if text.startswith("#"):
-                for level in levels:
-                    if text.startswith("#" * level):
-                        return True
-            return False
-
-        return [line for line in self.body.splitlines() if __contains_level(line)]
+        return self.index.get_headers(levels)
 
     def get_tag_idx(self, tag: str | DEFAULT_SECTION_TAGS) -> tuple[int, int]:
-        if isinstance(tag, Enum):
-            tag = tag.value
-        tag_start = f"<!-- START-{tag} -->"
-        tag_end = f"<!-- END-{tag} -->"
-        start_idx = self.body.find(tag_start)
-        end_idx = self.body.find(tag_end)
-        if end_idx != -1 and start_idx != -1 and start_idx < end_idx:
-            return start_idx, end_idx
-        raise ValueError(f"tag ({tag}) not found in readme")
+        return self.index.get_tag_indices(_tag_name(tag))
 
     def get_tag_content(self, tag: str | DEFAULT_SECTION_TAGS) -> str:
-        if isinstance(tag, Enum):
-            tag = tag.value
+        tag = _tag_name(tag)
         s, e = self.get_tag_idx(tag=tag)
         tag_start = f"<!-- START-{tag} -->"
         return self.body[s + len(tag_start) : e].strip()
@@ -192,7 +292,9 @@ class DataSheet(BaseModel):
         self, descriptive_stats: DescriptiveStatsOverview | None = None
     ) -> str:
         if descriptive_stats is None:
-            d_stats = DescriptiveStatsOverview.from_dataset(self.get_dataset())
+            d_stats = DescriptiveStatsOverview.from_parquet(
+                [Path(f) for f in self.get_dataset().files]
+            )
         else:
             d_stats = descriptive_stats
 
@@ -204,16 +306,33 @@ class DataSheet(BaseModel):
         """).strip()
             + "\n"
         )
+        median = d_stats.token_length_quantile(0.5)
+        p99 = d_stats.token_length_quantile(0.99)
+        if median is not None and p99 is not None:
+            package += f"- **Median document length in tokens (p99)**: {convert_to_human_readable(round(median))} ({convert_to_human_readable(round(p99))})\n"
 
         return self.replace_tag(
             package=package,
             tag=DEFAULT_SECTION_TAGS.desc_stats,
         )
 
-    def add_dataset_plots(self, dataset: Dataset, create_plot: bool = True) -> str:
+    def add_dataset_plots(
+        self,
+        parquet_files: Sequence[Path],
+        create_plot: bool = True,
+        dpi: int = DEFAULT_PLOT_DPI,
+        formats: Sequence[str] = DEFAULT_PLOT_FORMATS,
+    ) -> str:
         if create_plot:
+            from datasheets.plots.descriptive_statistics_plots import (
+                create_descriptive_statistics_plots,
+            )
+
             create_descriptive_statistics_plots(
-                dataset=dataset, save_dir=self.path.parent
+                parquet_files=parquet_files,
+                save_dir=self.path.parent,
+                dpi=dpi,
+                formats=formats,
             )
         return self.replace_tag(
             package=DATASET_PLOTS_template, tag=DEFAULT_SECTION_TAGS.dataset_plots
@@ -227,23 +346,23 @@ class DataSheet(BaseModel):
         Returns:
             The entire body text
         """
-        if isinstance(tag, Enum):
-            tag = tag.value
-        tag_start = f"<!-- START-{tag} -->"
-        tag_end = f"<!-- END-{tag} -->"
-
-        if self.body.count(tag_start) != 1 or self.body.count(tag_end) != 1:
-            raise ValueError(
-                f"The markers ({tag_start} ... {tag_end}) does not appear in the markdown. Markers should appear exactly once in the markdown."
-            )
-
-        start_md, _, remainder = self.body.partition(tag_start)
-        _, _, end_md = remainder.partition(tag_end)
+        return self.replace_tags({tag: package})
 
-        return f"{start_md}{tag_start}\n{package.strip()}\n{tag_end}{end_md}"
+    def replace_tags(self, packages: Mapping[str | DEFAULT_SECTION_TAGS, str]) -> str:
+        """Replace multiple tags in the datasheet body at once.
+        Args:
+            packages: The tags you want to replace and what to replace them with
+        Returns:
+            The entire body text
+        """
+        return self.index.replace_tags(
+            {_tag_name(tag): package for tag, package in packages.items()}
+        )
 
     @staticmethod
     def get_frontmatter_and_body(file_path: Path) -> tuple[dict[str, Any], str]:
+        import yaml
+
         with file_path.open("r") as f:
             content = f.read()
         if content.startswith("---"):
@@ -270,6 +389,23 @@ class DataSheet(BaseModel):
             path=readme_path,
         )
 
+    @classmethod
+    def load_cached(cls, readme_path: Path) -> Self:
+        """Loads a datasheet, reusing the parsed datasheet of earlier calls if the file
+        has not been modified since. A copy is returned, such that the caller can
+        modify it without affecting the cache."""
+        key = readme_path.resolve()
+        stat = key.stat()
+        # the size is included as the modification time might have a coarse resolution
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = _datasheet_cache.get(key)
+        if cached is None or cached[0] != version or not isinstance(cached[1], cls):
+            sheet = cls.load_from_path(readme_path)
+            _datasheet_cache[key] = (version, sheet)
+        else:
+            sheet = cast(Self, cached[1])
+        return sheet.model_copy(deep=True, update={"path": readme_path})
+
     def write_to_path(self, readme_path: Path | None = None) -> None:
         if readme_path is None:
             readme_path = self.path
@@ -277,6 +413,17 @@ class DataSheet(BaseModel):
             f.write(self.to_str())
 
 
+def get_dataset_names(readme_path: Path = main_readme_path) -> list[str]:
+    """The names of the datasets in the configs of the main datasheet, excluding the
+    default config. The main datasheet is only parsed again if it has been modified."""
+    main_sheet = DataSheet.load_cached(readme_path)
+    return [
+        cfg["config_name"]
+        for cfg in main_sheet.frontmatter["configs"]
+        if cfg["config_name"] != "default"
+    ]
+
+
 if __name__ == "__main__":
     from dynaword.paths import repo_path
 
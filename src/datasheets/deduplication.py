@@ -0,0 +1,751 @@
+"""
+Detection of exact and near duplicate documents across all datasets, without holding
+the texts in memory.
+
+For exact duplicates the text column is streamed in batches and each text is reduced
+to a 128-bit hash (two seeded 64-bit hashes). The hashes are spilled to disk in
+partitions, after which each partition is grouped by itself. Memory use is thereby
+bounded by the size of a partition rather than by the size of the datasets.
+
+For near duplicates each text is reduced to a MinHash signature of its word n-grams.
+The signatures are stored in a memory mapped file, and documents whose signatures
+agree on a band of rows are compared (locality sensitive hashing).
+
+The uniqueness of the ids is checked in the same way as exact duplicates, reading only
+the id column.
+
+Example use:
+
+    uv run src/datasheets/deduplication.py --output duplicates.jsonl
+    uv run src/datasheets/deduplication.py --near_duplicates --jobs 8 --output near_duplicates.jsonl
+
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing
+import tempfile
+from collections import Counter
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+HASH_SEEDS = (0, 1)
+ARROW_BATCH_SIZE = 65_536
+# the number of rows in each partition, which bounds the memory used when grouping
+ROWS_PER_PARTITION = 10_000_000
+_IDS_SCHEMA = pa.schema(
+    [("id", pa.large_string()), ("file", pa.large_string()), ("id_hash", pa.uint64())]
+)
+
+EMPTY_SIGNATURE_VALUE = np.iinfo(np.uint32).max
+# the number of hash functions applied at a time, which bounds the memory used
+_PERMUTATION_CHUNK_SIZE = 16
+# the number of shingles hashed at a time, which bounds the memory used for long documents
+_SHINGLE_CHUNK_SIZE = 1 << 15
+# the number of candidate pairs compared at a time, which bounds the memory used
+_PAIR_CHUNK_SIZE = 1 << 14
+_NGRAM_MULTIPLIERS = np.array(
+    [pow(0x9E3779B97F4A7C15, j, 2**64) for j in range(64)], dtype=np.uint64
+)
+_BAND_MULTIPLIER = np.uint64(0x100000001B3)
+
+_HASHES_SCHEMA = pa.schema(
+    [
+        ("hash_1", pa.uint64()),
+        ("hash_2", pa.uint64()),
+        ("source", pa.large_string()),
+        ("id", pa.large_string()),
+    ]
+)
+
+
+@dataclass(frozen=True, order=True)
+class DocumentReference:
+    source: str
+    id: str
+
+
+@dataclass
+class DuplicateGroup:
+    """Documents with identical texts."""
+
+    documents: list[DocumentReference]
+
+    @property
+    def sources(self) -> set[str]:
+        return {document.source for document in self.documents}
+
+    @property
+    def is_cross_dataset(self) -> bool:
+        return len(self.sources) > 1
+
+    def pairs(self) -> list[tuple[DocumentReference, DocumentReference]]:
+        return list(combinations(self.documents, 2))
+
+
+def hash_batch(batch: pa.RecordBatch, source: str) -> pl.DataFrame:
+    """Hashes the texts of a batch with an "id" and a "text" column. Missing texts are
+    skipped."""
+    df = pl.from_arrow(batch)
+    assert isinstance(df, pl.DataFrame)
+    return df.filter(pl.col("text").is_not_null()).select(
+        *[
+            pl.col("text").hash(seed).alias(f"hash_{i}")
+            for i, seed in enumerate(HASH_SEEDS, start=1)
+        ],
+        pl.lit(source).alias("source"),
+        pl.col("id").cast(pl.String),
+    )
+
+
+def _iter_hashes(
+    sources: Mapping[str, Sequence[Path]], batch_size: int
+) -> Iterable[pl.DataFrame]:
+    for source, paths in sources.items():
+        logger.info(f"Hashing the texts of {source}")
+        for path in paths:
+            parquet_file = pq.ParquetFile(path)
+            for batch in parquet_file.iter_batches(
+                batch_size=batch_size, columns=["id", "text"]
+            ):
+                if batch.num_rows > 0:
+                    yield hash_batch(batch, source)
+
+
+def _group_hashes(hashes: pl.DataFrame) -> pl.DataFrame:
+    return (
+        hashes.group_by("hash_1", "hash_2")
+        .agg(pl.col("source"), pl.col("id"))
+        .filter(pl.col("id").list.len() > 1)
+    )
+
+
+def _num_partitions(paths: Iterable[Path]) -> int:
+    """One partition per `ROWS_PER_PARTITION` rows, based on the file footers."""
+    num_rows = sum(pq.ParquetFile(path).metadata.num_rows for path in paths)
+    return max(1, -(-num_rows // ROWS_PER_PARTITION))
+
+
+def _partitioned_group_by(
+    frames: Iterable[pl.DataFrame],
+    group: Callable[[pl.DataFrame], pl.DataFrame],
+    partition_key: str,
+    schema: pa.Schema,
+    num_partitions: int,
+    tmp_dir: Path | None = None,
+) -> list[pl.DataFrame]:
+    """
+    Applies `group` to all rows with the same partition key at once, without holding
+    all rows in memory. The rows are spilled to Arrow files on disk, partitioned by
+    the (unsigned integer) partition key, after which the files are grouped one at a
+    time. With a single partition the rows are kept in memory instead.
+
+    Returns:
+        The result of `group` for each partition.
+    """
+    if num_partitions == 1:
+        frames = list(frames)
+        return [group(pl.concat(frames))] if frames else []
+
+    logger.info(f"Spilling the rows to {num_partitions} partitions")
+    results: list[pl.DataFrame] = []
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as spill_dir:
+        partition_paths = [
+            Path(spill_dir) / f"partition-{i:05d}.arrow" for i in range(num_partitions)
+        ]
+        writers = [pa.ipc.new_file(p, schema) for p in partition_paths]
+        try:
+            for frame in frames:
+                # rows with identical keys end up in the same partition
+                partitions = frame.with_columns(
+                    _partition=pl.col(partition_key) % num_partitions
+                ).partition_by("_partition", as_dict=True, include_key=False)
+                for (partition,), part in partitions.items():
+                    writers[partition].write_table(part.to_arrow().cast(schema))
+        finally:
+            for writer in writers:
+                writer.close()
+
+        for path in partition_paths:
+            results.append(group(pl.read_ipc(path)))
+    return results
+
+
+def find_exact_duplicates(
+    sources: Mapping[str, Sequence[Path]],
+    num_partitions: int | None = None,
+    batch_size: int = ARROW_BATCH_SIZE,
+    tmp_dir: Path | None = None,
+) -> list[DuplicateGroup]:
+    """
+    Finds the documents with identical texts, both within and across datasets.
+
+    Args:
+        sources: The Parquet files of each dataset. The files must contain an "id" and
+            a "text" column.
+        num_partitions: The number of partitions which the hashes are spilled to. By
+            default there is a partition per `ROWS_PER_PARTITION` rows. With a single
+            partition the hashes are kept in memory.
+        batch_size: The number of texts which are read and hashed at a time.
+        tmp_dir: The directory in which the partitions are stored.
+
+    Returns:
+        The groups of duplicate documents, sorted by their documents.
+    """
+    if num_partitions is None:
+        num_partitions = _num_partitions(p for ps in sources.values() for p in ps)
+
+    duplicates = _partitioned_group_by(
+        _iter_hashes(sources, batch_size),
+        group=_group_hashes,
+        partition_key="hash_1",
+        schema=_HASHES_SCHEMA,
+        num_partitions=num_partitions,
+        tmp_dir=tmp_dir,
+    )
+    groups = [
+        DuplicateGroup(
+            sorted(DocumentReference(s, i) for s, i in zip(row["source"], row["id"]))
+        )
+        for partition in duplicates
+        for row in partition.iter_rows(named=True)
+    ]
+    return sorted(groups, key=lambda group: group.documents)
+
+
+@dataclass
+class DuplicateId:
+    """An id which occurs more than once, and the files it occurs in (once per
+    occurrence)."""
+
+    id: str
+    files: list[str]
+
+
+def _iter_ids(paths: Sequence[Path]) -> Iterable[pl.DataFrame]:
+    for path in paths:
+        parquet_file = pq.ParquetFile(path)
+        for row_group in range(parquet_file.metadata.num_row_groups):
+            ids = pl.from_arrow(parquet_file.read_row_group(row_group, columns=["id"]))
+            assert isinstance(ids, pl.DataFrame)
+            yield ids.select(
+                pl.col("id").cast(pl.String),
+                pl.lit(str(path)).alias("file"),
+                pl.col("id").hash(HASH_SEEDS[0]).alias("id_hash"),
+            )
+
+
+def _group_ids(ids: pl.DataFrame) -> pl.DataFrame:
+    return ids.group_by("id").agg(pl.col("file")).filter(pl.col("file").list.len() > 1)
+
+
+def find_duplicate_ids(
+    paths: Sequence[Path],
+    num_partitions: int | None = None,
+    tmp_dir: Path | None = None,
+) -> list[DuplicateId]:
+    """
+    Finds the ids which occur more than once across the Parquet files. Only the "id"
+    column is read, a row group at a time, and the ids are grouped in partitions
+    spilled to disk, such that memory use is bounded by the size of a partition.
+
+    Args:
+        paths: The Parquet files, which must contain an "id" column.
+        num_partitions: The number of partitions which the ids are spilled to. By
+            default there is a partition per `ROWS_PER_PARTITION` rows.
+        tmp_dir: The directory in which the partitions are stored.
+
+    Returns:
+        The duplicate ids, sorted by id.
+    """
+    if num_partitions is None:
+        num_partitions = _num_partitions(paths)
+
+    duplicates = _partitioned_group_by(
+        _iter_ids(paths),
+        group=_group_ids,
+        partition_key="id_hash",
+        schema=_IDS_SCHEMA,
+        num_partitions=num_partitions,
+        tmp_dir=tmp_dir,
+    )
+    duplicate_ids = [
+        DuplicateId(id=row["id"], files=sorted(row["file"]))
+        for partition in duplicates
+        for row in partition.iter_rows(named=True)
+    ]
+    return sorted(duplicate_ids, key=lambda duplicate: duplicate.id)
+
+
+def format_duplicates(groups: Sequence[DuplicateGroup], max_groups: int = 10) -> str:
+    """A human readable summary of the duplicates, e.g. for test failures."""
+    n_documents = sum(len(group.documents) for group in groups)
+    lines = [f"Found {len(groups)} groups of duplicates ({n_documents} documents):"]
+    for group in groups[:max_groups]:
+        documents = ", ".join(f"({d.source}, {d.id})" for d in group.documents)
+        lines.append(f"  - {documents}")
+    if len(groups) > max_groups:
+        lines.append(f"  ... and {len(groups) - max_groups} more")
+    return "\n".join(lines)
+
+
+@dataclass
+class MinHashConfig:
+    """
+    Attributes:
+        num_perm: The number of hash functions, i.e. the length of the signatures.
+        bands: The number of LSH bands. Documents whose signatures agree on all rows
+            of a band become candidates. With b bands of r rows, pairs with a
+            similarity around (1 / b) ** (1 / r) become candidates half of the time.
+        ngram: The number of words in each shingle.
+        threshold: The minimum estimated Jaccard similarity of a near-duplicate pair.
+        seed: The seed of the hash functions.
+    """
+
+    num_perm: int = 128
+    bands: int = 16
+    ngram: int = 5
+    threshold: float = 0.8
+    seed: int = 42
+
+    def __post_init__(self):
+        if self.num_perm % self.bands != 0:
+            raise ValueError("num_perm must be divisible by the number of bands")
+        if not 1 <= self.ngram <= len(_NGRAM_MULTIPLIERS):
+            raise ValueError(f"ngram must be between 1 and {len(_NGRAM_MULTIPLIERS)}")
+
+    @property
+    def rows(self) -> int:
+        return self.num_perm // self.bands
+
+    def permutations(self) -> tuple[np.ndarray, np.ndarray]:
+        rng = np.random.default_rng(self.seed)
+        # multiply-shift hashing requires an odd multiplier
+        a = rng.integers(0, 2**63, self.num_perm, dtype=np.uint64) * 2 + 1
+        b = rng.integers(0, 2**63, self.num_perm, dtype=np.uint64)
+        return a, b
+
+
+@dataclass
+class NearDuplicateCluster:
+    """
+    Documents with similar texts.
+
+    Attributes:
+        documents: The documents of the cluster, the first of which is its
+            representative.
+        similarities: The estimated Jaccard similarity of each document to the
+            representative.
+    """
+
+    documents: list[DocumentReference]
+    similarities: list[float]
+
+    @property
+    def sources(self) -> set[str]:
+        return {document.source for document in self.documents}
+
+
+def minhash_signatures(texts: pl.Series, config: MinHashConfig) -> np.ndarray:
+    """
+    Computes the MinHash signatures of the word n-grams of the texts.
+
+    Returns:
+        An array of shape (len(texts), num_perm). The signatures of texts without any
+        words are `EMPTY_SIGNATURE_VALUE` everywhere.
+    """
+    words = texts.fill_null("").str.to_lowercase().str.extract_all(r"\w+")
+    lengths = words.list.len().fill_null(0).to_numpy().astype(np.int64)
+    # empty lists become null when exploded
+    word_hashes = words.explode().drop_nulls().hash(config.seed).to_numpy()
+
+    n_docs, n_words = len(texts), len(word_hashes)
+    signatures = np.full((n_docs, config.num_perm), EMPTY_SIGNATURE_VALUE, np.uint32)
+    if n_words == 0:
+        return signatures
+
+    # the hash of the n-gram starting at each word, combining only words of its document
+    doc_of_word = np.repeat(np.arange(n_docs), lengths)
+    shingle_hashes = word_hashes.copy()
+    in_document = np.ones(n_words, dtype=bool)
+    for j in range(1, config.ngram):
+        in_document[n_words - j :] = False
+        in_document[: n_words - j] &= doc_of_word[j:] == doc_of_word[: n_words - j]
+        shifted = np.zeros(n_words, dtype=np.uint64)
+        shifted[: n_words - j] = word_hashes[j:] * _NGRAM_MULTIPLIERS[j]
+        shingle_hashes += np.where(in_document, shifted, 0)
+
+    # complete n-grams, or the entire document if it is shorter than an n-gram
+    doc_starts = np.cumsum(lengths) - lengths
+    is_start = np.zeros(n_words, dtype=bool)
+    is_start[doc_starts[lengths > 0]] = True
+    short_docs = np.repeat(lengths < config.ngram, lengths)
+    valid = in_document | (short_docs & is_start)
+    shingle_hashes, shingle_docs = shingle_hashes[valid], doc_of_word[valid]
+
+    a, b = config.permutations()
+    # the shingles are hashed in chunks, such that the memory used does not grow with
+    # the length of the documents. A document spanning several chunks is folded into
+    # its running minimum
+    for offset in range(0, len(shingle_hashes), _SHINGLE_CHUNK_SIZE):
+        chunk = shingle_hashes[offset : offset + _SHINGLE_CHUNK_SIZE]
+        docs, segment_starts = np.unique(
+            shingle_docs[offset : offset + _SHINGLE_CHUNK_SIZE], return_index=True
+        )
+        for start in range(0, config.num_perm, _PERMUTATION_CHUNK_SIZE):
+            end = start + _PERMUTATION_CHUNK_SIZE
+            # the hash functions are along the first axis, such that the shingles of a
+            # document are contiguous in memory. Overflows wrap around, which is intended
+            values = np.multiply(a[start:end, None], chunk[None, :])
+            values += b[start:end, None]
+            values >>= np.uint64(32)
+            minima = np.minimum.reduceat(values, segment_starts, axis=1).T
+            signatures[docs, start:end] = np.minimum(
+                signatures[docs, start:end], minima
+            )
+    return signatures
+
+
+def _write_signatures(
+    path: Path,
+    signatures_path: Path,
+    offset: int,
+    num_rows: int,
+    config: MinHashConfig,
+    batch_size: int,
+) -> None:
+    """Computes the signatures of a Parquet file and writes them to its rows of the
+    shared signature file."""
+    signatures = np.lib.format.open_memmap(signatures_path, mode="r+")
+    row = offset
+    for batch in pq.ParquetFile(path).iter_batches(
+        batch_size=batch_size, columns=["text"]
+    ):
+        texts = pl.from_arrow(batch["text"])
+        assert isinstance(texts, pl.Series)
+        signatures[row : row + batch.num_rows] = minhash_signatures(texts, config)
+        row += batch.num_rows
+    if row != offset + num_rows:
+        raise ValueError(f"Expected {num_rows} rows in {path}, but read {row - offset}")
+    signatures.flush()
+
+
+def _band_hashes(band: np.ndarray) -> np.ndarray:
+    hashes = np.zeros(len(band), dtype=np.uint64)
+    for k in range(band.shape[1]):
+        hashes = hashes * _BAND_MULTIPLIER + band[:, k].astype(np.uint64)
+    return hashes
+
+
+def _candidate_pairs(
+    signatures: np.ndarray, config: MinHashConfig, chunk_size: int
+) -> np.ndarray:
+    """Finds the pairs of documents which share a bucket in any band, as an array of
+    shape (n_pairs, 2). Each document in a bucket is paired with the first document of
+    the bucket, which suffices to find the clusters."""
+    pairs = []
+    for band in range(config.bands):
+        columns = slice(band * config.rows, (band + 1) * config.rows)
+        hashes, docs = [], []
+        for start in range(0, len(signatures), chunk_size):
+            chunk = np.asarray(signatures[start : start + chunk_size, columns])
+            non_empty = ~(chunk == EMPTY_SIGNATURE_VALUE).all(axis=1)
+            hashes.append(_band_hashes(chunk[non_empty]))
+            docs.append(np.flatnonzero(non_empty) + start)
+        band_hashes, band_docs = np.concatenate(hashes), np.concatenate(docs)
+
+        order = np.argsort(band_hashes, kind="stable")
+        band_hashes, band_docs = band_hashes[order], band_docs[order]
+        is_first = np.ones(len(band_hashes), dtype=bool)
+        is_first[1:] = band_hashes[1:] != band_hashes[:-1]
+        bucket_first = band_docs[
+            np.maximum.accumulate(np.where(is_first, np.arange(len(is_first)), 0))
+        ]
+        pairs.append(np.stack([bucket_first[~is_first], band_docs[~is_first]], axis=1))
+
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(pairs), axis=0)
+
+
+def _similarities(signatures: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """The estimated Jaccard similarity of each pair. The signatures of the pairs are
+    read in chunks, such that the memory used does not grow with the number of pairs."""
+    similarities = np.empty(len(pairs), dtype=np.float64)
+    for start in range(0, len(pairs), _PAIR_CHUNK_SIZE):
+        chunk = pairs[start : start + _PAIR_CHUNK_SIZE]
+        similarities[start : start + len(chunk)] = (
+            signatures[chunk[:, 0]] == signatures[chunk[:, 1]]
+        ).mean(axis=1)
+    return similarities
+
+
+def _find_clusters(n_docs: int, pairs: np.ndarray) -> dict[int, list[int]]:
+    """The connected components of the pairs, keyed by their smallest document."""
+    parent = np.arange(n_docs)
+
+    def find(doc: int) -> int:
+        root = doc
+        while parent[root] != root:
+            root = parent[root]
+        while parent[doc] != root:
+            parent[doc], doc = root, parent[doc]
+        return root
+
+    for a, b in pairs:
+        root_a, root_b = find(int(a)), find(int(b))
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters: dict[int, list[int]] = {}
+    for doc in np.unique(pairs):
+        clusters.setdefault(find(int(doc)), []).append(int(doc))
+    return clusters
+
+
+def find_near_duplicates(
+    sources: Mapping[str, Sequence[Path]],
+    config: MinHashConfig | None = None,
+    jobs: int = 1,
+    batch_size: int = 10_000,
+    tmp_dir: Path | None = None,
+) -> list[NearDuplicateCluster]:
+    """
+    Finds clusters of documents with similar texts, both within and across datasets,
+    using MinHash and locality sensitive hashing (LSH).
+
+    The signatures are written to a memory mapped file on disk, such that only the
+    band hashes of a single band are kept in memory at a time.
+
+    Args:
+        sources: The Parquet files of each dataset. The files must contain an "id" and
+            a "text" column.
+        config: The parameters of MinHash and LSH. Defaults to `MinHashConfig()`.
+        jobs: The number of files whose signatures are computed in parallel.
+        batch_size: The number of texts which are read and hashed at a time.
+        tmp_dir: The directory in which the signatures are stored.
+
+    Returns:
+        The clusters of near duplicates, sorted by their representative.
+    """
+    config = config or MinHashConfig()
+    files = [(source, path) for source, paths in sources.items() for path in paths]
+    num_rows = [pq.ParquetFile(path).metadata.num_rows for _, path in files]
+    offsets = np.cumsum([0, *num_rows])
+    n_docs = int(offsets[-1])
+    if n_docs == 0:
+        return []
+
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as spill_dir:
+        signatures_path = Path(spill_dir) / "signatures.npy"
+        np.lib.format.open_memmap(
+            signatures_path, mode="w+", dtype=np.uint32, shape=(n_docs, config.num_perm)
+        ).flush()
+
+        tasks = [
+            (path, signatures_path, int(offsets[i]), num_rows[i], config, batch_size)
+            for i, (_, path) in enumerate(files)
+        ]
+        if jobs > 1:
+            # spawned rather than forked, as polars is not fork safe
+            with ProcessPoolExecutor(
+                max_workers=jobs, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                list(executor.map(_write_signatures, *zip(*tasks)))
+        else:
+            for task in tasks:
+                _write_signatures(*task)
+
+        signatures = np.load(signatures_path, mmap_mode="r")
+        pairs = _candidate_pairs(signatures, config, chunk_size=batch_size * 10)
+        logger.info(f"Found {len(pairs)} candidate pairs")
+        clusters = _find_clusters(
+            n_docs, pairs[_similarities(signatures, pairs) >= config.threshold]
+        )
+
+        # the similarities of all members to the representative of their cluster
+        members = np.array(
+            [(root, doc) for root, docs in clusters.items() for doc in docs],
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        similarities = dict(
+            zip(
+                map(tuple, members.tolist()),
+                _similarities(signatures, members).tolist(),
+            )
+        )
+        del signatures
+
+    # the ids are only read for the documents in a cluster
+    file_of_doc = {
+        doc: int(np.searchsorted(offsets, doc, side="right")) - 1
+        for docs in clusters.values()
+        for doc in docs
+    }
+    ids: dict[int, str] = {}
+    for file_index in sorted(set(file_of_doc.values())):
+        docs = [doc for doc, f in file_of_doc.items() if f == file_index]
+        rows = np.array(docs) - offsets[file_index]
+        file_ids = pq.read_table(files[file_index][1], columns=["id"])["id"]
+        ids.update(zip(docs, file_ids.take(rows).to_pylist()))
+
+    def reference(doc: int) -> DocumentReference:
+        return DocumentReference(files[file_of_doc[doc]][0], str(ids[doc]))
+
+    return sorted(
+        (
+            NearDuplicateCluster(
+                documents=[reference(doc) for doc in docs],
+                similarities=[similarities[(root, doc)] for doc in docs],
+            )
+            for root, docs in clusters.items()
+        ),
+        key=lambda cluster: cluster.documents[0],
+    )
+
+
+def overlap_matrix(
+    clusters: Sequence[NearDuplicateCluster], sources: Sequence[str]
+) -> pd.DataFrame:
+    """
+    The number of documents of each source (rows) which have a near duplicate in
+    another source (columns). The diagonal counts the documents which have a near
+    duplicate within their own source.
+    """
+    counts = {source: dict.fromkeys(sources, 0) for source in sources}
+    for cluster in clusters:
+        source_counts = Counter(document.source for document in cluster.documents)
+        for source, n_documents in source_counts.items():
+            for other in source_counts:
+                if other != source or n_documents > 1:
+                    counts[source][other] += n_documents
+    return pd.DataFrame.from_dict(counts, orient="index")
+
+
+def overlap_matrix_str(matrix: pd.DataFrame) -> str:
+    """The overlap matrix as a markdown table, e.g. to embed in the README. Sources
+    without any near duplicates are left out."""
+    overlapping = matrix.index[(matrix.sum(axis=0) + matrix.sum(axis=1)) > 0]
+    matrix = matrix.loc[overlapping, overlapping]
+    return matrix.to_markdown()
+
+
+def get_dataset_sources(datasets: list[str] | None = None) -> dict[str, list[Path]]:
+    """The Parquet files of the latest version of each dataset."""
+    from datasheets.dataset_access import dataset_files
+    from datasheets.datasheet import get_dataset_names
+
+    sources: dict[str, list[Path]] = {}
+    for dataset_name in datasets or get_dataset_names():
+        try:
+            sources[dataset_name] = dataset_files(dataset_name)
+        except FileNotFoundError:
+            logger.error(f"Something went wrong in finding the {dataset_name} dataset.")
+    return sources
+
+
+def main(
+    datasets: list[str] | None = None,
+    output: Path | None = None,
+    num_partitions: int | None = None,
+    near_duplicates: bool = False,
+    threshold: float = MinHashConfig.threshold,
+    jobs: int = 1,
+    matrix_output: Path | None = None,
+) -> list[DuplicateGroup] | list[NearDuplicateCluster]:
+    sources = get_dataset_sources(datasets)
+
+    groups: list[DuplicateGroup] | list[NearDuplicateCluster]
+    if near_duplicates:
+        groups = find_near_duplicates(
+            sources, config=MinHashConfig(threshold=threshold), jobs=jobs
+        )
+        n_documents = sum(len(cluster.documents) for cluster in groups)
+        print(
+            f"Found {len(groups)} clusters of near duplicates ({n_documents} documents)"
+        )
+        matrix_str = overlap_matrix_str(overlap_matrix(groups, list(sources)))
+        print(matrix_str)
+        if matrix_output is not None:
+            matrix_output.write_text(matrix_str + "\n")
+    else:
+        groups = find_exact_duplicates(sources, num_partitions=num_partitions)
+        print(format_duplicates(groups))
+
+    if output is not None:
+        with output.open("w") as f:
+            for group in groups:
+                f.write(json.dumps(asdict(group), ensure_ascii=False) + "\n")
+    return groups
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find exact or near duplicate documents within and across the datasets."
+    )
+    parser.add_argument(
+        "--datasets",
+        nargs="+",
+        default=None,
+        help="The datasets to compare. Defaults to all datasets in the main datasheet.",
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=None,
+        help="Path to a JSONL file to write the groups of duplicates to.",
+    )
+    parser.add_argument(
+        "--num_partitions",
+        type=int,
+        default=None,
+        help="The number of partitions the hashes of exact duplicates are spilled to on disk.",
+    )
+    parser.add_argument(
+        "--near_duplicates",
+        action="store_true",
+        help="Find near duplicates using MinHash and LSH instead of exact duplicates.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=MinHashConfig.threshold,
+        help="The minimum estimated Jaccard similarity of near duplicates.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="The number of files whose MinHash signatures are computed in parallel.",
+    )
+    parser.add_argument(
+        "--matrix_output",
+        type=Path,
+        default=None,
+        help="Path to write the near duplicate overlap matrix of the sources to, as a markdown table.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    main(
+        args.datasets,
+        output=args.output,
+        num_partitions=args.num_partitions,
+        near_duplicates=args.near_duplicates,
+        threshold=args.threshold,
+        jobs=args.jobs,
+        matrix_output=args.matrix_output,
+    )
@@ -2,13 +2,25 @@ from __future__ import annotations
 
 import json
 import logging
+from collections.abc import Iterable
 from dataclasses import dataclass
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from datasets import Dataset
+if TYPE_CHECKING:
+    # pyarrow is imported where it is used, such that reading and writing the stats
+    # does not require importing it
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from datasets import Dataset
 
 logger = logging.getLogger(__name__)
 
+ARROW_BATCH_SIZE = 65_536
+# the resolution of the length histograms. A quantile estimated from a histogram is
+# within a factor 2^(1 / (2 * HISTOGRAM_BUCKETS_PER_OCTAVE)) (~4.4%) of the true value
+HISTOGRAM_BUCKETS_PER_OCTAVE = 8
+
 
 def calculate_average_document_length(
     dataset: Dataset, text_column: str = "text"
@@ -17,6 +29,93 @@ def calculate_average_document_length(
     return texts / len(dataset)
 
 
+def _min_max_from_metadata(
+    files: list[pq.ParquetFile], column: str
+) -> list[int] | None:
+    """Collects the minimum and maximum of each row group from the column statistics
+    in the file footers. Returns None if any row group lacks statistics."""
+    extremes: list[int] = []
+    for f in files:
+        # the column chunks are the leaves of the Parquet schema, which differ from the
+        # fields of the Arrow schema when there are nested columns
+        leaf_paths = [
+            f.metadata.schema.column(i).path for i in range(f.metadata.num_columns)
+        ]
+        if column not in leaf_paths:
+            return None
+        column_index = leaf_paths.index(column)
+        for row_group in range(f.metadata.num_row_groups):
+            statistics = f.metadata.row_group(row_group).column(column_index).statistics
+            if statistics is None or not statistics.has_min_max:
+                return None
+            extremes += [statistics.min, statistics.max]
+    return extremes
+
+
+def _iter_column(
+    files: list[pq.ParquetFile], column: str
+) -> Iterable[pa.ChunkedArray | pa.Array]:
+    for f in files:
+        for batch in f.iter_batches(batch_size=ARROW_BATCH_SIZE, columns=[column]):
+            if batch.num_rows > 0:
+                yield batch[column]
+
+
+def length_histogram(lengths: pa.Array | pa.ChunkedArray) -> list[int]:
+    """
+    Counts the lengths in fixed log-scale buckets. Bucket 0 holds the lengths of 0 and
+    bucket i > 0 the lengths in [2^((i - 1) / b), 2^(i / b)), where b is
+    `HISTOGRAM_BUCKETS_PER_OCTAVE`. As all histograms share the same buckets, the
+    histograms of different datasets are merged by adding their counts (see
+    `merge_histograms`).
+
+    Returns:
+        The count of each bucket, up to the last non-empty bucket.
+    """
+    import numpy as np
+
+    values = lengths.drop_null().to_numpy()
+    buckets = np.zeros(len(values), dtype=np.int64)
+    positive = values > 0
+    buckets[positive] = 1 + np.floor(
+        np.log2(values[positive]) * HISTOGRAM_BUCKETS_PER_OCTAVE
+    ).astype(np.int64)
+    return np.bincount(buckets).tolist()
+
+
+def merge_histograms(a: list[int], b: list[int]) -> list[int]:
+    longest, shortest = (a, b) if len(a) >= len(b) else (b, a)
+    return [
+        count + (shortest[i] if i < len(shortest) else 0)
+        for i, count in enumerate(longest)
+    ]
+
+
+def histogram_quantile(histogram: list[int], q: float) -> float:
+    """Estimates a quantile of the lengths as the geometric midpoint of the bucket
+    which contains it. See `length_histogram`."""
+    total = sum(histogram)
+    if total == 0:
+        raise ValueError("Can't compute a quantile of an empty histogram")
+    rank = q * (total - 1)
+    cumulative = 0
+    for bucket, count in enumerate(histogram):
+        cumulative += count
+        if cumulative > rank:
+            break
+    if bucket == 0:
+        return 0.0
+    return 2 ** ((bucket - 0.5) / HISTOGRAM_BUCKETS_PER_OCTAVE)
+
+
+def _merge_optional_histograms(
+    a: list[int] | None, b: list[int] | None
+) -> list[int] | None:
+    if a is None or b is None:
+        return None
+    return merge_histograms(a, b)
+
+
 @dataclass()
 class DescriptiveStatsOverview:
     """
@@ -27,6 +126,10 @@ class DescriptiveStatsOverview:
         min_length: Minimum document length in tokens.
         max_length: Maximum document length in tokens.
         average_document_length: Average document length in tokens.
+        token_length_histogram: Counts of the document lengths in tokens in log-scale
+            buckets (see `length_histogram`). None for statistics computed before the
+            histograms were added.
+        character_length_histogram: As above, for the lengths in characters.
     """
 
     number_of_samples: int
@@ -36,6 +139,8 @@ class DescriptiveStatsOverview:
     number_of_characters: int
     min_length_characters: int
     max_length_characters: int
+    token_length_histogram: list[int] | None = None
+    character_length_histogram: list[int] | None = None
 
     @property
     def average_document_length_tokens(self) -> float:
@@ -53,6 +158,24 @@ class DescriptiveStatsOverview:
             else 0.0
         )
 
+    def token_length_quantile(self, q: float) -> float | None:
+        """Estimates a quantile of the document lengths in tokens, e.g. 0.5 for the
+        median. None if the statistics have no histogram."""
+        if self.token_length_histogram is None:
+            return None
+        estimate = histogram_quantile(self.token_length_histogram, q)
+        return min(max(estimate, self.min_length_tokens), self.max_length_tokens)
+
+    def character_length_quantile(self, q: float) -> float | None:
+        """Estimates a quantile of the document lengths in characters. See
+        `token_length_quantile`."""
+        if self.character_length_histogram is None:
+            return None
+        estimate = histogram_quantile(self.character_length_histogram, q)
+        return min(
+            max(estimate, self.min_length_characters), self.max_length_characters
+        )
+
     @classmethod
     def from_disk(cls, path: Path) -> DescriptiveStatsOverview:
         with path.open("r") as f:
@@ -66,28 +189,114 @@ class DescriptiveStatsOverview:
 
     @classmethod
     def from_dataset(cls, dataset: Dataset) -> DescriptiveStatsOverview:
-        dataset = dataset.map(
-            lambda x: {
-                "sum_char_count": [sum([len(t) for t in x["text"]])],
-                "min_char_count": [min([len(t) for t in x["text"]])],
-                "max_char_count": [max([len(t) for t in x["text"]])],
-                "sum_token_count": [sum(x["token_count"])],
-                "min_token_count": [min(x["token_count"])],
-                "max_token_count": [max(x["token_count"])],
-                "length": [len(x["text"])],
-            },
-            batched=True,
-            num_proc=4,
-            remove_columns=dataset.column_names,
+        batches = dataset.with_format("arrow").iter(batch_size=ARROW_BATCH_SIZE)
+        return cls.from_arrow_batches(batches)  # type: ignore
+
+    @classmethod
+    def from_parquet(cls, paths: Iterable[Path]) -> DescriptiveStatsOverview:
+        """Computes the statistics directly from Parquet files.
+
+        The number of samples and the minimum and maximum token counts are read from
+        the file footers. Only the values which the footers can't provide are computed
+        by scanning a single column at a time: the token sum from "token_count" and the
+        character lengths from "text".
+        """
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        files = [pq.ParquetFile(path) for path in paths]
+
+        number_of_samples = sum(f.metadata.num_rows for f in files)
+        if number_of_samples == 0:
+            raise ValueError("Can't compute descriptive statistics of an empty dataset")
+
+        token_extremes = _min_max_from_metadata(files, column="token_count")
+        number_of_tokens = 0
+        scanned_token_extremes: list[int] = []
+        token_length_histogram: list[int] = []
+        for token_counts in _iter_column(files, column="token_count"):
+            number_of_tokens += pc.sum(token_counts).as_py() or 0
+            token_length_histogram = merge_histograms(
+                token_length_histogram, length_histogram(token_counts)
+            )
+            if token_extremes is None:
+                min_max = pc.min_max(token_counts).as_py()
+                scanned_token_extremes += [min_max["min"], min_max["max"]]
+
+        number_of_characters = 0
+        character_extremes: list[int] = []
+        character_length_histogram: list[int] = []
+        for texts in _iter_column(files, column="text"):
+            char_counts = pc.utf8_length(texts)
+            number_of_characters += pc.sum(char_counts).as_py() or 0
+            character_length_histogram = merge_histograms(
+                character_length_histogram, length_histogram(char_counts)
+            )
+            min_max = pc.min_max(char_counts).as_py()
+            character_extremes += [min_max["min"], min_max["max"]]
+
+        token_extremes = token_extremes or scanned_token_extremes
+        return cls(
+            number_of_samples=number_of_samples,
+            number_of_tokens=number_of_tokens,
+            min_length_tokens=min(token_extremes),
+            max_length_tokens=max(token_extremes),
+            number_of_characters=number_of_characters,
+            min_length_characters=min(character_extremes),
+            max_length_characters=max(character_extremes),
+            token_length_histogram=token_length_histogram,
+            character_length_histogram=character_length_histogram,
         )
+
+    @classmethod
+    def from_arrow_batches(
+        cls, batches: Iterable[pa.RecordBatch | pa.Table]
+    ) -> DescriptiveStatsOverview:
+        """Computes the statistics using Arrow compute kernels, such that no Python
+        objects are created per row."""
+        import pyarrow.compute as pc
+
+        number_of_samples = 0
+        number_of_tokens = 0
+        number_of_characters = 0
+        token_extremes: list[int] = []
+        character_extremes: list[int] = []
+        token_length_histogram: list[int] = []
+        character_length_histogram: list[int] = []
+
+        for batch in batches:
+            if batch.num_rows == 0:
+                continue
+            char_counts = pc.utf8_length(batch["text"])
+            token_counts = batch["token_count"]
+
+            number_of_samples += batch.num_rows
+            number_of_tokens += pc.sum(token_counts).as_py()
+            number_of_characters += pc.sum(char_counts).as_py()
+            token_min_max = pc.min_max(token_counts).as_py()
+            token_extremes += [token_min_max["min"], token_min_max["max"]]
+            char_min_max = pc.min_max(char_counts).as_py()
+            character_extremes += [char_min_max["min"], char_min_max["max"]]
+            token_length_histogram = merge_histograms(
+                token_length_histogram, length_histogram(token_counts)
+            )
+            character_length_histogram = merge_histograms(
+                character_length_histogram, length_histogram(char_counts)
+            )
+
+        if number_of_samples == 0:
+            raise ValueError("Can't compute descriptive statistics of an empty dataset")
+
         return cls(
-            number_of_samples=sum(dataset["length"]),
-            number_of_tokens=sum(dataset["sum_token_count"]),
-            min_length_tokens=min(dataset["min_token_count"]),
-            max_length_tokens=max(dataset["max_token_count"]),
-            number_of_characters=sum(dataset["sum_char_count"]),
-            min_length_characters=min(dataset["min_char_count"]),
-            max_length_characters=max(dataset["max_char_count"]),
+            number_of_samples=number_of_samples,
+            number_of_tokens=number_of_tokens,
+            min_length_tokens=min(token_extremes),
+            max_length_tokens=max(token_extremes),
+            number_of_characters=number_of_characters,
+            min_length_characters=min(character_extremes),
+            max_length_characters=max(character_extremes),
+            token_length_histogram=token_length_histogram,
+            character_length_histogram=character_length_histogram,
         )
 
     def __add__(self, other: DescriptiveStatsOverview) -> DescriptiveStatsOverview:
@@ -105,4 +314,12 @@ class DescriptiveStatsOverview:
             max_length_characters=max(
                 self.max_length_characters, other.max_length_characters
             ),
+            # only merged if both have histograms, as the sum would otherwise only
+            # describe some of the documents
+            token_length_histogram=_merge_optional_histograms(
+                self.token_length_histogram, other.token_length_histogram
+            ),
+            character_length_histogram=_merge_optional_histograms(
+                self.character_length_histogram, other.character_length_histogram
+            ),
         )
@@ -0,0 +1,146 @@
+"""
+Fingerprints of the files which the descriptive statistics are computed from, such that
+the statistics are only recomputed for datasets whose files have changed.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from datasheets.paths import repo_path
+
+logger = logging.getLogger(__name__)
+
+fingerprints_path = repo_path / "dataset_fingerprints.json"
+
+PARQUET_MAGIC = b"PAR1"
+
+
+@dataclass
+class FileFingerprint:
+    """
+    Attributes:
+        name: The path of the file relative to the dataset.
+        size: The size of the file in bytes.
+        mtime_ns: The modification time of the file.
+        content_hash: A hash of the Parquet footer for Parquet files, otherwise of
+            the entire file.
+    """
+
+    name: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+
+    def matches_stat(self, path: Path) -> bool:
+        stat = path.stat()
+        return (self.size, self.mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+
+
+def hash_parquet_footer(path: Path) -> str:
+    """Hashes the footer of a Parquet file, which contains the schema, the row group
+    offsets and the column statistics, without reading the data itself."""
+    with path.open("rb") as f:
+        f.seek(-8, 2)
+        tail = f.read(8)
+        if tail[4:] != PARQUET_MAGIC:
+            raise ValueError(f"Not a Parquet file: {path}")
+        footer_length = int.from_bytes(tail[:4], "little")
+        f.seek(-(8 + footer_length), 2)
+        footer = f.read(footer_length)
+    return hashlib.sha256(footer).hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def fingerprint_file(
+    path: Path, root: Path, previous: FileFingerprint | None = None
+) -> FileFingerprint:
+    """Fingerprints a file. The content hash of the previous fingerprint is reused if
+    the size and modification time of the file are unchanged."""
+    name = path.relative_to(root).as_posix()
+    if previous is not None and previous.matches_stat(path):
+        return FileFingerprint(
+            name=name,
+            size=previous.size,
+            mtime_ns=previous.mtime_ns,
+            content_hash=previous.content_hash,
+        )
+
+    stat = path.stat()
+    content_hash = (
+        hash_parquet_footer(path) if path.suffix == ".parquet" else hash_file(path)
+    )
+    return FileFingerprint(
+        name=name,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        content_hash=content_hash,
+    )
+
+
+@dataclass
+class FingerprintManifest:
+    """
+    The fingerprints of the input files of each dataset at the time its descriptive
+    statistics were last computed.
+    """
+
+    datasets: dict[str, list[FileFingerprint]] = field(default_factory=dict)
+
+    @classmethod
+    def from_disk(cls, path: Path = fingerprints_path) -> FingerprintManifest:
+        if not path.exists():
+            return cls()
+        with path.open("r") as f:
+            data = json.load(f)
+        return cls(
+            datasets={
+                name: [FileFingerprint(**fp) for fp in fingerprints]
+                for name, fingerprints in data["datasets"].items()
+            }
+        )
+
+    def to_disk(self, path: Path = fingerprints_path) -> None:
+        """Writes the manifest atomically, such that an interrupted write never leaves
+        a partially written file."""
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, prefix=f".{path.name}.", delete=False
+        ) as f:
+            json.dump(asdict(self), f, indent=2, sort_keys=True)
+        os.replace(f.name, path)
+
+    def fingerprint(
+        self, dataset_name: str, paths: list[Path], root: Path
+    ) -> list[FileFingerprint]:
+        """Fingerprints the current files of a dataset, reusing the recorded content
+        hashes of files which have not been modified."""
+        previous = {fp.name: fp for fp in self.datasets.get(dataset_name, [])}
+        return [
+            fingerprint_file(p, root, previous.get(p.relative_to(root).as_posix()))
+            for p in sorted(paths)
+        ]
+
+    def has_changed(
+        self, dataset_name: str, fingerprints: list[FileFingerprint]
+    ) -> bool:
+        """Whether the content of the files differs from when the dataset was recorded.
+        Only the names and content hashes are compared, such that e.g. a fresh
+        checkout with new modification times does not count as a change."""
+        if dataset_name not in self.datasets:
+            return True
+        recorded = [(fp.name, fp.content_hash) for fp in self.datasets[dataset_name]]
+        current = [(fp.name, fp.content_hash) for fp in fingerprints]
+        return recorded != current
+
+    def record(self, dataset_name: str, fingerprints: list[FileFingerprint]) -> None:
+        self.datasets[dataset_name] = fingerprints
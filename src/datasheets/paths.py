@@ -3,3 +3,4 @@ from pathlib import Path
 repo_path = Path(__file__).parent.parent.parent
 pyproject_path = repo_path / "pyproject.toml"
 readme_path = repo_path / "README.md"
+datasets_path = repo_path.parent / "datasets"
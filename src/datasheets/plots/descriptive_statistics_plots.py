@@ -1,30 +1,110 @@
 import logging
+from collections.abc import Sequence
 from pathlib import Path
-from typing import cast
 
 import pandas as pd
 import plotnine as pn
-from datasets import Dataset
+import polars as pl
+
+from datasheets.datasheet import DEFAULT_PLOT_DPI, DEFAULT_PLOT_FORMATS
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BINS = 100
+
+
+def compute_length_histograms(
+    parquet_files: Sequence[Path], bins: int = DEFAULT_BINS
+) -> pd.DataFrame:
+    """
+    Bins the document lengths of each source into equal width bins spanning the
+    lengths of the source. Only the `token_count` and `source` columns are read, and
+    the counts are computed using the polars streaming engine, such that the
+    documents are never loaded into memory.
+
+    Args:
+        parquet_files: The Parquet files of the dataset.
+        bins: The number of bins per source.
+
+    Returns:
+        A dataframe with the columns "Source", "xmin", "xmax" and "count", with a row
+        for each non-empty bin.
+    """
+    lengths = (
+        pl.scan_parquet(list(parquet_files))
+        .select("source", "token_count")
+        .filter(pl.col("token_count").is_not_null())
+    )
+    ranges = (
+        lengths.group_by("source")
+        .agg(
+            pl.col("token_count").min().alias("min"),
+            pl.col("token_count").max().alias("max"),
+        )
+        .with_columns(
+            width=pl.when(pl.col("max") > pl.col("min"))
+            .then((pl.col("max") - pl.col("min")) / bins)
+            .otherwise(1.0)
+        )
+        .collect(engine="streaming")
+    )
+    counts = (
+        lengths.join(ranges.lazy(), on="source")
+        .select(
+            "source",
+            ((pl.col("token_count") - pl.col("min")) / pl.col("width"))
+            .floor()
+            .clip(0, bins - 1)
+            .cast(pl.Int64)
+            .alias("bin"),
+        )
+        .group_by("source", "bin")
+        .agg(pl.len().alias("count"))
+        .collect(engine="streaming")
+    )
+    histograms = (
+        counts.join(ranges, on="source")
+        .select(
+            pl.col("source").alias("Source"),
+            (pl.col("min") + pl.col("bin") * pl.col("width")).alias("xmin"),
+            (pl.col("min") + (pl.col("bin") + 1) * pl.col("width")).alias("xmax"),
+            "count",
+        )
+        .sort("Source", "xmin")
+    )
+    return histograms.to_pandas()
+
 
 def create_descriptive_statistics_plots(
-    dataset: Dataset,
+    parquet_files: Sequence[Path],
     save_dir: Path,
-) -> tuple[Path, pn.ggplot]:
+    dpi: int = DEFAULT_PLOT_DPI,
+    formats: Sequence[str] = DEFAULT_PLOT_FORMATS,
+    bins: int = DEFAULT_BINS,
+) -> tuple[list[Path], pn.ggplot]:
+    """
+    Plots the distribution of the document lengths of each source. The histograms are
+    binned before plotting (see `compute_length_histograms`), such that only the bins
+    are passed to plotnine.
+
+    Args:
+        parquet_files: The Parquet files of the dataset.
+        save_dir: The directory of the datasheet. The plots are saved in its "images"
+            folder.
+        dpi: The resolution of the saved plots.
+        formats: The file formats to save the plot in, e.g. "png" or "svg". The
+            datasheet shows the "png".
+        bins: The number of bins per source.
+
+    Returns:
+        The paths of the saved plots and the plot.
+    """
     logger.info("creating descriptive statistics plot to readme.")
-    # lengths = dataset["token_count"]
-    df = dataset.to_pandas()
-    df = cast(pd.DataFrame, df)
-    df = df[["token_count", "source"]].rename(
-        columns={"token_count": "lengths", "source": "Source"}
-    )
-    # df = pd.DataFrame({"lengths": lengths, "Source": dataset["source"]})
+    df = compute_length_histograms(parquet_files, bins=bins)
 
     plot = (
-        pn.ggplot(df, pn.aes(x="lengths", y=pn.after_stat("count")))
-        + pn.geom_histogram(bins=100)
+        pn.ggplot(df, pn.aes(xmin="xmin", xmax="xmax", ymax="count"))
+        + pn.geom_rect(ymin=0)
         + pn.labs(
             x="Document Length (Tokens)",
             y="Count",
@@ -36,15 +116,18 @@ def create_descriptive_statistics_plots(
 
     img_path = save_dir / "images"
     img_path.mkdir(parents=False, exist_ok=True)
-    save_path = img_path / "dist_document_length.png"
-    pn.ggsave(
-        plot,
-        save_path,
-        dpi=500,
-        width=10,
-        height=10,
-        units="in",
-        verbose=False,
-    )
+    save_paths = []
+    for file_format in formats:
+        save_path = img_path / f"dist_document_length.{file_format}"
+        pn.ggsave(
+            plot,
+            save_path,
+            dpi=dpi,
+            width=10,
+            height=10,
+            units="in",
+            verbose=False,
+        )
+        save_paths.append(save_path)
 
-    return save_path, plot
+    return save_paths, plot
@@ -5,8 +5,8 @@ from pathlib import Path
 import pandas as pd
 import plotly.graph_objects as go
 
-from dynaword.datasheet import DataSheet
-from dynaword.paths import repo_path
+from datasheets.datasheet import DataSheet
+from datasheets.paths import repo_path
 
 # Configure logging
 logging.basicConfig(
@@ -27,7 +27,7 @@ def _create_descriptive_stats_table(
     for path in p:
         with path.open("r") as f:
             package = json.load(f)
-            sheet = DataSheet.load_from_path(path.parent / f"{path.parent.name}.md")
+            sheet = DataSheet.load_cached(path.parent / f"{path.parent.name}.md")
             package["dataset_name"] = path.parent.name
             package["pretty_name"] = sheet.pretty_name
             data.append(package)
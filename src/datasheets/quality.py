@@ -0,0 +1,196 @@
+"""
+Quality checks of the datasets, run directly on the Parquet files using polars lazy
+scans.
+
+Each check only declares the documents which violate it as a polars expression. The
+checks of a source are then run together as a single query, such that each source is
+scanned once for all checks and only the columns which the checks use are read. Only
+the violating rows are materialized. When all checks are elementwise (e.g.
+`token_count <= 1`) they are applied as a filter which polars pushes down to the
+Parquet reader.
+
+Example use:
+
+    uv run src/datasheets/quality.py --datasets dannet retsinformationdk
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+import polars as pl
+
+from datasheets.deduplication import HASH_SEEDS, get_dataset_sources
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_N_EXAMPLES = 10
+
+
+@dataclass
+class QualityCheck:
+    """
+    Attributes:
+        name: The name of the check.
+        violations: A boolean expression which is true for the documents violating the
+            check.
+        elementwise: Whether the expression only depends on the document itself. Only
+            elementwise checks can be pushed down to the Parquet reader, while e.g.
+            checking for duplicates requires all documents of the source.
+    """
+
+    name: str
+    violations: pl.Expr
+    elementwise: bool = True
+
+
+@dataclass
+class CheckResult:
+    check: str
+    source: str
+    n_violations: int
+    examples: list[str]  # the ids of (some of) the violating documents
+
+    @property
+    def passed(self) -> bool:
+        return self.n_violations == 0
+
+    def __str__(self) -> str:
+        if self.passed:
+            return f"{self.source}: {self.check} passed"
+        return (
+            f"{self.source}: {self.check} failed for {self.n_violations:,} documents "
+            f"(e.g. {', '.join(self.examples)})"
+        )
+
+
+def _text_hash() -> pl.Expr:
+    # a 128-bit hash, such that the duplicates are found without comparing the texts
+    return pl.struct(
+        *[
+            pl.col("text").hash(seed).alias(f"hash_{i}")
+            for i, seed in enumerate(HASH_SEEDS, start=1)
+        ]
+    )
+
+
+ONE_WORD_DOCUMENTS = QualityCheck(
+    name="one_word_documents", violations=pl.col("token_count") <= 1
+)
+WITHIN_SOURCE_DUPLICATES = QualityCheck(
+    name="within_source_duplicates",
+    violations=_text_hash().is_duplicated(),
+    elementwise=False,
+)
+DEFAULT_CHECKS = (ONE_WORD_DOCUMENTS, WITHIN_SOURCE_DUPLICATES)
+
+
+def _violations_query(
+    scan: pl.LazyFrame, checks: Sequence[QualityCheck]
+) -> pl.LazyFrame:
+    """A query of the ids of the documents violating any of the checks, with a boolean
+    column per check."""
+    flags = [check.violations.alias(check.name) for check in checks]
+    if all(check.elementwise for check in checks):
+        # filter first, such that the predicate is pushed down to the Parquet reader
+        return scan.filter(pl.any_horizontal(flags)).select("id", *flags)
+    # checks of the whole source see all documents, so the filter is applied after
+    # computing the flags of all checks in the same pass
+    return scan.select("id", *flags).filter(
+        pl.any_horizontal([check.name for check in checks])
+    )
+
+
+def check_source(
+    paths: Sequence[Path],
+    source: str,
+    checks: Sequence[QualityCheck] = DEFAULT_CHECKS,
+    n_examples: int = DEFAULT_N_EXAMPLES,
+) -> dict[str, CheckResult]:
+    """Runs the checks on the Parquet files of a source.
+
+    Args:
+        paths: The Parquet files of the source.
+        source: The name of the source.
+        checks: The checks to run. They are run as a single polars query, such that
+            the files are read once.
+        n_examples: The maximum number of violating document ids to report per check.
+
+    Returns:
+        The result of each check by its name.
+    """
+    violations = _violations_query(pl.scan_parquet(list(paths)), checks).collect()
+
+    results = {}
+    for check in checks:
+        ids = violations.filter(pl.col(check.name))["id"].cast(pl.String)
+        results[check.name] = CheckResult(
+            check=check.name,
+            source=source,
+            n_violations=len(ids),
+            examples=ids.head(n_examples).to_list(),
+        )
+    return results
+
+
+def run_quality_checks(
+    sources: Mapping[str, Sequence[Path]],
+    checks: Sequence[QualityCheck] = DEFAULT_CHECKS,
+    n_examples: int = DEFAULT_N_EXAMPLES,
+) -> list[CheckResult]:
+    """Runs the checks on each source. See `check_source`."""
+    results = []
+    for source, paths in sources.items():
+        logger.info(f"Checking {source}")
+        results.extend(check_source(paths, source, checks, n_examples).values())
+    return results
+
+
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Run the quality checks on the latest version of the datasets.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--datasets",
+        nargs="*",
+        default=None,
+        help="The datasets to check. Defaults to all datasets.",
+    )
+    parser.add_argument(
+        "--n_examples",
+        type=int,
+        default=DEFAULT_N_EXAMPLES,
+        help="The maximum number of violating document ids to report per check.",
+    )
+    parser.add_argument(
+        "--logging_level",
+        type=int,
+        default=20,
+        help="Sets the logging level. Default to 20 (INFO), other reasonable levels are 10 (DEBUG) and 30 (WARNING).",
+    )
+    return parser
+
+
+def main(datasets: list[str] | None = None, n_examples: int = DEFAULT_N_EXAMPLES):
+    results = run_quality_checks(get_dataset_sources(datasets), n_examples=n_examples)
+    failures = [result for result in results if not result.passed]
+    for failure in failures:
+        logger.warning(str(failure))
+    logger.info(f"{len(results) - len(failures)} of {len(results)} checks passed")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = create_parser()
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.logging_level)
+
+    failures = main(args.datasets, n_examples=args.n_examples)
+    sys.exit(1 if failures else 0)
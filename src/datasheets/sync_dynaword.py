@@ -1,16 +1,26 @@
+from __future__ import annotations
+
+import argparse
+import json
 import logging
-import subprocess
+import os
 import shutil
+import subprocess
+import tempfile
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 
-from datasheets.paths import repo_path
-from datasheets.update_descriptive_statistics import (
-    find_latest_dataset_version,
-    main as update_sheets,
-)
+from datasheets.catalog import get_catalog
+from datasheets.fingerprints import FileFingerprint, FingerprintManifest, hash_file
 from datasheets.generate_sheet import add_dataset_to_readme
+from datasheets.paths import datasets_path, repo_path
+from datasheets.update_descriptive_statistics import update_dataset
 
 download_path = repo_path.parent / "tmp"
+hash_cache_path = download_path / "sync_hashes.json"
+
+# the ioctl which clones a file on Linux, see `man ioctl_ficlone`
+FICLONE = 0x40049409
 
 logger = logging.getLogger(__name__)
 
@@ -40,10 +50,164 @@ def download_repo(
     return dynaword_path
 
 
-def copy_parquet_files(input_folder: Path, output_folder: Path):
+@dataclass
+class HashCache:
+    """
+    Content hashes of files, such that a file is only hashed again if its size or
+    modification time changed.
+
+    Attributes:
+        files: The fingerprints by the absolute path of the file.
+    """
+
+    files: dict[str, FileFingerprint] = field(default_factory=dict)
+
+    @classmethod
+    def from_disk(cls, path: Path = hash_cache_path) -> HashCache:
+        if not path.exists():
+            return cls()
+        with path.open("r") as f:
+            data = json.load(f)
+        return cls(files={k: FileFingerprint(**v) for k, v in data["files"].items()})
+
+    def to_disk(self, path: Path = hash_cache_path) -> None:
+        """Writes the cache atomically, see `FingerprintManifest.to_disk`."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", dir=path.parent, prefix=f".{path.name}.", delete=False
+        ) as f:
+            json.dump(asdict(self), f, indent=2, sort_keys=True)
+        os.replace(f.name, path)
+
+    def content_hash(self, path: Path) -> str:
+        key = str(path.absolute())
+        fingerprint = self.files.get(key)
+        if fingerprint is None or not fingerprint.matches_stat(path):
+            stat = path.stat()
+            fingerprint = FileFingerprint(
+                name=key,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+                content_hash=hash_file(path),
+            )
+            self.files[key] = fingerprint
+        return fingerprint.content_hash
+
+    def record(self, path: Path, content_hash: str) -> None:
+        """Records the hash of a file whose content is known, e.g. a fresh copy."""
+        stat = path.stat()
+        key = str(path.absolute())
+        self.files[key] = FileFingerprint(
+            name=key,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            content_hash=content_hash,
+        )
+
+
+def files_match(source: Path, destination: Path, hashes: HashCache) -> bool:
+    """Whether the destination exists with the same size and content as the source.
+    The contents are only hashed if the sizes match."""
+    if not destination.exists():
+        return False
+    if source.stat().st_size != destination.stat().st_size:
+        return False
+    return hashes.content_hash(source) == hashes.content_hash(destination)
+
+
+def _reflink(source: Path, destination: Path) -> bool:
+    """Clones the file using a copy-on-write reflink, if the file system supports it
+    (e.g. Btrfs and XFS on Linux)."""
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with source.open("rb") as src, destination.open("wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    except OSError:
+        destination.unlink(missing_ok=True)
+        return False
+    return True
+
+
+def _hardlink(source: Path, destination: Path) -> bool:
+    try:
+        os.link(source, destination)
+    except OSError:
+        return False
+    return True
+
+
+def atomic_copy(source: Path, destination: Path, allow_hardlink: bool = False) -> str:
+    """
+    Copies a file atomically: it is written to a temporary file next to the
+    destination, which is then renamed to the destination. Readers thereby never see a
+    partially written file.
+
+    Args:
+        source: The file to copy.
+        destination: The path to copy it to.
+        allow_hardlink: Whether to hardlink the file when it can't be reflinked,
+            rather than copying it. A hardlinked destination shares its content with
+            the source, such that modifying or truncating one in place modifies the
+            other, so this is off by default.
+
+    Returns:
+        How the file was copied: "reflink", "hardlink" or "copy".
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=destination.parent, prefix=f".{destination.name}.", suffix=".tmp"
+    )
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    try:
+        if _reflink(source, tmp_path):
+            method = "reflink"
+        else:
+            tmp_path.unlink(missing_ok=True)
+            if allow_hardlink and _hardlink(source, tmp_path):
+                method = "hardlink"
+            else:
+                shutil.copyfile(source, tmp_path)
+                method = "copy"
+        os.replace(tmp_path, destination)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return method
+
+
+def copy_parquet_files(
+    input_folder: Path,
+    output_folder: Path,
+    hashes: HashCache | None = None,
+    allow_hardlink: bool = False,
+) -> list[str]:
+    """
+    Copies the Parquet file of each dataset to its latest version in the output folder,
+    skipping files whose size and content hash are unchanged.
+
+    Args:
+        input_folder: The data folder of dynaword, with a folder per dataset.
+        output_folder: The datasets folder, see `datasheets.catalog`.
+        hashes: The cached content hashes. If None they are read from and written to
+            disk.
+        allow_hardlink: See `atomic_copy`.
+
+    Returns:
+        The names of the datasets whose files were copied.
+    """
+    save_hashes = hashes is None
+    if hashes is None:
+        hashes = HashCache.from_disk()
+    catalog = get_catalog(output_folder)
+
     file_ext = ".parquet"
     logger.info(f"Copying {file_ext} from {input_folder} to {output_folder}")
-    for dir in input_folder.iterdir():
+    changed = []
+    for dir in sorted(input_folder.iterdir()):
         if not dir.is_dir():
             logger.warning(f"Found a file in dynaword/data: {dir}")
             continue
@@ -53,30 +217,37 @@ def copy_parquet_files(input_folder: Path, output_folder: Path):
         if dataset_name == "lexdk":
             continue  # LexDK have been taken down, but datasheet is still available in dynaword.
 
-        dataset_version = find_latest_dataset_version(output_folder / dataset_name)
+        catalog_entry = catalog.dataset(dataset_name)
 
-        if not dataset_version:  # TODO: Create the new directory here instead.
+        if catalog_entry is None:
             logger.warning(f"Did not find the {dataset_name} dataset. Creating folder.")
-            (output_folder / dataset_name / "original" / "v1.0.0").mkdir(
-                parents=True, exist_ok=True
-            )
-            dataset_version = output_folder / dataset_name / "original" / "v1.0.0"
+            dataset_version = "v1.0.0"
+        else:
+            dataset_version = Path(catalog_entry.version_path).name
 
-        dataset_version = dataset_version.name
-        logger.info(f"Moving from {dir / (dataset_name + file_ext)}")
-        logger.info(
-            f"Moving to: {output_folder / dataset_name / 'original' / dataset_version / (dataset_name + file_ext)}"
-        )
-        shutil.copy(
-            dir / (dataset_name + file_ext),
-            (
-                output_folder
-                / dataset_name
-                / "original"
-                / dataset_version
-                / (dataset_name + file_ext)
-            ),
+        source = dir / (dataset_name + file_ext)
+        destination = (
+            output_folder
+            / dataset_name
+            / "original"
+            / dataset_version
+            / (dataset_name + file_ext)
         )
+        if files_match(source, destination, hashes):
+            logger.info(f"{destination} is up to date, skipping.")
+            continue
+
+        logger.info(f"Moving from {source}")
+        logger.info(f"Moving to: {destination}")
+        method = atomic_copy(source, destination, allow_hardlink=allow_hardlink)
+        logger.info(f"Copied {dataset_name} ({method})")
+        # such that the copy is not hashed again in the next sync
+        hashes.record(destination, hashes.content_hash(source))
+        changed.append(dataset_name)
+
+    if save_hashes:
+        hashes.to_disk()
+    return changed
 
 
 def copy_markdown_files(input_folder: Path, output_folder: Path):
@@ -111,22 +282,47 @@ def copy_markdown_files(input_folder: Path, output_folder: Path):
         logger.info(f"Moving to: {destination}")
 
 
-def main():
+def create_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Sync the datasets and datasheets of dynaword.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--allow_hardlink",
+        type=bool,
+        default=False,
+        action=argparse.BooleanOptionalAction,
+        help="Hardlink the Parquet files from the dynaword checkout when they can't be reflinked, instead of copying them. The files then share their content with the checkout, such that modifying either in place modifies both.",
+    )
+    return parser
+
+
+def main(allow_hardlink: bool = False):
     # Sync / Download dynaword
     dynaword_path = download_repo()
 
     # Iterate over data folder
     ## Copy parquet to data/dataset/{dataset_name}/original/{newest version}
-    copy_parquet_files(dynaword_path / "data", repo_path.parent / "datasets")
+    changed = copy_parquet_files(
+        dynaword_path / "data", datasets_path, allow_hardlink=allow_hardlink
+    )
     ## Copy datasheet to data/datasheets/data/{dataset_name}/
     copy_markdown_files(dynaword_path / "data", repo_path / "data")
 
-    # Update main sheet with new findings
-    update_sheets("default", force=True)
-    pass
+    # Update the stats of the changed datasets, followed by the main sheet, which is
+    # only updated if any of the datasheets or stats changed
+    logger.info(f"Updating the descriptive statistics of: {changed}")
+    fingerprints = FingerprintManifest.from_disk()
+    for dataset_name in [*changed, "default"]:
+        update_dataset(dataset_name, fingerprints=fingerprints)
+        fingerprints.to_disk()
+    get_catalog(datasets_path).save(changed)
 
 
 if __name__ == "__main__":
+    parser = create_parser()
+    args = parser.parse_args()
+
     log_path = repo_path / "dynaword_sync.log"
     logging.basicConfig(
         level=logging.INFO,
@@ -136,4 +332,4 @@ if __name__ == "__main__":
             logging.FileHandler(log_path),
         ],
     )
-    main()
+    main(allow_hardlink=args.allow_hardlink)
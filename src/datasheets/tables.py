@@ -3,16 +3,13 @@ from typing import Literal
 
 import pandas as pd
 
-from datasheets.datasheet import DataSheet, convert_to_human_readable
+from datasheets.datasheet import (
+    DataSheet,
+    convert_to_human_readable,
+    get_dataset_names,
+)
 from datasheets.paths import repo_path
 
-main_sheet = DataSheet.load_from_path(repo_path / "README.md")
-_datasets = [
-    cfg["config_name"]  # type: ignore
-    for cfg in main_sheet.frontmatter["configs"]  # type: ignore
-    if cfg["config_name"] != "default"  # type: ignore
-]
-
 DEFAULT_LICENSE_REFERENCES = """[CC-0]: https://creativecommons.org/publicdomain/zero/1.0/legalcode.en
 [CC-BY-SA 4.0]: https://creativecommons.org/licenses/by-sa/4.0/deed.en
 [Apache 2.0]: https://www.apache.org/licenses/LICENSE-2.0
@@ -21,11 +18,11 @@ DEFAULT_LICENSE_REFERENCES = """[CC-0]: https://creativecommons.org/publicdomain
 
 def create_license_references() -> str:
     license_references = DEFAULT_LICENSE_REFERENCES
-    for dataset in _datasets:
+    for dataset in get_dataset_names():
         dataset_path = repo_path / "data" / dataset
         readme_path = dataset_path / f"{dataset_path.name}.md"
 
-        sheet = DataSheet.load_from_path(readme_path)
+        sheet = DataSheet.load_cached(readme_path)
 
         if sheet.license == "other":
             license_name = sheet.frontmatter["license_name"]
@@ -37,7 +34,7 @@ def create_license_references() -> str:
 def create_dataset_readme_references():
     readme_references = ""
 
-    for dataset in _datasets:
+    for dataset in get_dataset_names():
         dataset_path = repo_path / "data" / dataset
 
         readme_references += (
@@ -61,11 +58,11 @@ def create_overview_table(
         "License": [],
     }
 
-    for dataset in _datasets:
+    for dataset in get_dataset_names():
         dataset_path = repo_path / "data" / dataset
         readme_path = dataset_path / f"{dataset_path.name}.md"
 
-        sheet = DataSheet.load_from_path(readme_path)
+        sheet = DataSheet.load_cached(readme_path)
         desc_stats = sheet.get_descritive_stats()
         main_domain = sheet.domains[0] if sheet.domains else ""
 
@@ -157,11 +154,11 @@ def create_grouped_table(
         "N. Tokens": [],
     }
 
-    for dataset in _datasets:
+    for dataset in get_dataset_names():
         dataset_path = repo_path / "data" / dataset
         readme_path = dataset_path / f"{dataset_path.name}.md"
 
-        sheet = DataSheet.load_from_path(readme_path)
+        sheet = DataSheet.load_cached(readme_path)
         desc_stats = sheet.get_descritive_stats()
         feature = _get_feature_by_string(sheet, group)
 
@@ -0,0 +1,183 @@
+"""
+A persistent cache of token counts, such that reprocessing a mostly unchanged dataset
+only requires tokenizing the new or changed documents.
+
+Example use:
+
+    with TokenCountCache(Path("token_counts.sqlite"), tokenizer_id="model@revision") as cache:
+        token_counts = cache.count(texts, count_fn=tokenize_texts)
+    print(cache.stats)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Self
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 100_000_000
+# SQLite limits the number of variables in a single statement
+_MAX_VARIABLES = 900
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups > 0 else 0.0
+
+    def __add__(self, other: CacheStats) -> CacheStats:
+        if not isinstance(other, CacheStats):
+            raise TypeError("Can only add CacheStats objects")
+        return CacheStats(
+            hits=self.hits + other.hits, misses=self.misses + other.misses
+        )
+
+    def __str__(self) -> str:
+        return f"{self.hits:,} hits, {self.misses:,} misses (hit rate: {self.hit_rate:.1%})"
+
+
+class TokenCountCache:
+    """
+    An on-disk (SQLite) cache mapping the content hash of a text to its token count.
+
+    The hash includes the tokenizer identity (e.g. the model name and its revision),
+    such that counts from different tokenizers never collide. When the cache grows
+    beyond `max_entries` the least recently used entries are evicted on `close`.
+
+    Args:
+        path: Path to the SQLite file. It is created if it does not exist.
+        tokenizer_id: Identifies the tokenizer, e.g. "{model_name}@{revision}".
+        max_entries: The maximum number of entries to keep. None disables eviction.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        tokenizer_id: str,
+        max_entries: int | None = DEFAULT_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.tokenizer_id = tokenizer_id
+        self.max_entries = max_entries
+        self.stats = CacheStats()
+
+        # a long timeout, as multiple worker processes might write at the same time
+        self._connection = sqlite3.connect(path, timeout=300)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS token_counts ("
+            "key BLOB PRIMARY KEY, token_count INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS token_counts_last_used ON token_counts (last_used)"
+        )
+        self._connection.commit()
+
+    def key(self, text: str) -> bytes:
+        hasher = hashlib.blake2b(self.tokenizer_id.encode(), digest_size=16)
+        hasher.update(b"\0")
+        hasher.update(text.encode("utf-8", errors="surrogatepass"))
+        return hasher.digest()
+
+    def get_many(self, keys: Sequence[bytes]) -> dict[bytes, int]:
+        """Looks up the token counts of the keys and marks the found keys as used."""
+        found: dict[bytes, int] = {}
+        now = time.time()
+        for i in range(0, len(keys), _MAX_VARIABLES):
+            batch = keys[i : i + _MAX_VARIABLES]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._connection.execute(
+                f"SELECT key, token_count FROM token_counts WHERE key IN ({placeholders})",
+                batch,
+            ).fetchall()
+            found.update(rows)
+            self._connection.execute(
+                f"UPDATE token_counts SET last_used = ? WHERE key IN ({placeholders})",
+                [now, *batch],
+            )
+        self._connection.commit()
+        return found
+
+    def put_many(self, items: Sequence[tuple[bytes, int]]) -> None:
+        now = time.time()
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO token_counts (key, token_count, last_used) VALUES (?, ?, ?)",
+            [(key, token_count, now) for key, token_count in items],
+        )
+        self._connection.commit()
+
+    def count(
+        self, texts: Sequence[str], count_fn: Callable[[list[str]], list[int]]
+    ) -> list[int]:
+        """
+        Returns the token count of each text. Only the texts which are not in the cache
+        are passed to `count_fn`, after which their counts are added to the cache.
+        """
+        keys = [self.key(str(text)) for text in texts]
+        cached = self.get_many(keys)
+
+        missing = {}  # unique missing keys, and the index of their first text
+        for i, key in enumerate(keys):
+            if key not in cached and key not in missing:
+                missing[key] = i
+
+        self.stats.hits += len(texts) - len(missing)
+        self.stats.misses += len(missing)
+
+        if missing:
+            new_counts = count_fn([texts[i] for i in missing.values()])
+            new_items = list(zip(missing.keys(), new_counts))
+            self.put_many(new_items)
+            cached.update(new_items)
+
+        return [cached[key] for key in keys]
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM token_counts").fetchone()[
+            0
+        ]
+
+    def evict(self) -> int:
+        """Removes the least recently used entries beyond `max_entries`.
+
+        Returns:
+            The number of removed entries.
+        """
+        if self.max_entries is None:
+            return 0
+        n_excess = len(self) - self.max_entries
+        if n_excess <= 0:
+            return 0
+        self._connection.execute(
+            "DELETE FROM token_counts WHERE key IN "
+            "(SELECT key FROM token_counts ORDER BY last_used ASC LIMIT ?)",
+            (n_excess,),
+        )
+        self._connection.commit()
+        logger.info(f"Evicted {n_excess} entries from the token count cache.")
+        return n_excess
+
+    def close(self) -> None:
+        self.evict()
+        self._connection.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -9,16 +9,23 @@ Example use:
 
 import argparse
 import logging
+import multiprocessing
+import os
+import sys
+from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from pathlib import Path
-import re
-from typing import cast
-from packaging.version import Version, InvalidVersion
 
-import plotly.express as px
-from datasets import Dataset, load_dataset
-
-from datasheets.datasheet import DataSheet
+from datasheets.catalog import get_catalog
+from datasheets.datasheet import (
+    DEFAULT_PLOT_DPI,
+    DEFAULT_PLOT_FORMATS,
+    DataSheet,
+    get_dataset_names,
+)
+from datasheets.dataset_versions import find_latest_dataset_version  # noqa: F401 (re-exported)
 from datasheets.descriptive_stats import DescriptiveStatsOverview
+from datasheets.fingerprints import FileFingerprint, FingerprintManifest
 from datasheets.paths import repo_path
 from datasheets.tables import (
     create_overview_table,
@@ -26,100 +33,11 @@ from datasheets.tables import (
     create_grouped_table_str,
 )
 
-main_sheet = DataSheet.load_from_path(repo_path / "README.md")
-_datasets = [
-    cfg["config_name"]  # type: ignore
-    for cfg in main_sheet.frontmatter["configs"]  # type: ignore
-    if cfg["config_name"] != "default"  # type: ignore
-]
-
 
 logger = logging.getLogger(__name__)
-# Define dataset type priorities (lower number = higher priority)
-DATASET_TYPE_PRIORITY = {
-    "processed": 1,
-    "dedup": 2,
-    "original": 3,
-}
-
-
-def find_latest_dataset_version(dataset_parent_path: Path) -> Path | None:
-    """
-    Finds the path to the latest dataset version based on dataset type priority and semantic version.
-
-    Args:
-        dataset_parent_path: A Path object pointing to the dataset directory (e.g., ".../datasets/mydataset")
-
-    Returns:
-        A Path object to the directory of the latest versioned dataset,
-        e.g., Path(".../datasets/mydataset/processed/v2.0.0"),
-        or None if nothing valid is found.
-    """
-    if not dataset_parent_path.is_dir():
-        logger.warning(
-            f"Provided path is not a directory or does not exist: {dataset_parent_path}"
-        )
-        return None
-
-    version_folder_pattern = re.compile(r"^v(.+)$")
-
-    candidates: list[tuple[int, Version, Path]] = []
-
-    for dataset_type_dir in dataset_parent_path.iterdir():
-        if not dataset_type_dir.is_dir():
-            continue
-
-        dataset_type = dataset_type_dir.name
-        if dataset_type not in DATASET_TYPE_PRIORITY:
-            logger.debug(f"Skipping unknown dataset type directory: {dataset_type_dir}")
-            continue
-
-        for version_dir in dataset_type_dir.iterdir():
-            if not version_dir.is_dir():
-                continue
-
-            match = version_folder_pattern.match(version_dir.name)
-            if not match:
-                logger.debug(f"Skipping non-versioned directory: {version_dir}")
-                continue
-
-            version_str = match.group(1)
-
-            try:
-                parsed_version = Version(version_str)
-                candidates.append(
-                    (
-                        DATASET_TYPE_PRIORITY[
-                            dataset_type
-                        ],  # priority (lower is better)
-                        parsed_version,  # parsed Version
-                        version_dir,  # full path
-                    )
-                )
-            except InvalidVersion:
-                logger.debug(
-                    f"Skipping invalid version string in folder name: {version_dir.name}"
-                )
-
-    if not candidates:
-        logger.info(
-            f"No valid versioned dataset directories found in: {dataset_parent_path}"
-        )
-        return None
-
-    # Sort by dataset type priority first (lowest = highest priority), then by version (highest version last)
-    best_candidate = max(
-        candidates,
-        key=lambda x: (-x[0], x[1]),  # dataset type priority ASC, version DESC
-    )
-
-    _, best_version, best_path = best_candidate
-
-    logger.info(
-        f"Found latest dataset: '{best_path.parent.name}/{best_path.name}' "
-        f"(type priority {best_candidate[0]}, version {best_version})"
-    )
-    return best_path
+# a rough estimate of the memory used by a job on top of the size of its dataset, e.g.
+# for the imported libraries and rendering the plots
+JOB_MEMORY_OVERHEAD = 1024**3
 
 
 def create_domain_distribution_plot(
@@ -128,6 +46,8 @@ def create_domain_distribution_plot(
     df = create_overview_table(
         add_readable_tokens=False, add_total_row=False, add_readme_references=False
     )
+    import plotly.express as px
+
     fig = px.sunburst(df, path=["Domain", "Source"], values="N. Tokens")
 
     fig.update_traces(textinfo="label+percent entry")
@@ -147,7 +67,29 @@ def create_domain_distribution_plot(
 def update_dataset(
     dataset_name: str,
     force: bool = False,
-) -> None:
+    fingerprints: FingerprintManifest | None = None,
+    plot_dpi: int = DEFAULT_PLOT_DPI,
+    plot_formats: Sequence[str] = DEFAULT_PLOT_FORMATS,
+) -> bool:
+    """
+    Updates the descriptive statistics and the datasheet of a dataset, if its input
+    files have changed since the statistics were last computed.
+
+    Args:
+        dataset_name: The name of the dataset, or "default" for the main datasheet.
+        force: Recompute the statistics even if the input files are unchanged.
+        fingerprints: The recorded fingerprints of the input files, which are updated
+            in place. If None they are read from and written to disk.
+        plot_dpi: The resolution of the dataset plots.
+        plot_formats: The file formats to save the dataset plots in.
+
+    Returns:
+        Whether the dataset was updated.
+    """
+    save_fingerprints = fingerprints is None
+    if fingerprints is None:
+        fingerprints = FingerprintManifest.from_disk()
+
     dataset_path = (
         repo_path / "data" / dataset_name if dataset_name != "default" else repo_path
     )
@@ -160,40 +102,58 @@ def update_dataset(
     desc_stats_path = dataset_path / "descriptive_stats.json"
     markdown_path = dataset_path / readme_name
 
-    if desc_stats_path.exists() and force is False:
+    if dataset_name != "default":
+        catalog = get_catalog()
+        catalog_entry = catalog.dataset(dataset_name)
+
+        if catalog_entry is None:
+            logger.error(f"Something went wrong in finding the {dataset_name} dataset.")
+            return False
+
+        latest_version_dataset_path = catalog.root / catalog_entry.version_path
+        parquet_files = [
+            latest_version_dataset_path / f.name for f in catalog_entry.files
+        ]
+        current = fingerprints.fingerprint(
+            dataset_name, parquet_files, root=latest_version_dataset_path
+        )
+    else:
+        # the main datasheet is derived from the datasheets and stats of the datasets
+        data_path = repo_path / "data"
+        desc_paths = sorted(data_path.glob("**/*descriptive_stats.json"))
+        current = fingerprints.fingerprint(
+            dataset_name,
+            desc_paths + sorted(data_path.glob("*/*.md")),
+            root=data_path,
+        )
+
+    if (
+        desc_stats_path.exists()
+        and force is False
+        and not fingerprints.has_changed(dataset_name, current)
+    ):
         logger.info(
-            f"descriptive statistics for '{dataset_name}' is already exists (``{desc_stats_path}``), skipping."
+            f"The input files of '{dataset_name}' are unchanged since the descriptive statistics were computed (``{desc_stats_path}``), skipping."
         )
-        return
+        # keeps the modification times up to date, such that the files are not rehashed
+        fingerprints.record(dataset_name, current)
+        if save_fingerprints:
+            fingerprints.to_disk()
+        return False
 
     logger.info(f"Updating datasheet for: {dataset_name}")
-    sheet = DataSheet.load_from_path(markdown_path)
+    sheet = DataSheet.load_cached(markdown_path)
 
     if dataset_name != "default":
-        load_kwargs: dict[str, str | list[str]] = {"path": "parquet", "split": "train"}
-        dataset_data_path = repo_path.parent / "datasets" / dataset_name
-
-        latest_version_dataset_path = find_latest_dataset_version(dataset_data_path)
-
-        if not latest_version_dataset_path:
-            logger.error(f"Something went wrong in finding the {dataset_name} dataset.")
-            return
-
-        load_kwargs["path"] = str(latest_version_dataset_path)
-
         logger.info(
             f"Computing descriptive stats for: {dataset_name} from {latest_version_dataset_path}"
         )
-        ds = load_dataset(
-            **load_kwargs,  # type: ignore
-            columns=["id", "text", "token_count", "source"],
+        desc_stats = DescriptiveStatsOverview.from_parquet(parquet_files)
+        sheet.body = sheet.add_dataset_plots(
+            parquet_files, create_plot=True, dpi=plot_dpi, formats=plot_formats
         )
-        ds = cast(Dataset, ds)
-        desc_stats = DescriptiveStatsOverview.from_dataset(ds)
-        sheet.body = sheet.add_dataset_plots(ds, create_plot=True)
     else:
         # compute descriptive stats from existing files
-        desc_paths = (repo_path / "data").glob("**/*descriptive_stats.json")
         _desc_stats = [DescriptiveStatsOverview.from_disk(p) for p in desc_paths]
         desc_stats = sum(_desc_stats[1:], start=_desc_stats[0])
     desc_stats.to_disk(desc_stats_path)
@@ -203,17 +163,160 @@ def update_dataset(
     if dataset_name == "default":
         logger.info("Updating Overview table")
         overview_table = create_overview_table_str()
-        sheet.body = sheet.replace_tag(package=overview_table, tag="MAIN TABLE")
         logger.info("Updating domain table")
         domain_table = create_grouped_table_str(group="Domain")
-        sheet.body = sheet.replace_tag(package=domain_table, tag="DOMAIN TABLE")
         logger.info("Updating license table")
-        domain_table = create_grouped_table_str(group="License")
-        sheet.body = sheet.replace_tag(package=domain_table, tag="LICENSE TABLE")
+        license_table = create_grouped_table_str(group="License")
+        sheet.body = sheet.replace_tags(
+            {
+                "MAIN TABLE": overview_table,
+                "DOMAIN TABLE": domain_table,
+                "LICENSE TABLE": license_table,
+            }
+        )
         create_domain_distribution_plot()
 
     sheet.write_to_path()
 
+    fingerprints.record(dataset_name, current)
+    if save_fingerprints:
+        fingerprints.to_disk()
+    return True
+
+
+class DatasetUpdateError(Exception):
+    """A dataset failed to update in a worker process. Any other exception raised by a
+    job, such as a broken pool or a job which could not be pickled, is not specific to
+    the dataset and stops the update."""
+
+
+def _initialize_worker(logging_level: int) -> None:
+    logging.basicConfig(level=logging_level)
+
+
+def _update_dataset_in_worker(
+    dataset_name: str,
+    force: bool,
+    fingerprints: list[FileFingerprint] | None,
+    plot_dpi: int,
+    plot_formats: Sequence[str],
+) -> tuple[bool, list[FileFingerprint] | None]:
+    """Updates a dataset in a worker process. As the worker cannot update the manifest
+    of the main process, the new fingerprints of the dataset are returned instead."""
+    manifest = FingerprintManifest()
+    if fingerprints is not None:
+        manifest.record(dataset_name, fingerprints)
+    try:
+        updated = update_dataset(
+            dataset_name,
+            force=force,
+            fingerprints=manifest,
+            plot_dpi=plot_dpi,
+            plot_formats=plot_formats,
+        )
+    except Exception as e:
+        # the message is kept as a string, as the exception might not be picklable
+        raise DatasetUpdateError(f"{type(e).__name__}: {e}") from e
+    return updated, manifest.datasets.get(dataset_name)
+
+
+def available_memory() -> int | None:
+    """The memory available for new processes in bytes, or None if it is unknown."""
+    meminfo = Path("/proc/meminfo")
+    if meminfo.exists():
+        for line in meminfo.read_text().splitlines():
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1]) * 1024
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def estimate_memory_usage(dataset_name: str) -> int:
+    """A rough upper bound on the memory used to update a dataset, based on the size
+    of its Parquet files."""
+    catalog_entry = get_catalog().dataset(dataset_name)
+    if catalog_entry is None:
+        return JOB_MEMORY_OVERHEAD
+    return JOB_MEMORY_OVERHEAD + catalog_entry.size
+
+
+def update_datasets_in_parallel(
+    dataset_names: list[str],
+    fingerprints: FingerprintManifest,
+    force: bool = False,
+    jobs: int = 1,
+    memory_budget: int | None = None,
+    logging_level: int = 20,
+    plot_dpi: int = DEFAULT_PLOT_DPI,
+    plot_formats: Sequence[str] = DEFAULT_PLOT_FORMATS,
+) -> dict[str, BaseException]:
+    """
+    Updates the datasets in a pool of worker processes. A dataset is only started if
+    the estimated memory usage of the running jobs stays within the budget, though a
+    single job is always allowed to run.
+
+    Args:
+        dataset_names: The datasets to update.
+        fingerprints: The recorded fingerprints, which are updated as the jobs finish.
+        force: Recompute the statistics even if the input files are unchanged.
+        jobs: The maximum number of datasets updated at the same time.
+        memory_budget: The memory in bytes which the jobs may use. None for no limit.
+        logging_level: The logging level of the worker processes.
+        plot_dpi: The resolution of the dataset plots.
+        plot_formats: The file formats to save the dataset plots in.
+
+    Returns:
+        The datasets which failed to update and their exceptions.
+    """
+    estimates = {name: estimate_memory_usage(name) for name in dataset_names}
+    pending = list(dataset_names)
+    running: dict[Future, str] = {}
+    failures: dict[str, BaseException] = {}
+
+    def fits_in_memory(dataset_name: str) -> bool:
+        if memory_budget is None or not running:
+            return True
+        in_use = sum(estimates[name] for name in running.values())
+        return in_use + estimates[dataset_name] <= memory_budget
+
+    # spawned rather than forked, as the plotting libraries are not fork safe
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_initialize_worker,
+        initargs=(logging_level,),
+    ) as executor:
+        while pending or running:
+            while pending and len(running) < jobs and fits_in_memory(pending[0]):
+                dataset_name = pending.pop(0)
+                future = executor.submit(
+                    _update_dataset_in_worker,
+                    dataset_name,
+                    force,
+                    fingerprints.datasets.get(dataset_name),
+                    plot_dpi,
+                    plot_formats,
+                )
+                running[future] = dataset_name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                dataset_name = running.pop(future)
+                try:
+                    _, new_fingerprints = future.result()
+                except DatasetUpdateError as e:
+                    # includes the traceback of the worker
+                    logger.exception(f"Failed to update '{dataset_name}'")
+                    failures[dataset_name] = e
+                    continue
+                if new_fingerprints is not None:
+                    fingerprints.record(dataset_name, new_fingerprints)
+                    # saved after each dataset, such that a failed run can be resumed
+                    fingerprints.to_disk()
+    return failures
+
 
 def create_parser():
     parser = argparse.ArgumentParser(
@@ -236,7 +339,31 @@ def create_parser():
         type=bool,
         default=False,
         action=argparse.BooleanOptionalAction,
-        help="Should the statistics be forcefully recomputed. By default it checks the difference in commit ids.",
+        help="Should the statistics be forcefully recomputed. By default they are only recomputed if the input files have changed since they were last computed.",
+    )
+    parser.add_argument(
+        "--jobs",
+        default=1,
+        type=int,
+        help="The number of datasets to update in parallel, each in its own process. The main datasheet is updated after all datasets have finished.",
+    )
+    parser.add_argument(
+        "--max_memory_gb",
+        default=None,
+        type=float,
+        help="The memory which the parallel jobs may use in total. Defaults to 80%% of the currently available memory.",
+    )
+    parser.add_argument(
+        "--plot_dpi",
+        default=DEFAULT_PLOT_DPI,
+        type=int,
+        help="The resolution of the dataset plots.",
+    )
+    parser.add_argument(
+        "--plot_formats",
+        nargs="+",
+        default=list(DEFAULT_PLOT_FORMATS),
+        help="The file formats to save the dataset plots in, e.g. png and svg. The datasheets show the png.",
     )
     return parser
 
@@ -245,23 +372,92 @@ def main(
     dataset: str | None = None,
     logging_level: int = 20,
     force: bool = False,
-) -> None:
+    jobs: int = 1,
+    max_memory_gb: float | None = None,
+    plot_dpi: int = DEFAULT_PLOT_DPI,
+    plot_formats: Sequence[str] = DEFAULT_PLOT_FORMATS,
+) -> dict[str, BaseException]:
+    """
+    Updates the descriptive statistics of a single dataset, or of all datasets followed
+    by the main datasheet.
+
+    Returns:
+        The datasets which failed to update and their exceptions. A failing dataset
+        does not stop the remaining datasets from being updated.
+    """
     logging.basicConfig(level=logging_level)
 
+    fingerprints = FingerprintManifest.from_disk()
     if dataset:
-        update_dataset(dataset, force=force)
+        update_dataset(
+            dataset,
+            force=force,
+            fingerprints=fingerprints,
+            plot_dpi=plot_dpi,
+            plot_formats=plot_formats,
+        )
+        fingerprints.to_disk()
+        get_catalog().save([dataset])
+        return {}
+
+    failures: dict[str, BaseException] = {}
+    if jobs > 1:
+        if max_memory_gb is not None:
+            memory_budget = int(max_memory_gb * 1024**3)
+        else:
+            available = available_memory()
+            memory_budget = int(available * 0.8) if available is not None else None
+        failures = update_datasets_in_parallel(
+            get_dataset_names(),
+            fingerprints,
+            force=force,
+            jobs=jobs,
+            memory_budget=memory_budget,
+            logging_level=logging_level,
+            plot_dpi=plot_dpi,
+            plot_formats=plot_formats,
+        )
     else:
-        for dataset_name in _datasets:
-            update_dataset(dataset_name, force=force)
-        update_dataset("default", force=force)
+        for dataset_name in get_dataset_names():
+            try:
+                update_dataset(
+                    dataset_name,
+                    force=force,
+                    fingerprints=fingerprints,
+                    plot_dpi=plot_dpi,
+                    plot_formats=plot_formats,
+                )
+            except Exception as e:
+                logger.exception(f"Failed to update '{dataset_name}'")
+                failures[dataset_name] = e
+                continue
+            # saved after each dataset, such that an interrupted run can be resumed
+            fingerprints.to_disk()
+
+    # only recomputed if the datasheets or stats of any of the datasets changed
+    update_dataset("default", force=force, fingerprints=fingerprints)
+    fingerprints.to_disk()
+    # the entries looked up by this process, the workers do not write the catalogue
+    get_catalog().save(get_dataset_names())
+
+    if failures:
+        summary = "\n".join(f"  - {name}: {e!r}" for name, e in failures.items())
+        logger.error(f"Failed to update {len(failures)} dataset(s):\n{summary}")
+    return failures
 
 
 if __name__ == "__main__":
     parser = create_parser()
     args = parser.parse_args()
 
-    main(
+    failures = main(
         args.dataset,
         logging_level=args.logging_level,
         force=args.force,
+        jobs=args.jobs,
+        max_memory_gb=args.max_memory_gb,
+        plot_dpi=args.plot_dpi,
+        plot_formats=args.plot_formats,
     )
+    if failures:
+        sys.exit(1)
@@ -1,42 +1,38 @@
+from functools import cache
 from pathlib import Path
 
-from datasheets.datasheet import DataSheet
-from datasheets.update_descriptive_statistics import find_latest_dataset_version
+import pyarrow as pa
+import pyarrow.dataset as pds
+import pyarrow.parquet as pq
+
+from datasheets.dataset_access import dataset_files, open_dataset
+from datasheets.datasheet import get_dataset_names
+from datasheets.quality import CheckResult, check_source
 
 root_path = Path(__file__).parent.parent.parent
 main_readme = root_path / "README.md"
 
-main_sheet = DataSheet.load_from_path(main_readme)
-
-DATASET_NAMES = [
-    cfg["config_name"]
-    for cfg in main_sheet.frontmatter["configs"]
-    if cfg["config_name"] != "default"
-]
+# needed at collection time to parametrize the tests over the datasets
+DATASET_NAMES = get_dataset_names(main_readme)
 
 
-def get_dataset_path(dataset_name: str) -> Path:
-    dataset_data_path = root_path.parent / "datasets" / dataset_name
-    latest_version_dataset_path = find_latest_dataset_version(dataset_data_path)
+def write_parquet(path: Path, row_group_size: int | None = None, **columns) -> Path:
+    """Writes the columns to a Parquet file for the tests, creating its folder."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(pa.table(columns), path, row_group_size=row_group_size)
+    return path
 
-    assert latest_version_dataset_path, (
-        f"Something went wrong with the {dataset_name} dataset"
-    )
 
-    return latest_version_dataset_path
+@cache
+def get_quality_results(dataset_name: str) -> dict[str, CheckResult]:
+    """Runs all quality checks on a dataset at once, such that each dataset is only
+    scanned once across the quality tests."""
+    return check_source(dataset_files(dataset_name), source=dataset_name)
 
 
-def get_all_datasets() -> dict:
-    load_kwargs = {
-        "path": "parquet",
-        "split": "train",
-        "columns": ["id", "text", "token_count", "source"],
-    }
-    dataset_paths = []
-    for dataset in DATASET_NAMES:
-        dataset_path = get_dataset_path(dataset)
-        files = [str(p) for p in dataset_path.glob("*.parquet")]
-        dataset_paths.extend(files)
-        load_kwargs["data_files"] = dataset_paths
-
-    return load_kwargs
+def get_all_datasets() -> pds.Dataset:
+    """The latest version of all datasets as a single dataset, see
+    `datasheets.dataset_access`."""
+    return open_dataset(
+        [path for dataset in DATASET_NAMES for path in dataset_files(dataset)]
+    )
@@ -0,0 +1,88 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from datasheets import catalog as catalog_module
+from datasheets.catalog import CatalogFile, DatasetCatalog
+
+from .conftest import write_parquet
+
+
+def test_catalog(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    write_parquet(tmp_path / "a" / "original" / "v1.0.0" / "a.parquet", text=["x", "y"])
+    write_parquet(tmp_path / "a" / "original" / "v1.0.0" / "b.parquet", text=["z"])
+
+    catalog = DatasetCatalog(root=tmp_path)
+    dataset = catalog.dataset("a")
+    assert dataset is not None
+    assert dataset.version_path == "a/original/v1.0.0"
+    assert [f.name for f in dataset.files] == ["a.parquet", "b.parquet"]
+    assert dataset.num_rows == 3
+    assert len(dataset.schema_hashes) == 1
+    assert catalog.dataset("missing") is None
+
+    # looking up a dataset does not write to the datasets folder
+    assert list(tmp_path.iterdir()) == [tmp_path / "a"]
+    catalog.save(["a"])
+    assert (
+        json.loads(catalog.path.read_text())["datasets"]["a"]["files"][0]["num_rows"]
+        == 2
+    )
+    catalog = DatasetCatalog.from_disk(tmp_path)
+    assert catalog.datasets["a"] == dataset
+
+    # only new or modified files are read
+    read = []
+    from_path = CatalogFile.from_path
+
+    def read_and_record(path: Path) -> CatalogFile:
+        read.append(path.name)
+        return from_path(path)
+
+    monkeypatch.setattr(
+        catalog_module.CatalogFile, "from_path", staticmethod(read_and_record)
+    )
+    write_parquet(tmp_path / "a" / "original" / "v1.0.0" / "b.parquet", text=["z", "w"])
+    _, changed = catalog.update("a")
+    assert changed
+    assert read == ["b.parquet"]
+    assert catalog.datasets["a"].num_rows == 4
+
+    # a new version replaces the files of the old version
+    write_parquet(tmp_path / "a" / "processed" / "v1.0.0" / "a.parquet", text=["x"])
+    assert catalog.dataset_files("a") == [
+        tmp_path / "a" / "processed" / "v1.0.0" / "a.parquet"
+    ]
+
+
+def test_concurrent_updates_are_merged(tmp_path: Path):
+    write_parquet(tmp_path / "a" / "original" / "v1.0.0" / "a.parquet", text=["x"])
+    write_parquet(tmp_path / "b" / "original" / "v1.0.0" / "b.parquet", text=["y"])
+
+    # e.g. two worker processes which both read the catalogue before either wrote it
+    first, second = DatasetCatalog(root=tmp_path), DatasetCatalog(root=tmp_path)
+    first.dataset("a")
+    second.dataset("b")
+    first.save(["a"])
+    second.save(["b"])
+
+    assert set(DatasetCatalog.from_disk(tmp_path).datasets) == {"a", "b"}
+    assert set(second.datasets) == {"a", "b"}
+
+
+def test_save_to_read_only_folder(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+):
+    write_parquet(tmp_path / "a" / "original" / "v1.0.0" / "a.parquet", text=["x"])
+
+    def read_only(*args, **kwargs):
+        raise PermissionError("Read-only file system")
+
+    monkeypatch.setattr(catalog_module.DatasetCatalog, "_lock", read_only)
+    catalog = DatasetCatalog(root=tmp_path)
+    assert catalog.dataset("a") is not None
+    catalog.save(["a"])
+
+    assert "Could not write the catalogue" in caplog.text
+    assert not catalog.path.exists()
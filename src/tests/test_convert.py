@@ -0,0 +1,220 @@
+import gzip
+import json
+import time
+from pathlib import Path
+
+import polars as pl
+import pyarrow.parquet as pq
+import pytest
+
+from datasheets import convert
+from datasheets.token_cache import TokenCountCache
+
+
+@pytest.fixture(scope="session")
+def word_tokenizer_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """A tokenizer with one token per word, saved such that the worker processes can
+    load it like the real tokenizer."""
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import PreTrainedTokenizerFast
+
+    tokenizer = Tokenizer(models.WordLevel({"[UNK]": 0}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    path = tmp_path_factory.mktemp("word_tokenizer")
+    PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer, unk_token="[UNK]"
+    ).save_pretrained(path)
+    return path
+
+
+@pytest.fixture
+def word_tokenizer(word_tokenizer_dir: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    # the workers are real (spawned) processes, which are given the model name
+    monkeypatch.setattr(convert, "MODEL_NAME", str(word_tokenizer_dir))
+
+
+def write_jsonl_gz(path: Path, texts: list[str]) -> Path:
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for i, text in enumerate(texts):
+            f.write(json.dumps({"id": f"{path.stem}-{i}", "text": text}) + "\n")
+    return path
+
+
+def test_prefetch_keeps_order_and_raises_errors():
+    assert list(convert.prefetch(iter(range(100)), maxsize=2)) == list(range(100))
+
+    def failing():
+        yield 1
+        raise ValueError("broken input")
+
+    items = convert.prefetch(failing(), maxsize=2)
+    assert next(items) == 1
+    with pytest.raises(ValueError, match="broken input"):
+        next(items)
+
+
+@pytest.mark.parametrize("engine", convert.TOKENIZATION_ENGINES)
+def test_run_pipeline_writes_in_input_order(
+    tmp_path: Path, word_tokenizer: None, engine: convert.TOKENIZATION_ENGINE_TYPE
+):
+    texts = [" ".join(["word"] * (i % 4)) for i in range(50)]
+    input_path = write_jsonl_gz(tmp_path / "data.jsonl.gz", texts)
+    written: list[tuple[int, list[str]]] = []
+
+    def slow_write(df: pl.DataFrame, span: convert.BatchSpan) -> int:
+        # the earlier batches take the longest to write
+        time.sleep(0.01 * (10 - span.index % 10))
+        written.append((span.index, df["id"].to_list()))
+        return span.index
+
+    results = convert.run_pipeline(
+        str(input_path),
+        batch_size=3,
+        write=slow_write,
+        num_workers=2,
+        engine=engine,
+        queue_size=1,
+    )
+
+    # the empty texts are dropped, but every batch has some text left
+    assert results == [index for index, _ in written] == list(range(17))
+    ids = [i for _, batch_ids in written for i in batch_ids]
+    assert ids == [f"data.jsonl-{i}" for i, text in enumerate(texts) if text]
+
+
+def test_process_shards_uses_empty_cache(tmp_path: Path, word_tokenizer: None):
+    shards = [
+        write_jsonl_gz(tmp_path / f"part-{i}.jsonl.gz", [f"a text {i}", "b c"])
+        for i in range(2)
+    ]
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+
+    with TokenCountCache(tmp_path / "cache.sqlite", tokenizer_id="words") as cache:
+        assert len(cache) == 0
+        for _ in range(2):
+            convert.process_shards(
+                [str(p) for p in shards],
+                str(output_dir),
+                "data.parquet",
+                batch_size=1,
+                num_workers=1,
+                cache=cache,
+            )
+        # "b c" is shared by the shards, so it is a hit within the first run
+        assert cache.stats.misses == 3
+        assert cache.stats.hits == 1 + 4
+
+
+def test_stream_writer_flushes_full_row_groups(tmp_path: Path):
+    path = tmp_path / "data.parquet"
+    with convert.ParquetStreamWriter(str(path), row_group_size=4) as writer:
+        for start in range(0, 10, 3):
+            writer.write(pl.DataFrame({"id": range(start, min(start + 3, 10))}))
+            # at most a single row group is buffered
+            assert writer._buffered_rows < 4
+        assert not path.exists()
+
+    metadata = pq.read_metadata(path)
+    assert writer.rows_written == 10
+    assert [metadata.row_group(i).num_rows for i in range(3)] == [4, 4, 2]
+    assert pl.read_parquet(path)["id"].to_list() == list(range(10))
+
+
+def test_stream_writer_keeps_existing_file_on_error(tmp_path: Path):
+    path = tmp_path / "data.parquet"
+    pl.DataFrame({"id": [0]}).write_parquet(path)
+
+    with (
+        pytest.raises(RuntimeError),
+        convert.ParquetStreamWriter(str(path), row_group_size=2) as writer,
+    ):
+        writer.write(pl.DataFrame({"id": [1, 2, 3]}))
+        raise RuntimeError("tokenization failed")
+
+    assert pl.read_parquet(path)["id"].to_list() == [0]
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_resumed_run_matches_uninterrupted_run(
+    tmp_path: Path, word_tokenizer: None, monkeypatch: pytest.MonkeyPatch
+):
+    # the second batch only has empty texts, so it has no chunk
+    texts = ["" if 3 <= i < 6 else f"text number {i}" for i in range(20)]
+    input_path = str(write_jsonl_gz(tmp_path / "data.jsonl.gz", texts))
+
+    def convert_to(output_dir: Path, resume: bool = False) -> Path:
+        output_dir.mkdir(exist_ok=True)
+        chunks = convert.process_file_in_chunks(
+            input_path, str(output_dir), batch_size=3, num_workers=1, resume=resume
+        )
+        convert.combine_chunks_and_cleanup(chunks, str(output_dir), "data.parquet")
+        return output_dir / "data.parquet"
+
+    expected = pl.read_parquet(convert_to(tmp_path / "uninterrupted"))
+
+    save_chunk = convert.save_chunk
+
+    def interrupted_save_chunk(df, output_dir, span):
+        if span.index == 3:
+            raise KeyboardInterrupt
+        return save_chunk(df, output_dir, span)
+
+    monkeypatch.setattr(convert, "save_chunk", interrupted_save_chunk)
+    with pytest.raises(KeyboardInterrupt):
+        convert_to(tmp_path / "resumed")
+    manifest = convert.CheckpointManifest.from_disk(
+        str(tmp_path / "resumed" / convert.CHECKPOINT_MANIFEST)
+    )
+    assert [chunk.file_index for chunk in manifest.chunks] == [0, 2]
+
+    resumed_batches: list[int] = []
+
+    def recording_save_chunk(df, output_dir, span):
+        resumed_batches.append(span.index)
+        return save_chunk(df, output_dir, span)
+
+    monkeypatch.setattr(convert, "save_chunk", recording_save_chunk)
+    resumed = pl.read_parquet(convert_to(tmp_path / "resumed", resume=True))
+
+    assert resumed_batches == [3, 4, 5, 6]
+    assert resumed.equals(expected)
+
+
+def test_resolve_input_files(tmp_path: Path):
+    for name in ["part-2.jsonl.gz", "part-10.jsonl.gz", "part-1.jsonl.gz", "x.json"]:
+        (tmp_path / name).touch()
+    expected = [str(tmp_path / f"part-{i}.jsonl.gz") for i in ["1", "10", "2"]]
+
+    assert convert.resolve_input_files(str(tmp_path)) == expected
+    assert convert.resolve_input_files(str(tmp_path / "part-*.jsonl.gz")) == expected
+    assert convert.resolve_input_files(expected[0]) == expected[:1]
+    with pytest.raises(FileNotFoundError):
+        convert.resolve_input_files(str(tmp_path / "missing-*.jsonl.gz"))
+
+
+def test_process_shards_keeps_input_order(tmp_path: Path, word_tokenizer: None):
+    shards = [
+        write_jsonl_gz(tmp_path / f"part-{i}.jsonl.gz", ["some text"] * (i + 1))
+        for i in range(3)
+    ]
+    # a shard without any tokens gives no output
+    shards.insert(1, write_jsonl_gz(tmp_path / "empty.jsonl.gz", [""]))
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+
+    outputs = convert.process_shards(
+        [str(p) for p in shards],
+        str(output_dir),
+        "data.parquet",
+        batch_size=2,
+        num_workers=2,
+    )
+
+    assert [Path(p).name for p in outputs] == [
+        "data-00000-of-00004.parquet",
+        "data-00002-of-00004.parquet",
+        "data-00003-of-00004.parquet",
+    ]
+    ids = pl.read_parquet(outputs)["id"].to_list()
+    assert ids == [f"part-{i}.jsonl-{j}" for i in range(3) for j in range(i + 1)]
@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from pyarrow import feather
+
+from datasheets.dataset_access import iter_batches, open_dataset
+
+TABLE = pa.table(
+    {"id": ["a", "b", "c"], "text": ["x", "y", "z"], "token_count": [1, 2, 3]}
+)
+
+
+@pytest.mark.parametrize("suffix", [".parquet", ".arrow"])
+def test_open_dataset(tmp_path: Path, suffix: str):
+    paths = [tmp_path / f"a{suffix}", tmp_path / f"b{suffix}"]
+    for path, table in zip(paths, [TABLE.slice(0, 2), TABLE.slice(2)]):
+        if suffix == ".parquet":
+            pq.write_table(table, path)
+        else:
+            feather.write_feather(table, path, compression="uncompressed")
+
+    dataset = open_dataset(paths)
+    batches = list(iter_batches(dataset, columns=["token_count"], batch_size=1))
+
+    assert [b.num_rows for b in batches] == [1, 1, 1]
+    assert all(b.schema.names == ["token_count"] for b in batches)
+    assert pa.Table.from_batches(batches)["token_count"].to_pylist() == [1, 2, 3]
+
+
+def test_open_dataset_with_mixed_formats(tmp_path: Path):
+    pq.write_table(TABLE, tmp_path / "a.parquet")
+    feather.write_feather(TABLE, tmp_path / "b.arrow")
+
+    with pytest.raises(ValueError):
+        open_dataset([tmp_path / "a.parquet", tmp_path / "b.arrow"])
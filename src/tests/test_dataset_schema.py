@@ -1,21 +1,18 @@
 import pytest
-from datasets import load_dataset
 
-from datasheets.dataset_structure import SampleSchema
+from datasheets.dataset_access import dataset_files
+from datasheets.dataset_structure import validate_dataset
 from datasheets.paths import repo_path
 
-from .conftest import DATASET_NAMES, get_dataset_path
+from .conftest import DATASET_NAMES
 
 
 @pytest.mark.parametrize("dataset_name", DATASET_NAMES)
 def test_sample_schema(dataset_name: str):
-    """Ensure that the dataset samples follow the correct schema"""
+    """Ensure that all dataset samples follow the correct schema"""
 
-    dataset_path = get_dataset_path(dataset_name)
-
-    ds = load_dataset(str(dataset_path.resolve()), split="train", streaming=True)
-    sample = next(iter(ds))
-    SampleSchema(**sample)
+    violations = validate_dataset(dataset_files(dataset_name))
+    assert not violations, "\n".join(str(v) for v in violations[:20])
 
 
 @pytest.mark.parametrize("dataset_name", DATASET_NAMES)
@@ -0,0 +1,86 @@
+from datetime import date
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from pydantic import ValidationError
+
+from datasheets.dataset_structure import COLUMN_ORDER, SampleSchema, validate_file
+
+ROWS = [
+    {
+        "id": "a",
+        "text": "some text",
+        "source": "test",
+        "added": "2024-01-01",
+        "created": "2000-01-01, 2020-12-31",
+        "token_count": 2,
+    },
+    {
+        "id": "b",
+        "text": "more text",
+        "source": "test",
+        "added": "2024-01-01T10:00:00",
+        "created": "2000-01-01, 2020-12-31T00:00:00",
+        "token_count": 0,
+    },
+]
+
+
+def test_valid_file(tmp_path: Path):
+    path = tmp_path / "valid.parquet"
+    pq.write_table(pa.Table.from_pylist(ROWS), path)
+
+    assert validate_file(path) == []
+    for row in ROWS:
+        SampleSchema(**row)
+
+
+@pytest.mark.parametrize(
+    "column,value",
+    [
+        ("added", "2024-13-01"),
+        ("created", "2000-01-01"),
+        ("created", "2000-01-01, 2020-12-31, 2021-01-01"),
+        ("created", "2000-01-01, not a date"),
+        ("token_count", -1),
+        ("text", None),
+    ],
+)
+def test_invalid_rows_are_reported(tmp_path: Path, column: str, value):
+    path = tmp_path / "invalid.parquet"
+    rows = [*ROWS, {**ROWS[0], "id": "c", column: value}]
+    pq.write_table(pa.Table.from_pylist(rows), path)
+
+    violations = validate_file(path)
+
+    assert [(v.row, v.id, v.column) for v in violations] == [(2, "c", column)]
+    if column != "token_count":  # the pydantic schema does not check the sign
+        with pytest.raises(ValidationError):
+            SampleSchema(**rows[-1])
+
+
+def test_column_order_and_types(tmp_path: Path):
+    path = tmp_path / "dates.parquet"
+    table = pa.Table.from_pylist(
+        [
+            {
+                **ROWS[0],
+                "added": date(2024, 1, 1),
+                "created": [date(2000, 1, 1), date(2020, 12, 31)],
+            }
+        ]
+    )
+    pq.write_table(table, path)
+    assert validate_file(path) == []
+
+    pq.write_table(
+        table.select(COLUMN_ORDER[::-1]).set_column(0, "token_count", pa.array(["2"])),
+        path,
+    )
+    violations = validate_file(path)
+    assert [(v.row, v.column) for v in violations] == [
+        (None, "columns"),
+        (None, "token_count"),
+    ]
@@ -0,0 +1,59 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from datasheets import dataset_versions
+from datasheets.dataset_versions import VersionCatalog, find_latest_dataset_version
+
+
+def make_versions(dataset_path: Path, versions: list[str]) -> None:
+    for version in versions:
+        (dataset_path / version).mkdir(parents=True)
+
+
+def test_find_latest_dataset_version(tmp_path: Path):
+    dataset_path = tmp_path / "datasets" / "a"
+    make_versions(
+        dataset_path,
+        ["original/v1.0.0", "original/v10.0.0", "dedup/v1.1.0", "dedup/vinvalid"],
+    )
+    assert find_latest_dataset_version(dataset_path) == dataset_path / "dedup/v1.1.0"
+
+    # a new version is found, as it changes the modification time of the directory
+    make_versions(dataset_path, ["processed/v0.1.0"])
+    assert (
+        find_latest_dataset_version(dataset_path) == dataset_path / "processed/v0.1.0"
+    )
+
+    assert find_latest_dataset_version(tmp_path / "datasets" / "missing") is None
+
+
+def test_catalog_only_rescans_modified_datasets(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    make_versions(tmp_path / "a", ["original/v1.0.0"])
+    make_versions(tmp_path / "b", ["original/v1.0.0"])
+
+    scanned = []
+    scan = dataset_versions.scan_dataset_versions
+
+    def scan_and_record(dataset_path: Path):
+        scanned.append(dataset_path.name)
+        return scan(dataset_path)
+
+    monkeypatch.setattr(dataset_versions, "scan_dataset_versions", scan_and_record)
+
+    catalog = VersionCatalog(tmp_path)
+    catalog.latest("a")
+    catalog.latest("b")
+    assert sorted(scanned) == ["a", "b"]  # all datasets are scanned once
+
+    make_versions(tmp_path / "b", ["original/v2.0.0"])
+    # ensures that the modification time differs on file systems with coarse timestamps
+    os.utime(tmp_path / "b" / "original", ns=(0, 0))
+    latest = catalog.latest("b")
+    assert latest is not None
+    assert latest.path == tmp_path / "b" / "original" / "v2.0.0"
+    catalog.latest("a")
+    assert sorted(scanned) == ["a", "b", "b"]
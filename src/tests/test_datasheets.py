@@ -54,3 +54,47 @@ def test_domains_in_frontmatter(dataset_name: str):
     ds_sheet = DataSheet.load_from_path(readme)
 
     assert ds_sheet.domains, "domains annotations are missing"
+
+
+def test_load_cached_reloads_modified_sheets(tmp_path):
+    readme = tmp_path / "dannet.md"
+    readme.write_text((repo_path / "data" / "dannet" / "dannet.md").read_text())
+
+    sheet = DataSheet.load_cached(readme)
+    sheet.body = "modified"
+    # the cached sheet is not affected by changes to the returned copy
+    assert DataSheet.load_cached(readme).body != "modified"
+
+    sheet.write_to_path()
+    assert DataSheet.load_cached(readme).body.strip() == "modified"
+
+
+def test_replace_tags_matches_sequential_replacements():
+    sheet = DataSheet.load_from_path(repo_path / "README.md")
+    packages = {
+        "MAIN TABLE": "main table",
+        "DOMAIN TABLE": "domain table",
+        "LICENSE TABLE": "license table",
+    }
+
+    body = sheet.body
+    for tag, package in packages.items():
+        sheet.body = sheet.replace_tag(package=package, tag=tag)
+    sequential_body = sheet.body
+
+    sheet.body = body
+    assert sheet.replace_tags(packages) == sequential_body
+    for tag, package in packages.items():
+        assert sheet.get_tag_content(tag) != package
+    sheet.body = sequential_body
+    for tag, package in packages.items():
+        assert sheet.get_tag_content(tag) == package
+
+
+def test_section_ends_at_next_header():
+    sheet = DataSheet.load_from_path(repo_path / "README.md")
+    sheet.body = "# A\ntext\n## B\nmore text\n### C\n## D\n"
+
+    assert sheet.get_headers(levels=[2]) == ["## B", "### C", "## D"]
+    assert sheet.get_section_by_header("## B") == "## B\nmore text\n"
+    assert sheet.get_section_by_header("## D") == "## D\n"
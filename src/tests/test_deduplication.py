@@ -0,0 +1,145 @@
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pytest
+
+from datasheets import deduplication
+from datasheets.deduplication import (
+    DocumentReference,
+    MinHashConfig,
+    find_duplicate_ids,
+    find_exact_duplicates,
+    find_near_duplicates,
+    minhash_signatures,
+    overlap_matrix,
+)
+
+from .conftest import write_parquet
+
+
+@pytest.mark.parametrize("num_partitions", [1, 4])
+def test_find_exact_duplicates(tmp_path: Path, num_partitions: int):
+    sources = {
+        "a": [
+            write_parquet(tmp_path / "a-1.parquet", id=["a1", "a2"], text=["x", "y"]),
+            write_parquet(tmp_path / "a-2.parquet", id=["a3", "a4"], text=["z", None]),
+        ],
+        "b": [
+            write_parquet(
+                tmp_path / "b.parquet", id=["b1", "b2", "b3"], text=["y", "w", "x"]
+            )
+        ],
+        "c": [write_parquet(tmp_path / "c.parquet", id=["c1", "c2"], text=["x", None])],
+    }
+
+    groups = find_exact_duplicates(
+        sources, num_partitions=num_partitions, batch_size=1, tmp_dir=tmp_path
+    )
+
+    assert [group.documents for group in groups] == [
+        [
+            DocumentReference("a", "a1"),
+            DocumentReference("b", "b3"),
+            DocumentReference("c", "c1"),
+        ],
+        [DocumentReference("a", "a2"), DocumentReference("b", "b1")],
+    ]
+    assert all(group.is_cross_dataset for group in groups)
+    assert len(groups[0].pairs()) == 3
+
+
+def test_find_near_duplicates(tmp_path: Path):
+    text = " ".join(f"word{i}" for i in range(100))
+    similar_text = text.replace("word50", "other")
+    sources = {
+        "a": [
+            write_parquet(
+                tmp_path / "a.parquet",
+                id=["a1", "a2", "a3"],
+                text=[text, "unrelated", None],
+            )
+        ],
+        "b": [
+            write_parquet(
+                tmp_path / "b.parquet",
+                id=["b1", "b2", "b3"],
+                text=[similar_text, "something else entirely", text.upper()],
+            )
+        ],
+    }
+
+    clusters = find_near_duplicates(
+        sources, config=MinHashConfig(threshold=0.8), batch_size=2, tmp_dir=tmp_path
+    )
+
+    assert len(clusters) == 1
+    assert clusters[0].documents == [
+        DocumentReference("a", "a1"),
+        DocumentReference("b", "b1"),
+        DocumentReference("b", "b3"),
+    ]
+    assert clusters[0].similarities[0] == clusters[0].similarities[2] == 1.0
+    assert 0.8 <= clusters[0].similarities[1] < 1.0
+
+    matrix = overlap_matrix(clusters, ["a", "b"])
+    assert matrix.loc["a"].tolist() == [0, 1]
+    assert matrix.loc["b"].tolist() == [2, 2]
+
+
+def test_minhash_signatures_of_long_documents(monkeypatch: pytest.MonkeyPatch):
+    n_words = 200_000
+    texts = pl.Series(
+        [" ".join(f"word{i}" for i in range(n_words)), "a short text", None]
+    )
+    config = MinHashConfig()
+
+    tracemalloc.start()
+    signatures = minhash_signatures(texts, config)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # hashing all shingles of the batch at once takes 8 bytes per shingle and hash
+    # function in the chunk of hash functions
+    assert peak < n_words * deduplication._PERMUTATION_CHUNK_SIZE * 8
+
+    # the signatures do not depend on how the shingles are chunked
+    monkeypatch.setattr(deduplication, "_SHINGLE_CHUNK_SIZE", 7)
+    np.testing.assert_array_equal(minhash_signatures(texts, config), signatures)
+    monkeypatch.setattr(deduplication, "_SHINGLE_CHUNK_SIZE", 2 * n_words)
+    np.testing.assert_array_equal(minhash_signatures(texts, config), signatures)
+
+
+def test_similarities_of_many_pairs(monkeypatch: pytest.MonkeyPatch):
+    rng = np.random.default_rng(0)
+    signatures = rng.integers(0, 4, size=(1000, 128), dtype=np.uint32)
+    pairs = rng.integers(0, 1000, size=(50_000, 2))
+    expected = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+
+    tracemalloc.start()
+    similarities = deduplication._similarities(signatures, pairs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # the signatures of all pairs take 4 bytes per hash function and pair
+    assert peak < len(pairs) * signatures.shape[1] * 4
+    np.testing.assert_array_equal(similarities, expected)
+
+    monkeypatch.setattr(deduplication, "_PAIR_CHUNK_SIZE", 7)
+    np.testing.assert_array_equal(
+        deduplication._similarities(signatures, pairs), expected
+    )
+
+
+@pytest.mark.parametrize("num_partitions", [1, 3])
+def test_find_duplicate_ids(tmp_path: Path, num_partitions: int):
+    a = write_parquet(tmp_path / "a.parquet", id=["1", "2", "3", "2"], text=["a"] * 4)
+    b = write_parquet(tmp_path / "b.parquet", id=["4", "3"], text=["b"] * 2)
+
+    duplicates = find_duplicate_ids(
+        [a, b], num_partitions=num_partitions, tmp_dir=tmp_path
+    )
+
+    assert [(d.id, d.files) for d in duplicates] == [
+        ("2", [str(a), str(a)]),
+        ("3", [str(a), str(b)]),
+    ]
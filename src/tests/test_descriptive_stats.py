@@ -0,0 +1,111 @@
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from datasets import Dataset
+
+from datasheets.descriptive_stats import (
+    HISTOGRAM_BUCKETS_PER_OCTAVE,
+    DescriptiveStatsOverview,
+    length_histogram,
+)
+
+TEXTS = ["Hej verden", "Æblegrød med fløde 🍎", "", "a" * 1000, "Søren Kierkegaard"]
+TOKEN_COUNTS = [3, 8, 0, 125, 5]
+
+
+def python_histogram(lengths: list[int]) -> list[int]:
+    buckets = [
+        0 if x == 0 else 1 + math.floor(math.log2(x) * HISTOGRAM_BUCKETS_PER_OCTAVE)
+        for x in lengths
+    ]
+    return [buckets.count(b) for b in range(max(buckets) + 1)]
+
+
+def expected_stats() -> DescriptiveStatsOverview:
+    return DescriptiveStatsOverview(
+        number_of_samples=len(TEXTS),
+        number_of_tokens=sum(TOKEN_COUNTS),
+        min_length_tokens=min(TOKEN_COUNTS),
+        max_length_tokens=max(TOKEN_COUNTS),
+        number_of_characters=sum(len(t) for t in TEXTS),
+        min_length_characters=min(len(t) for t in TEXTS),
+        max_length_characters=max(len(t) for t in TEXTS),
+        token_length_histogram=python_histogram(TOKEN_COUNTS),
+        character_length_histogram=python_histogram([len(t) for t in TEXTS]),
+    )
+
+
+def test_from_dataset_matches_python_lengths():
+    ds = Dataset.from_dict({"text": TEXTS, "token_count": TOKEN_COUNTS})
+    assert DescriptiveStatsOverview.from_dataset(ds) == expected_stats()
+
+
+def test_from_parquet_matches_python_lengths(tmp_path: Path):
+    table = pa.table({"text": TEXTS, "token_count": TOKEN_COUNTS})
+    paths = [tmp_path / "a.parquet", tmp_path / "b.parquet"]
+    pq.write_table(table.slice(0, 2), paths[0])
+    pq.write_table(table.slice(2), paths[1], row_group_size=1)
+
+    assert DescriptiveStatsOverview.from_parquet(paths) == expected_stats()
+
+
+def test_from_parquet_without_footer_statistics(tmp_path: Path):
+    table = pa.table({"text": TEXTS, "token_count": TOKEN_COUNTS})
+    path = tmp_path / "a.parquet"
+    pq.write_table(table, path, write_statistics=False)
+
+    assert DescriptiveStatsOverview.from_parquet([path]) == expected_stats()
+
+
+def test_from_parquet_with_nested_columns(tmp_path: Path):
+    # the nested column has two leaves, which shifts the leaves of the later columns
+    metadata = [{"source": "a", "url": str(i)} for i in range(len(TEXTS))]
+    table = pa.table({"metadata": metadata, "text": TEXTS, "token_count": TOKEN_COUNTS})
+    path = tmp_path / "a.parquet"
+    pq.write_table(table, path)
+
+    assert DescriptiveStatsOverview.from_parquet([path]) == expected_stats()
+
+
+def test_histograms_merge_like_sums():
+    rng = np.random.default_rng(0)
+    lengths = rng.lognormal(mean=6, sigma=2, size=100_000).astype(np.int64)
+    texts = ["a"] * len(lengths)
+    first = DescriptiveStatsOverview.from_arrow_batches(
+        [pa.table({"text": texts[:500], "token_count": lengths[:500]})]
+    )
+    second = DescriptiveStatsOverview.from_arrow_batches(
+        [pa.table({"text": texts[500:], "token_count": lengths[500:]})]
+    )
+
+    merged = first + second
+    assert merged.token_length_histogram == length_histogram(pa.array(lengths))
+
+    for q in [0.5, 0.99]:
+        expected = np.quantile(lengths, q, method="lower")
+        estimate = merged.token_length_quantile(q)
+        assert estimate is not None
+        assert abs(estimate - expected) / expected < 0.045
+
+
+def test_stats_without_histograms(tmp_path: Path):
+    """Statistics computed before the histograms were added can still be read and
+    merged, but have no quantiles."""
+    old_stats = {
+        k: v
+        for k, v in expected_stats().__dict__.items()
+        if not k.endswith("_histogram")
+    }
+    path = tmp_path / "descriptive_stats.json"
+    path.write_text(json.dumps(old_stats))
+
+    stats = DescriptiveStatsOverview.from_disk(path)
+    assert stats.token_length_quantile(0.5) is None
+
+    merged = stats + expected_stats()
+    assert merged.number_of_samples == 2 * len(TEXTS)
+    assert merged.token_length_histogram is None
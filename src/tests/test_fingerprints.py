@@ -0,0 +1,56 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from datasheets.fingerprints import FileFingerprint, FingerprintManifest
+
+from .conftest import write_parquet
+
+
+def test_unchanged_files_are_not_rehashed(tmp_path: Path):
+    path = tmp_path / "a.parquet"
+    write_parquet(path, text=["a", "b"])
+
+    manifest = FingerprintManifest()
+    manifest.record("a", manifest.fingerprint("a", [path], root=tmp_path))
+    manifest.to_disk(tmp_path / "fingerprints.json")
+
+    manifest = FingerprintManifest.from_disk(tmp_path / "fingerprints.json")
+    current = manifest.fingerprint("a", [path], root=tmp_path)
+    assert not manifest.has_changed("a", current)
+
+    # only touching the file changes the modification time, not the content
+    os.utime(path, ns=(0, 0))
+    current = manifest.fingerprint("a", [path], root=tmp_path)
+    assert current[0].mtime_ns == 0
+    assert not manifest.has_changed("a", current)
+
+
+def test_changes_are_detected(tmp_path: Path):
+    path = tmp_path / "a.parquet"
+    write_parquet(path, text=["a", "b"])
+
+    manifest = FingerprintManifest()
+    assert manifest.has_changed("a", manifest.fingerprint("a", [path], root=tmp_path))
+    manifest.record("a", manifest.fingerprint("a", [path], root=tmp_path))
+
+    write_parquet(path, text=["a", "b", "c"])
+    assert manifest.has_changed("a", manifest.fingerprint("a", [path], root=tmp_path))
+
+    extra_path = tmp_path / "b.parquet"
+    write_parquet(extra_path, text=["d"])
+    current = manifest.fingerprint("a", [path, extra_path], root=tmp_path)
+    assert manifest.has_changed("a", current)
+
+
+def test_failed_write_keeps_the_manifest(tmp_path: Path):
+    path = tmp_path / "fingerprints.json"
+    fingerprint = FileFingerprint(name="a", size=1, mtime_ns=0, content_hash="x")
+    FingerprintManifest(datasets={"a": [fingerprint]}).to_disk(path)
+
+    unserializable = FileFingerprint(name="b", size=1, mtime_ns=0, content_hash=b"x")  # type: ignore
+    with pytest.raises(TypeError):
+        FingerprintManifest(datasets={"b": [unserializable]}).to_disk(path)
+
+    assert FingerprintManifest.from_disk(path).datasets == {"a": [fingerprint]}
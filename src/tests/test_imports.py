@@ -0,0 +1,28 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY_MODULES = ["datasets", "plotnine", "plotly"]
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "datasheets.bump_version",
+        "datasheets.datasheet",
+        "datasheets.generate_sheet",
+        "datasheets.tables",
+        "datasheets.update_descriptive_statistics",
+    ],
+)
+def test_heavy_modules_are_imported_lazily(module: str):
+    """Guards the startup time of the commands, see benchmarks/import_time.py"""
+    code = (
+        f"import sys\nimport {module}\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from datasheets.plots.descriptive_statistics_plots import (
+    compute_length_histograms,
+    create_descriptive_statistics_plots,
+)
+
+from .conftest import write_parquet
+
+
+def test_compute_length_histograms(tmp_path: Path):
+    write_parquet(
+        tmp_path / "a.parquet", source=["a"] * 100, token_count=list(range(1, 101))
+    )
+    write_parquet(tmp_path / "b.parquet", source=["b"] * 3, token_count=[5, 5, 5])
+
+    df = compute_length_histograms(sorted(tmp_path.glob("*.parquet")), bins=10)
+
+    a = df[df["Source"] == "a"]
+    assert a["count"].sum() == 100
+    assert len(a) == 10
+    assert a["xmin"].min() == 1
+    assert a["xmax"].max() == 100
+
+    b = df[df["Source"] == "b"]
+    assert b["count"].tolist() == [3]
+
+
+def test_create_descriptive_statistics_plots(tmp_path: Path):
+    write_parquet(
+        tmp_path / "a.parquet", source=["a"] * 100, token_count=list(range(1, 101))
+    )
+
+    paths, _ = create_descriptive_statistics_plots(
+        [tmp_path / "a.parquet"], save_dir=tmp_path, dpi=20, formats=["png", "svg"]
+    )
+
+    assert [p.name for p in paths] == [
+        "dist_document_length.png",
+        "dist_document_length.svg",
+    ]
+    assert all(p.exists() for p in paths)
@@ -1,26 +1,50 @@
-from typing import cast
+from itertools import combinations
 
 import pytest
-from datasets import Dataset, load_dataset
 
-from ..conftest import DATASET_NAMES, get_all_datasets, get_dataset_path
+from datasheets.dataset_access import dataset_files
+from datasheets.deduplication import (
+    DuplicateGroup,
+    find_exact_duplicates,
+    format_duplicates,
+)
+
+from ..conftest import DATASET_NAMES, get_quality_results
+
+# pairs of datasets which are known to share documents. Their duplicates are not
+# reported, while any other duplicates across the datasets fail the test
+KNOWN_DUPLICATE_SOURCES: set[frozenset[str]] = set()
+
+
+def is_known_duplicate(group: DuplicateGroup) -> bool:
+    return group.is_cross_dataset and all(
+        frozenset(pair) in KNOWN_DUPLICATE_SOURCES
+        for pair in combinations(sorted(group.sources), 2)
+    )
 
 
 @pytest.mark.parametrize("dataset_name", DATASET_NAMES)
 def test_no_within_data_duplicates(dataset_name: str):
-    dataset_path = get_dataset_path(dataset_name)
-    ds = load_dataset(str(dataset_path.resolve()), split="train")
-    ds = cast(Dataset, ds)
+    result = get_quality_results(dataset_name)["within_source_duplicates"]
 
-    assert len(set(ds["text"])) == len(ds)
+    assert result.passed, str(result)
 
 
-@pytest.mark.skip(
-    "This tests takes too long to run"
-)  # there seems to be some duplicate across
+# strict, such that the test fails once the known duplicates are listed (or removed),
+# as a reminder to drop the mark and catch any new duplicates
+@pytest.mark.xfail(
+    reason="There are duplicates across the datasets, which are yet to be listed in "
+    "KNOWN_DUPLICATE_SOURCES",
+    strict=True,
+)
 def test_no_data_duplicates():
-    load_kwargs = get_all_datasets()
-    ds = load_dataset(**load_kwargs)
-    ds = cast(Dataset, ds)
-
-    assert len(set(ds["text"])) == len(ds)
+    sources = {
+        dataset_name: dataset_files(dataset_name) for dataset_name in DATASET_NAMES
+    }
+    duplicates = [
+        group
+        for group in find_exact_duplicates(sources)
+        if not is_known_duplicate(group)
+    ]
+
+    assert len(duplicates) == 0, format_duplicates(duplicates)
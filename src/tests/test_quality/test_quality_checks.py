@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import polars as pl
+
+from datasheets.quality import DEFAULT_CHECKS, _violations_query, check_source
+
+from ..conftest import write_parquet
+
+
+def test_check_source(tmp_path: Path):
+    write_parquet(
+        tmp_path / "a.parquet",
+        row_group_size=2,
+        id=["a", "b", "c"],
+        text=["one", "two words", "x y"],
+        token_count=[1, 2, 2],
+    )
+    write_parquet(
+        tmp_path / "b.parquet",
+        row_group_size=2,
+        id=["d", "e"],
+        text=["two words", "three more words"],
+        token_count=[2, 3],
+    )
+
+    results = check_source(
+        sorted(tmp_path.glob("*.parquet")), source="test", n_examples=1
+    )
+
+    assert results["one_word_documents"].n_violations == 1
+    assert results["one_word_documents"].examples == ["a"]
+    # duplicates are found across the files of a source
+    assert results["within_source_duplicates"].n_violations == 2
+    assert len(results["within_source_duplicates"].examples) == 1
+
+
+def test_check_source_passes(tmp_path: Path):
+    write_parquet(
+        tmp_path / "a.parquet",
+        row_group_size=2,
+        id=["a", "b"],
+        text=["two words", "three more words"],
+        token_count=[2, 3],
+    )
+
+    results = check_source([tmp_path / "a.parquet"], source="test")
+
+    assert all(result.passed for result in results.values())
+    assert str(results["one_word_documents"]) == "test: one_word_documents passed"
+
+
+def test_checks_scan_the_files_once(tmp_path: Path):
+    write_parquet(
+        tmp_path / "a.parquet",
+        row_group_size=2,
+        id=["a"],
+        text=["one"],
+        token_count=[1],
+    )
+
+    plan = _violations_query(pl.scan_parquet(tmp_path / "a.parquet"), DEFAULT_CHECKS)
+
+    assert plan.explain().count("Parquet SCAN") == 1
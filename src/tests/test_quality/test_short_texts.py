@@ -1,20 +1,13 @@
-from typing import cast
-
 import pytest
-from datasets import Dataset, load_dataset
 
-from ..conftest import DATASET_NAMES, get_dataset_path
+from ..conftest import DATASET_NAMES, get_quality_results
 
 
 @pytest.mark.parametrize("dataset_name", DATASET_NAMES)
 # @pytest.mark.skip("This tests currently fails")
 def test_no_one_word_documents(dataset_name: str):
-    dataset_path = get_dataset_path(dataset_name)
-    ds = load_dataset(str(dataset_path.resolve()), split="train")
-    ds = cast(Dataset, ds)
-
-    one_word_docs = ds.filter(lambda x: x["token_count"] <= 1)
+    result = get_quality_results(dataset_name)["one_word_documents"]
 
-    assert len(one_word_docs) == 0, (
-        f"Found {len(one_word_docs)} one-word documents in dataset '{dataset_name}'"
+    assert result.passed, (
+        f"Found {result.n_violations} one-word documents in dataset '{dataset_name}'"
     )
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pyarrow.parquet as pq
+import pytest
+
+from datasheets.sync_dynaword import HashCache, atomic_copy, copy_parquet_files
+
+from .conftest import write_parquet
+
+
+@pytest.mark.parametrize("allow_hardlink", [True, False])
+def test_atomic_copy(tmp_path: Path, allow_hardlink: bool):
+    source = tmp_path / "source.parquet"
+    destination = tmp_path / "out" / "destination.parquet"
+    write_parquet(source, text=["a"])
+
+    method = atomic_copy(source, destination, allow_hardlink=allow_hardlink)
+
+    assert method in (
+        ["reflink", "hardlink", "copy"] if allow_hardlink else ["reflink", "copy"]
+    )
+    assert destination.read_bytes() == source.read_bytes()
+    # no temporary files are left behind
+    assert [p.name for p in destination.parent.iterdir()] == ["destination.parquet"]
+
+
+def test_atomic_copy_does_not_hardlink_by_default(tmp_path: Path):
+    source = tmp_path / "source.parquet"
+    destination = tmp_path / "destination.parquet"
+    write_parquet(source, text=["a"])
+
+    assert atomic_copy(source, destination) in ["reflink", "copy"]
+    assert not destination.samefile(source)
+
+
+def test_copy_parquet_files_skips_unchanged_files(tmp_path: Path):
+    input_folder = tmp_path / "dynaword" / "data"
+    output_folder = tmp_path / "datasets"
+    write_parquet(input_folder / "a" / "a.parquet", text=["x"])
+    write_parquet(input_folder / "b" / "b.parquet", text=["y"])
+    write_parquet(output_folder / "b" / "original" / "v1.1.0" / "b.parquet", text=["y"])
+    hashes = HashCache()
+
+    changed = copy_parquet_files(
+        input_folder, output_folder, hashes, allow_hardlink=False
+    )
+    assert changed == ["a"]
+    assert (output_folder / "a" / "original" / "v1.0.0" / "a.parquet").exists()
+
+    assert copy_parquet_files(input_folder, output_folder, hashes) == []
+
+    # a changed file of the same size is detected by its hash
+    write_parquet(input_folder / "b" / "b.parquet", text=["z"])
+    assert copy_parquet_files(input_folder, output_folder, hashes) == ["b"]
+    destination = output_folder / "b" / "original" / "v1.1.0" / "b.parquet"
+    assert pq.read_table(destination)["text"].to_pylist() == ["z"]
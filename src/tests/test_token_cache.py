@@ -0,0 +1,49 @@
+from pathlib import Path
+
+from datasheets.token_cache import TokenCountCache
+
+
+def count_words(texts: list[str]) -> list[int]:
+    return [len(text.split()) for text in texts]
+
+
+def test_only_missing_texts_are_counted(tmp_path: Path):
+    counted: list[str] = []
+
+    def count_fn(texts: list[str]) -> list[int]:
+        counted.extend(texts)
+        return count_words(texts)
+
+    with TokenCountCache(tmp_path / "cache.sqlite", tokenizer_id="a") as cache:
+        assert cache.count(["a b", "c", "a b"], count_fn) == [2, 1, 2]
+        assert counted == ["a b", "c"]
+
+        assert cache.count(["c", "d e f"], count_fn) == [1, 3]
+        assert counted == ["a b", "c", "d e f"]
+        assert (cache.stats.hits, cache.stats.misses) == (2, 3)
+
+
+def test_cache_persists_per_tokenizer(tmp_path: Path):
+    path = tmp_path / "cache.sqlite"
+    with TokenCountCache(path, tokenizer_id="a") as cache:
+        cache.count(["a b"], count_words)
+
+    with TokenCountCache(path, tokenizer_id="a") as cache:
+        cache.count(["a b"], count_words)
+        assert cache.stats.hits == 1
+
+    with TokenCountCache(path, tokenizer_id="b") as cache:
+        cache.count(["a b"], count_words)
+        assert cache.stats.misses == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: Path):
+    cache = TokenCountCache(tmp_path / "cache.sqlite", tokenizer_id="a", max_entries=2)
+    cache.count(["old"], count_words)
+    cache.count(["new", "newer"], count_words)
+    cache.count(["new", "newer"], count_words)
+
+    assert cache.evict() == 1
+    assert len(cache) == 2
+    assert cache.get_many([cache.key("old")]) == {}
+    cache.close()
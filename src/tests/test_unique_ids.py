@@ -1,15 +1,10 @@
-from collections import Counter
-from typing import cast
+from datasheets.dataset_access import dataset_files
+from datasheets.deduplication import find_duplicate_ids
 
-from datasets import Dataset, load_dataset
-
-from tests.conftest import get_all_datasets
+from .conftest import DATASET_NAMES
 
 
 def test_ensure_ids_are_unique():
-    load_kwargs = get_all_datasets()
-    ds = load_dataset(**load_kwargs)
-    ds = cast(Dataset, ds)
-    counter = Counter(ds["id"])
-    duplicates = [item for item, count in counter.items() if count > 1]
-    assert len(duplicates) == 0, f"Duplicate IDs found: {duplicates}"
+    paths = [path for dataset in DATASET_NAMES for path in dataset_files(dataset)]
+    duplicates = find_duplicate_ids(paths)
+    assert len(duplicates) == 0, f"Duplicate IDs found: {duplicates[:10]}"
@@ -0,0 +1,29 @@
+import pickle
+import threading
+
+import pytest
+
+from datasheets import update_descriptive_statistics
+from datasheets.update_descriptive_statistics import (
+    DatasetUpdateError,
+    _update_dataset_in_worker,
+)
+
+
+def test_worker_marks_dataset_failures(monkeypatch: pytest.MonkeyPatch):
+    class UnpicklableError(Exception):
+        def __init__(self):
+            super().__init__("broken dataset")
+            self.lock = threading.Lock()
+
+    def failing_update(dataset_name: str, **kwargs) -> bool:
+        raise UnpicklableError()
+
+    monkeypatch.setattr(update_descriptive_statistics, "update_dataset", failing_update)
+
+    with pytest.raises(DatasetUpdateError, match="broken dataset") as exc_info:
+        _update_dataset_in_worker("a", False, None, 20, ["png"])
+
+    # the error is sent back from the worker process
+    error = pickle.loads(pickle.dumps(exc_info.value))
+    assert str(error) == "UnpicklableError: broken dataset"